@@ -9,10 +9,13 @@ from typing import Optional
 from core.security import decode_token
 from core.redis_client import RedisClient
 from models.user import User
+from models.project import Project
+from bson import ObjectId
 from schemas.auth import TokenData
 
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
@@ -78,6 +81,18 @@ async def get_current_user(
     return user
 
 
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[User]:
+    """
+    Utilisateur authentifié si un token est fourni, None sinon (routes
+    lisibles anonymement pour les projets publics, ex. aperçus de la galerie).
+    """
+    if credentials is None:
+        return None
+    return await get_current_user(credentials)
+
+
 async def get_current_admin_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -115,3 +130,30 @@ async def get_current_active_superuser(
             detail="Not enough privileges"
         )
     return current_user
+
+
+async def get_readable_project_doc(project_id: str, current_user: Optional[User], fields: dict) -> dict:
+    """
+    Charge les champs demandés d'un projet lisible par l'utilisateur
+    (propriétaire ou projet public ; projets publics seulement sans
+    utilisateur), sans désérialiser graph_data.
+
+    Raises:
+        HTTPException: 404 si le projet n'existe pas, 403 s'il est privé
+    """
+    if not ObjectId.is_valid(project_id):
+        raise HTTPException(status_code=404, detail="Projet introuvable")
+
+    doc = await Project.get_motor_collection().find_one(
+        {"_id": ObjectId(project_id)},
+        {"owner": 1, "is_public": 1, **fields}
+    )
+    if not doc:
+        raise HTTPException(status_code=404, detail="Projet introuvable")
+
+    owner = doc.get("owner")
+    is_owner = owner is not None and current_user is not None and owner.id == current_user.id
+    if not is_owner and not doc.get("is_public", True):
+        raise HTTPException(status_code=403, detail="Projet privé : Accès interdit.")
+
+    return doc
@@ -1,12 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from pathlib import Path
 from typing import List, Optional
 from pydantic import BaseModel
 from api.dependencies import get_current_admin_user
 from models.user import User
-from models.project import Project
-from schemas.admin import AdminStats, UserAdminView, UserUpdateAdmin, ProjectAdminView, UserCreateAdmin
+from models.project import Project, ProjectState
+from models.profile_artifact import ProfileArtifact
+from schemas.admin import (
+    AdminStats, StatsPoint, UserAdminView, UserUpdateAdmin, ProjectAdminView, UserCreateAdmin,
+    ProfileArtifactView, ProfileArtifactDetail
+)
 from beanie import PydanticObjectId
 from core.security import hash_password
+from services.gallery import invalidate_gallery
+from services.project_expiry import sync_owner_expiry
+from services.project_deletion import delete_projects, DELETION_FIELDS
+from services.project_store import update_project_fields, ProjectConflict
+from core.search_terms import search_terms, prefix_query
+from services.admin_listing import list_admin_projects, list_admin_users
+from services.admin_stats import get_stats, stats_history
+from services.profiling import list_artifacts
+from services.speculative import preempt_speculative_jobs
+from tasks import async_process_graph_file
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -17,49 +32,37 @@ class ProjectUpdateAdmin(BaseModel):
 
 @router.get("/stats", response_model=AdminStats)
 async def get_admin_stats(admin: User = Depends(get_current_admin_user)):
-    total_users = await User.count()
-    active_users = await User.find(User.is_active == True).count()
-    total_projects = await Project.count()
-    public_projects = await Project.find(Project.is_public == True).count()
-    
-    return AdminStats(
-        total_users=total_users,
-        total_projects=total_projects,
-        active_users=active_users,
-        public_projects=public_projects
-    )
+    """Compteurs et distributions (une agrégation, mise en cache ADMIN_STATS_TTL secondes)."""
+    return AdminStats(**await get_stats())
+
+@router.get("/stats/history", response_model=List[StatsPoint])
+async def get_admin_stats_history(
+    days: int = Query(30, ge=1, le=365),
+    resolution: str = "day",
+    admin: User = Depends(get_current_admin_user)
+):
+    """Évolution des compteurs, lue dans les relevés horaires (`stats_snapshots`)."""
+    try:
+        return await stats_history(days, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/users", response_model=List[UserAdminView])
 async def get_users(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
     search: str = None,
     admin: User = Depends(get_current_admin_user)
 ):
-    query = User.find_all()
-    if search:
-        # Simple regex search for email or full_name
-        query = User.find({"$or": [
-            {"email": {"$regex": search, "$options": "i"}},
-            {"full_name": {"$regex": search, "$options": "i"}}
-        ]})
-    
-    users = await query.skip(skip).limit(limit).sort("-created_at").to_list()
-    
-    return [
-        UserAdminView(
-            id=str(user.id),
-            email=user.email,
-            full_name=user.full_name,
-            is_active=user.is_active,
-            is_superuser=user.is_superuser,
-            role=user.role,
-            is_elite=user.is_elite,
-            elite_request_status=user.elite_request_status,
-            elite_request_date=user.elite_request_date,
-            created_at=user.created_at
-        ) for user in users
-    ]
+    """
+    Page d'utilisateurs (plus récents d'abord). `search` est un préfixe d'un mot
+    de l'email ou du nom (recherche indexée, insensible à la casse et aux accents).
+    Le nombre total d'utilisateurs filtrés est renvoyé dans l'en-tête X-Total-Count.
+    """
+    items, total = await list_admin_users(prefix_query("search_terms", search), skip, limit)
+    response.headers["X-Total-Count"] = str(total)
+    return [UserAdminView(**item) for item in items]
 
 @router.post("/users", response_model=UserAdminView, status_code=status.HTTP_201_CREATED)
 async def create_user(
@@ -94,6 +97,7 @@ async def create_user(
         is_elite=user.is_elite,
         elite_request_status=user.elite_request_status,
         elite_request_date=user.elite_request_date,
+        profiling_enabled=user.profiling_enabled,
         created_at=user.created_at
     )
 
@@ -115,6 +119,9 @@ async def update_user(
         
     if update_data.elite_request_status is not None:
         user.elite_request_status = update_data.elite_request_status
+    
+    if update_data.profiling_enabled is not None:
+        user.profiling_enabled = update_data.profiling_enabled
         
     if update_data.role is not None:
         user.role = update_data.role
@@ -124,6 +131,9 @@ async def update_user(
             user.is_superuser = False
             
     await user.save()
+    if update_data.is_elite is not None or update_data.role is not None:
+        # Plan dénormalisé sur les projets : expiration ajoutée ou levée
+        await sync_owner_expiry(user)
     
     return UserAdminView(
         id=str(user.id),
@@ -135,6 +145,7 @@ async def update_user(
         is_elite=user.is_elite,
         elite_request_status=user.elite_request_status,
         elite_request_date=user.elite_request_date,
+        profiling_enabled=user.profiling_enabled,
         created_at=user.created_at
     )
 
@@ -156,8 +167,9 @@ async def delete_user(
 
 @router.get("/projects", response_model=List[ProjectAdminView])
 async def get_projects(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
     search: str = None,
     sort_by: str = "created_at",
     sort_order: str = "desc",
@@ -165,59 +177,29 @@ async def get_projects(
     owner_email: Optional[str] = None,
     admin: User = Depends(get_current_admin_user)
 ):
-    query = Project.find_all()
-    
-    if search:
-        query = Project.find({"name": {"$regex": search, "$options": "i"}})
-        
+    """
+    Page de projets avec l'email de leur propriétaire, en une agrégation.
+    Le nombre total de projets filtrés est renvoyé dans l'en-tête X-Total-Count.
+    """
+    match = prefix_query("name_terms", search)
     if is_public is not None:
-        query = query.find(Project.is_public == is_public)
+        match["is_public"] = is_public
 
     if owner_email:
-        user = await User.find_one(User.email == owner_email)
-        if user:
-            query = query.find(Project.owner.id == user.id)
-        else:
+        # Lecture indexée (email unique) de l'identifiant seul
+        owner = await User.get_motor_collection().find_one({"email": owner_email}, {"_id": 1})
+        if not owner:
+            response.headers["X-Total-Count"] = "0"
             return []
+        match["owner.$id"] = owner["_id"]
 
-    # Sorting
-    sort_field = f"-{sort_by}" if sort_order == "desc" else sort_by
-    if sort_by not in ["created_at", "name", "node_count", "edge_count"]:
-        sort_field = "-created_at"
-        
-    projects = await query.skip(skip).limit(limit).sort(sort_field).to_list()
-    
-    results = []
-    for p in projects:
-        owner_email_str = "Unknown"
-        if p.owner:
-            try:
-                if isinstance(p.owner, User):
-                    owner_email_str = p.owner.email
-                else:
-                    owner = await p.owner.fetch()
-                    if owner:
-                        owner_email_str = owner.email
-            except:
-                pass
-        
-        node_count = 0
-        edge_count = 0
-        if p.metadata:
-            node_count = p.metadata.get("node_count", 0)
-            edge_count = p.metadata.get("edge_count", 0)
-            
-        results.append(ProjectAdminView(
-            id=str(p.id),
-            name=p.name,
-            owner_email=owner_email_str,
-            is_public=p.is_public,
-            created_at=p.created_at,
-            node_count=node_count,
-            edge_count=edge_count
-        ))
-        
-    return results
+    try:
+        items, total = await list_admin_projects(match, sort_by, sort_order, skip, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response.headers["X-Total-Count"] = str(total)
+    return [ProjectAdminView(**item) for item in items]
 
 @router.patch("/projects/{project_id}", response_model=ProjectAdminView)
 async def update_project(
@@ -225,47 +207,43 @@ async def update_project(
     update_data: ProjectUpdateAdmin,
     admin: User = Depends(get_current_admin_user)
 ):
-    project = await Project.get(project_id)
+    project = await Project.find_one(Project.id == project_id, projection_model=ProjectState)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Strict Privacy: Admin cannot control private projects (unless they are owner)
-    if not project.is_public and project.owner.ref.id != admin.id:
+    if not project.is_public and project.owner.id != admin.id:
         raise HTTPException(status_code=403, detail="Projet privé : Modification administrative intérdite.")
 
-    if update_data.name is not None:
-        project.name = update_data.name
-    if update_data.description is not None:
-        project.description = update_data.description
-    if update_data.is_public is not None:
-        project.is_public = update_data.is_public
-        
-    await project.save()
+    changes = update_data.model_dump(exclude_none=True)
+    if changes:
+        fields = {**changes, "name_terms": search_terms(changes["name"])} if "name" in changes else changes
+        try:
+            await update_project_fields(project.id, fields, project.version)
+        except ProjectConflict:
+            raise HTTPException(status_code=409, detail="Project modified concurrently, reload and retry")
+        if project.is_featured:
+            await invalidate_gallery()
+        project = project.model_copy(update=changes)
 
     # Construct response
     owner_email_str = "Unknown"
     if project.owner:
         try:
-            if isinstance(project.owner, User):
-                owner_email_str = project.owner.email
-            else:
-                owner = await project.owner.fetch()
-                if owner:
-                    owner_email_str = owner.email
+            owner = await User.get(project.owner.id)
+            if owner:
+                owner_email_str = owner.email
         except:
             pass
 
-    node_count = project.metadata.get("node_count", 0) if project.metadata else 0
-    edge_count = project.metadata.get("edge_count", 0) if project.metadata else 0
-
     return ProjectAdminView(
         id=str(project.id),
         name=project.name,
         owner_email=owner_email_str,
         is_public=project.is_public,
         created_at=project.created_at,
-        node_count=node_count,
-        edge_count=edge_count
+        node_count=project.node_count,
+        edge_count=project.edge_count
     )
 
 @router.delete("/projects/{project_id}")
@@ -273,9 +251,84 @@ async def delete_project(
     project_id: PydanticObjectId,
     admin: User = Depends(get_current_admin_user)
 ):
-    project = await Project.get(project_id)
-    if not project:
+    doc = await Project.get_motor_collection().find_one({"_id": project_id}, DELETION_FIELDS)
+    if not doc:
         raise HTTPException(status_code=404, detail="Project not found")
         
-    await project.delete()
+    await delete_projects([doc])
     return {"message": "Project deleted successfully"}
+
+
+@router.post("/projects/{project_id}/profile")
+async def profile_project_job(
+    project_id: PydanticObjectId,
+    admin: User = Depends(get_current_admin_user)
+):
+    """Relance le calcul du layout courant d'un projet sous profilage (seules les positions sont réécrites)."""
+    project = await Project.get(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if not project.is_public and project.owner.ref.id != admin.id:
+        raise HTTPException(status_code=403, detail="Projet privé : Modification administrative intérdite.")
+
+    if not project.source_file_path or not Path(project.source_file_path).exists():
+        raise HTTPException(status_code=404, detail="Fichier source introuvable sur le disque")
+
+    await preempt_speculative_jobs()
+    celery_task = async_process_graph_file.delay(
+        project.source_file_path,
+        project.mapping or {},
+        project.algorithm or "auto",
+        str(project.id),
+        False, # is_new_project
+        layout_only=True,
+        profile="admin"
+    )
+    return {"job_id": celery_task.id, "status": "PENDING"}
+
+@router.get("/profiles", response_model=List[ProfileArtifactView])
+async def get_profiles(
+    skip: int = 0,
+    limit: int = Query(50, le=200),
+    project_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    admin: User = Depends(get_current_admin_user)
+):
+    return await list_artifacts(project_id=project_id, user_id=user_id, skip=skip, limit=limit)
+
+async def _get_profile(profile_id: PydanticObjectId) -> ProfileArtifact:
+    artifact = await ProfileArtifact.get(profile_id)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Profil introuvable")
+    return artifact
+
+@router.get("/profiles/{profile_id}", response_model=ProfileArtifactDetail)
+async def get_profile(
+    profile_id: PydanticObjectId,
+    admin: User = Depends(get_current_admin_user)
+):
+    artifact = await _get_profile(profile_id)
+    return ProfileArtifactDetail(id=str(artifact.id), **artifact.model_dump(exclude={"id", "folded"}))
+
+@router.get("/profiles/{profile_id}/flamegraph")
+async def download_profile_flamegraph(
+    profile_id: PydanticObjectId,
+    admin: User = Depends(get_current_admin_user)
+):
+    """Piles échantillonnées au format folded (flamegraph.pl, speedscope)."""
+    artifact = await _get_profile(profile_id)
+    return Response(
+        content=artifact.folded,
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="profile-{artifact.task_id}.folded"'}
+    )
+
+@router.delete("/profiles/{profile_id}")
+async def delete_profile(
+    profile_id: PydanticObjectId,
+    admin: User = Depends(get_current_admin_user)
+):
+    artifact = await _get_profile(profile_id)
+    await artifact.delete()
+    return {"message": "Profile deleted successfully"}
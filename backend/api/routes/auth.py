@@ -208,7 +208,7 @@ async def logout(
             if ttl > 0:
                 await RedisClient.blacklist_token(token, ttl)
 
-    # Free Plan: Delete all projects on logout
+    # Free Plan: Delete all projects on logout (fichiers et dépendances compris)
     if not current_user.is_elite and not current_user.is_superuser:
-        from models.project import Project
-        await Project.find(Project.owner.id == current_user.id).delete()
+        from services.project_expiry import purge_owner_projects
+        await purge_owner_projects(current_user)
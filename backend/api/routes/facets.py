@@ -0,0 +1,85 @@
+"""
+Routes API des facettes d'attributs et de l'évaluation de filtres côté serveur.
+"""
+
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List, Dict, Any
+from pydantic import BaseModel
+
+from models.user import User
+from api.dependencies import get_current_user, get_readable_project_doc
+from services.facets import frame_cache, compute_facets, evaluate_filter, pack_bitset
+
+
+router = APIRouter(prefix="/projects/{project_id}", tags=["Facets"])
+
+
+class FilterCondition(BaseModel):
+    attribute: str
+    op: str = "eq"  # eq, ne, gt, gte, lt, lte, in, contains, between, missing
+    value: Any = None
+
+
+class FilterRequest(BaseModel):
+    conditions: List[FilterCondition]
+    mode: str = "all"  # all (ET) ou any (OU)
+
+
+async def _get_processed_project(project_id: str, current_user: User, fields: dict) -> dict:
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1, "parent_id": 1, **fields})
+    if doc.get("parent_id"):
+        raise HTTPException(status_code=400, detail="Facettes indisponibles sur un projet dérivé (interroger le parent)")
+    if not doc.get("topology_key"):
+        raise HTTPException(status_code=409, detail="Le graphe du projet n'est pas encore traité")
+    return doc
+
+
+@router.get("/facets", response_model=Dict[str, Any])
+async def get_facets(
+    project_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Facettes des attributs de nœuds : top-K des valeurs pour les catégoriels,
+    min/max/histogramme pour les numériques. Calculées à l'ingestion ; pour
+    les projets antérieurs, calculées à la volée.
+    """
+    doc = await _get_processed_project(project_id, current_user, {"metadata.facets": 1})
+    facets = (doc.get("metadata") or {}).get("facets")
+
+    if facets is None:
+        frame = await frame_cache.get(project_id, doc["topology_key"])
+        facets = await asyncio.to_thread(compute_facets, frame.df)
+
+    return {"facets": facets}
+
+
+@router.post("/filter")
+async def filter_nodes(
+    project_id: str,
+    request: FilterRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Évalue un filtre sur les attributs des nœuds. Retourne un bitset
+    little-endian (bit i = nœud i de graph_data["nodes"]).
+    """
+    doc = await _get_processed_project(project_id, current_user, {})
+    frame = await frame_cache.get(project_id, doc["topology_key"])
+
+    try:
+        mask = await asyncio.to_thread(
+            evaluate_filter, frame.df, [c.model_dump() for c in request.conditions], request.mode
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return Response(
+        content=pack_bitset(mask),
+        media_type="application/octet-stream",
+        headers={
+            "X-Node-Count": str(len(mask)),
+            "X-Match-Count": str(int(mask.sum()))
+        }
+    )
@@ -0,0 +1,103 @@
+"""
+Routes API de la hiérarchie de niveaux de détail (super-nœuds des grands graphes).
+"""
+
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from models.user import User
+from api.dependencies import get_current_user, get_readable_project_doc
+from services.layout_variants import get_variant, unpack_positions
+from services.lod import lod_cache, LodHierarchy
+from services.topology import topology_cache
+
+
+router = APIRouter(prefix="/projects/{project_id}/lod", tags=["LOD"])
+
+
+async def _get_hierarchy(
+    project_id: str,
+    current_user: User,
+    algorithm: Optional[str]
+) -> Tuple[LodHierarchy, np.ndarray, str]:
+    """
+    Hiérarchie en cache et positions des nœuds dans la variante de layout
+    demandée (algorithme courant du projet par défaut).
+    """
+    doc = await get_readable_project_doc(
+        project_id, current_user,
+        {"topology_key": 1, "parent_id": 1, "lod_path": 1, "algorithm": 1}
+    )
+
+    if doc.get("parent_id"):
+        raise HTTPException(status_code=400, detail="Niveaux de détail indisponibles sur un projet dérivé")
+    if not doc.get("topology_key"):
+        raise HTTPException(status_code=409, detail="Le graphe du projet n'est pas encore traité")
+    if not doc.get("lod_path"):
+        raise HTTPException(status_code=404, detail="Pas de hiérarchie LOD pour ce projet (graphe affiché en entier)")
+
+    topology_key = doc["topology_key"]
+    hierarchy = await lod_cache.get(project_id, topology_key)
+
+    algorithm = algorithm or doc.get("algorithm")
+    variant = await get_variant(project_id, algorithm, topology_key)
+    if not variant:
+        raise HTTPException(status_code=404, detail=f"Aucune variante de layout '{algorithm}' pour ce projet")
+
+    positions = hierarchy.cached_positions(algorithm, variant.created_at)
+    if positions is None:
+        positions = unpack_positions(variant.positions).astype(np.float64)
+        hierarchy.remember_positions(algorithm, variant.created_at, positions)
+        lod_cache.touch(project_id, topology_key)
+    return hierarchy, positions, topology_key
+
+
+async def _run(fn, *args) -> Dict[str, Any]:
+    try:
+        return await asyncio.to_thread(fn, *args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("", response_model=Dict[str, Any])
+async def get_lod_overview(
+    project_id: str,
+    algorithm: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Résumé des niveaux et vue du niveau le plus grossier (premier affichage)."""
+    hierarchy, positions, _ = await _get_hierarchy(project_id, current_user, algorithm)
+    view = await _run(hierarchy.level_view, hierarchy.levels, positions)
+    return {"levels": hierarchy.summary(), **view}
+
+
+@router.get("/{level}", response_model=Dict[str, Any])
+async def get_lod_level(
+    project_id: str,
+    level: int,
+    algorithm: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Super-nœuds d'un niveau (1 = le plus fin) et arêtes agrégées entre eux."""
+    hierarchy, positions, _ = await _get_hierarchy(project_id, current_user, algorithm)
+    return await _run(hierarchy.level_view, level, positions)
+
+
+@router.get("/{level}/clusters/{cluster}/children", response_model=Dict[str, Any])
+async def get_cluster_children(
+    project_id: str,
+    level: int,
+    cluster: int,
+    algorithm: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Dépliage d'un super-nœud : ses enfants au niveau inférieur ou, au niveau 1,
+    les nœuds eux-mêmes (indices dans graph_data["nodes"]) et leurs arêtes.
+    """
+    hierarchy, positions, topology_key = await _get_hierarchy(project_id, current_user, algorithm)
+    topology = await topology_cache.get(project_id, topology_key) if level == 1 else None
+    return await _run(hierarchy.children, level, cluster, positions, topology)
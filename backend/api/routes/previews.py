@@ -0,0 +1,79 @@
+"""
+Routes API des aperçus de layout (vignette PNG, nuage de points réduit).
+Lisibles sans authentification pour les projets publics : la galerie les
+affiche sans charger aucun graphe complet.
+"""
+
+import asyncio
+import os
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from typing import Optional
+
+from models.user import User
+from api.dependencies import get_optional_user, get_readable_project_doc
+from services.preview import load_preview
+
+
+router = APIRouter(prefix="/projects/{project_id}", tags=["Previews"])
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # URL versionnée (?v=<preview_key>) : contenu figé
+
+
+async def _preview_response(
+    project_id: str,
+    kind: str,
+    media_type: str,
+    version: Optional[str],
+    if_none_match: Optional[str],
+    current_user: Optional[User]
+) -> Response:
+    doc = await get_readable_project_doc(project_id, current_user, {
+        "preview_path": 1, "preview_key": 1, "metadata.preview": 1
+    })
+    path, key = doc.get("preview_path"), doc.get("preview_key")
+    if not path or not key or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Aperçu indisponible pour ce projet")
+
+    scope = "public" if doc.get("is_public", True) else "private"
+    headers = {
+        "ETag": f'"{key}"',
+        # Sans version (ou version périmée) : revalidation par ETag à chaque affichage
+        "Cache-Control": f"{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable" if version == key else f"{scope}, no-cache"
+    }
+    if kind == "points":
+        summary = (doc.get("metadata") or {}).get("preview") or {}
+        headers["X-Node-Count"] = str(summary.get("points", 0))
+        headers["X-Total-Nodes"] = str(summary.get("node_count", 0))
+    if if_none_match and key in if_none_match:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        content = await asyncio.to_thread(load_preview, path, kind)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Aperçu indisponible pour ce projet")
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+@router.get("/thumbnail.png")
+async def get_project_thumbnail(
+    project_id: str,
+    v: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """Vignette PNG du layout courant."""
+    return await _preview_response(project_id, "thumbnail", "image/png", v, if_none_match, current_user)
+
+
+@router.get("/preview.bin")
+async def get_project_point_cloud(
+    project_id: str,
+    v: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
+    """
+    Nuage de points réduit (nœuds de plus fort degré, par degré décroissant) :
+    float32 little-endian N x 3, positions normalisées dans [-1, 1].
+    """
+    return await _preview_response(project_id, "points", "application/octet-stream", v, if_none_match, current_user)
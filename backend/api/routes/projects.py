@@ -3,39 +3,45 @@ Routes API pour la gestion des projets.
 Inclut les opérations CRUD et le workflow asynchrone Celery.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Response, Query
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from pathlib import Path
 import uuid
 import json
 import shutil
-import math
+import asyncio
+import numpy as np
 from datetime import datetime, timezone
 from beanie import PydanticObjectId
+from bson import ObjectId
 from celery.result import AsyncResult
 
 from models.user import User
-from models.project import Project
-from api.dependencies import get_current_user
+from models.project import Project, ProjectSummary, ProjectState
+from api.dependencies import get_current_user, get_readable_project_doc
 from services.graph_service import process_graph_file, analyze_file_structure
-from tasks import async_process_graph_file
+from services.layout_variants import get_variant, list_variants, apply_positions, mark_variant_used, save_variant
+from services.node_columns import list_columns, get_column, unpack_values
+from services.graph_analytics import validate_metrics, ANALYTICS_METRICS
+from services.topology import topology_cache, MAX_HOPS
+from services.backbone import backbone_cache, validate_method, BACKBONE_METHODS, BACKBONE_EDGE_BUDGET
+from services.subgraph import (
+    SUBGRAPH_MAX_NODES, SUBGRAPH_INLINE_SECONDS, match_predicate, layout_subgraph, predict_subgraph_layout, build_subgraph,
+    subgraph_graph_data, derive_topology_key
+)
+from services.share_cache import clean_nans
+from services.gallery import gallery_page, invalidate_gallery, GALLERY_DEFAULT_LIMIT, GALLERY_MAX_LIMIT
+from core.search_terms import search_terms
+from services.project_expiry import free_plan_expiry
+from services.project_deletion import delete_projects, DELETION_FIELDS
+from services.project_store import update_project_fields, ProjectConflict
+from services.speculative import record_project_open, record_layout_choice, preempt_speculative_jobs
+from services.profiling import profile_trigger
+from tasks import async_process_graph_file, compute_graph_analytics, extract_graph_backbone, render_project_preview, subgraph_layout
 from celery_app import celery_app
 
 
-def clean_nans(obj):
-    """Remplace les NaN et Inf par 0 pour la sérialisation JSON."""
-    if isinstance(obj, float):
-        if math.isnan(obj) or math.isinf(obj):
-            return 0.0
-        return obj
-    elif isinstance(obj, dict):
-        return {k: clean_nans(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [clean_nans(v) for v in obj]
-    return obj
-
-
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
 
@@ -51,10 +57,49 @@ class ProjectUpdate(BaseModel):
     mapping: Optional[Dict[str, str]] = None
     is_public: Optional[bool] = None # Allow visibility toggle
     is_featured: Optional[bool] = None # Allow gallery toggle
+    version: Optional[int] = None  # Version lue par le client : refus (409) si le projet a changé depuis
 
 
 class LayoutUpdate(BaseModel):
     algorithm: str
+    graph_data: bool = True  # False : variante en cache renvoyée sans graph_data (positions via GET /layouts/{algorithm})
+
+
+class SubgraphPredicate(BaseModel):
+    attribute: str
+    op: str = "eq"  # eq, ne, gt, gte, lt, lte, in, contains
+    value: Any
+
+
+class SubgraphExtract(BaseModel):
+    # Un seul sélecteur : nœuds de départ (+ sauts), prédicat d'attribut ou communauté
+    seeds: Optional[List[int]] = None
+    hops: int = 1
+    predicate: Optional[SubgraphPredicate] = None
+    community: Optional[int] = None
+    algorithm: str = "auto"
+    save: bool = False  # Enregistrer comme projet dérivé (sinon vue temporaire)
+    name: Optional[str] = None
+
+
+class AnalyticsRequest(BaseModel):
+    metrics: List[str]
+    force: bool = False
+
+
+class BackboneRequest(BaseModel):
+    method: str = "disparity"
+    budget: int = BACKBONE_EDGE_BUDGET
+
+
+def _parse_analytics(analytics: Optional[str]) -> List[str]:
+    """Liste de métriques séparées par des virgules (champ de formulaire)."""
+    if not analytics:
+        return []
+    try:
+        return validate_metrics([m.strip() for m in analytics.split(",") if m.strip()])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ===== Endpoint de polling Celery =====
@@ -75,7 +120,8 @@ async def get_task_status(job_id: str):
             response["status"] = "FAILURE"
             response["error"] = result.get("error")
         else:
-            final_result = result.get("result") if isinstance(result, dict) else result
+            # Tâches de traitement : {"status", "result"} ; autres tâches (analytique, squelette, aperçu) : le dict entier
+            final_result = result["result"] if isinstance(result, dict) and "result" in result else result
             response["result"] = clean_nans(final_result)
             
     elif task_result.status == "FAILURE":
@@ -94,12 +140,23 @@ async def create_project(
     is_featured: bool = Form(False),
     mapping: Optional[str] = Form(None),
     algorithm: str = Form("auto"),
+    analytics: Optional[str] = Form(None),
+    backbone: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user)
 ):
     """
     Crée un nouveau projet à partir d'un fichier uploadé et d'un mapping.
     Lance une tâche Celery pour traiter le graphe de façon asynchrone.
+    `analytics` (ex. "pagerank,community") ajoute le calcul de métriques par nœud,
+    `backbone` (ex. "disparity") l'extraction d'un squelette d'arêtes.
     """
+    requested_metrics = _parse_analytics(analytics)
+    if backbone:
+        try:
+            validate_method(backbone)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     # Enforce Elite Status for Private Projects
     if not is_public and not current_user.is_elite:
         is_public = True
@@ -150,17 +207,22 @@ async def create_project(
             source_file_path=str(file_path),
             is_public=is_public,
             is_featured=is_featured,
-            algorithm=algorithm # Persist initial algorithm choice
+            algorithm=algorithm, # Persist initial algorithm choice
+            expires_at=free_plan_expiry(current_user)
         )
         await project.insert()
 
         # Lancer la tâche Celery en passant l'ID du projet
+        await preempt_speculative_jobs()
         celery_task = async_process_graph_file.delay(
             str(file_path), 
             parsed_mapping, 
             algorithm, 
             str(project.id),
-            True # is_new_project
+            True, # is_new_project
+            profile=profile_trigger(current_user),
+            analytics=requested_metrics,
+            backbone=backbone or None
         )
 
         # Retourner le job_id au frontend (le front doit poller /tasks/{job_id})
@@ -188,39 +250,108 @@ async def update_project_layout(
     layout_update: LayoutUpdate,
     current_user: User = Depends(get_current_user)
 ):
-    """Recalcule le layout du graphe."""
+    """
+    Recalcule le layout du graphe. Une variante déjà calculée est activée sans
+    recalcul ; avec `graph_data: false`, la réponse ne contient alors que
+    l'algorithme, les positions étant lues sur GET /{id}/layouts/{algorithm}.
+    """
     try:
-        project = await Project.get(PydanticObjectId(project_id))
+        project = await Project.find_one(
+            Project.id == PydanticObjectId(project_id),
+            projection_model=ProjectState
+        )
     except:
         raise HTTPException(status_code=404, detail="Projet introuvable")
         
     if not project:
         raise HTTPException(status_code=404, detail="Projet introuvable")
         
-    if project.owner.ref.id != current_user.id and not current_user.is_superuser:
+    if project.owner.id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Accès non autorisé")
 
+    await record_layout_choice(layout_update.algorithm)
+
+    # Variante déjà calculée : bascule instantanée sans recalcul ni réécriture du graphe
+    if layout_update.algorithm != "auto" and project.topology_key:
+        variant = await get_variant(str(project.id), layout_update.algorithm, project.topology_key)
+        if variant:
+            await mark_variant_used(variant)
+            await update_project_fields(project.id, {
+                Project.algorithm: variant.algorithm,
+                Project.updated_at: datetime.now(timezone.utc)
+            })
+            if not project.parent_id:
+                render_project_preview.delay(str(project.id))
+            response = {
+                "status": "SUCCESS",
+                "cached": True,
+                "algorithm": variant.algorithm,
+                "node_count": variant.node_count
+            }
+            if layout_update.graph_data:
+                if project.parent_id:
+                    base_graph_data = await _derived_graph_data(await Project.get(project.id), with_positions=False)
+                else:
+                    doc = await Project.get_motor_collection().find_one({"_id": project.id}, {"graph_data": 1})
+                    base_graph_data = (doc or {}).get("graph_data") or {}
+                response["graph_data"] = apply_positions(base_graph_data, variant.positions)
+            return clean_nans(response)
+
+    # Projet dérivé (sans fichier source) : seul le sous-graphe est spatialisé,
+    # dans la requête s'il est rapide, sinon par Celery
+    if project.parent_id:
+        project = await Project.get(project.id)  # Pas de graph_data : le document d'un dérivé est léger
+        topology, nodes, node_docs = await _load_derived(project)
+        try:
+            prediction = await asyncio.to_thread(predict_subgraph_layout, topology, nodes, layout_update.algorithm)
+            if prediction["seconds"] > SUBGRAPH_INLINE_SECONDS:
+                await preempt_speculative_jobs()
+                celery_task = subgraph_layout.delay(
+                    project.parent_id, project.parent_topology_key, nodes.tolist(),
+                    layout_update.algorithm, str(project.id)
+                )
+                return {
+                    "job_id": celery_task.id,
+                    "status": "PENDING",
+                    "message": "Calcul du layout lancé. Veuillez patienter."
+                }
+            graph_data = await asyncio.to_thread(layout_subgraph, topology, nodes, node_docs, layout_update.algorithm)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        await save_variant(str(project.id), graph_data["algorithm_used"], project.topology_key, graph_data["nodes"])
+        await update_project_fields(project.id, {
+            Project.algorithm: graph_data["algorithm_used"],
+            Project.updated_at: datetime.now(timezone.utc)
+        })
+        return clean_nans({
+            "status": "SUCCESS",
+            "cached": False,
+            "algorithm": graph_data["algorithm_used"],
+            "graph_data": graph_data
+        })
+
     if not project.source_file_path:
         raise HTTPException(status_code=400, detail="Fichier source manquant")
-        
+
     file_path = Path(project.source_file_path)
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Fichier source introuvable sur le disque")
 
     # Calcul asynchrone via Celery
     try:
+        await preempt_speculative_jobs()
         celery_task = async_process_graph_file.delay(
             str(file_path),
             project.mapping or {},
             layout_update.algorithm,
             str(project.id),
-            False # is_new_project
+            False, # is_new_project
+            layout_only=True,
+            profile=profile_trigger(current_user)
         )
         
-        # update metadata or timestamp to show "processing"?
         # Le timestamp sera mis à jour par la tâche à la fin, mais on peut marquer le "début"
-        project.updated_at = datetime.now(timezone.utc)
-        await project.save()
+        await update_project_fields(project.id, {Project.updated_at: datetime.now(timezone.utc)})
         
         return {
             "job_id": celery_task.id,
@@ -239,9 +370,17 @@ async def update_project(
     project_update: ProjectUpdate,
     current_user: User = Depends(get_current_user)
 ):
-    """Met à jour un projet (nom, fichier ou mapping)."""
+    """
+    Met à jour un projet (nom, visibilité, fichier ou mapping).
+
+    Seuls les champs modifiés sont écrits, et uniquement si le projet n'a pas
+    changé depuis sa lecture (`version` du client, ou celle lue ici) : 409 sinon.
+    """
     try:
-        project = await Project.get(PydanticObjectId(project_id))
+        project = await Project.find_one(
+            Project.id == PydanticObjectId(project_id),
+            projection_model=ProjectState
+        )
     except:
         raise HTTPException(status_code=404, detail="Projet introuvable")
         
@@ -249,15 +388,18 @@ async def update_project(
         raise HTTPException(status_code=404, detail="Projet introuvable")
         
     # Strict Privacy Check for Update
-    if project.owner.ref.id != current_user.id:
+    if project.owner.id != current_user.id:
         if not project.is_public:
              raise HTTPException(status_code=403, detail="Projet privé : Modification interdite.")
         if not current_user.is_superuser:
              raise HTTPException(status_code=403, detail="Accès non autorisé")
 
+    changes = {}
+
     # Update name
     if project_update.name:
-        project.name = project_update.name
+        changes["name"] = project_update.name
+        changes["name_terms"] = search_terms(project_update.name)
 
     # Handle Visibility Update
     if project_update.is_public is not None:
@@ -265,7 +407,7 @@ async def update_project(
             # Non-elite trying to hide project -> Forbidden or Force True?
             # Let's forbid this explicit action with a clear error.
             raise HTTPException(status_code=403, detail="La confidentialité privée est réservée aux membres Élite.")
-        project.is_public = project_update.is_public
+        changes["is_public"] = project_update.is_public
 
     # Handle Gallery Toggle
     if project_update.is_featured is not None:
@@ -273,18 +415,14 @@ async def update_project(
             raise HTTPException(status_code=403, detail="La publication en galerie est réservée aux membres Élite.")
         
         # If enabling gallery, ensure it is public
-        if project_update.is_featured and not project.is_public:
+        if project_update.is_featured and not changes.get("is_public", project.is_public):
              # If strictly private, cannot be in gallery
              raise HTTPException(status_code=400, detail="Un projet doit être visible par l'administrateur pour être publié dans la galerie.")
              
-        project.is_featured = project_update.is_featured
+        changes["is_featured"] = project_update.is_featured
 
-    # Handle file/mapping update (asynchrone via Celery)
-    # ... (skipping context match, just updating security block at start of function... wait, start of function logic is earlier)
-    # Let's target the permission check block around line 236.
-
-    if project_update.name:
-        project.name = project_update.name
+    expected_version = project_update.version if project_update.version is not None else project.version
+    celery_task = None
 
     # Handle file/mapping update (asynchrone via Celery)
     if project_update.temp_file_id or project_update.mapping:
@@ -297,7 +435,7 @@ async def update_project(
             file_path = upload_dir / safe_filename
             if not file_path.exists():
                 raise HTTPException(status_code=404, detail="Nouveau fichier introuvable")
-            project.source_file_path = str(file_path)
+            changes["source_file_path"] = str(file_path)
         # Case 2: No new file, use existing
         elif project.source_file_path:
             file_path = Path(project.source_file_path)
@@ -306,35 +444,45 @@ async def update_project(
         
         # Lancer la tâche Celery si on a un fichier et un mapping
         if file_path and project_update.mapping:
-            celery_task = async_process_graph_file.delay(
-                str(file_path), 
-                project_update.mapping, 
-                "auto", 
-                str(project.id),
-                False # is_new_project
-            )
-            project.mapping = project_update.mapping
-            project.updated_at = datetime.now(timezone.utc)
-            await project.save()
-            
-            return {
-                "id": str(project.id),
-                "project_id": str(project.id),
-                "job_id": celery_task.id,
-                "status": "PENDING",
-                "message": "Traitement du graphe lancé. Veuillez patienter et poller /projects/tasks/{job_id} pour le résultat."
-            }
-
-    await project.save()
+            changes["mapping"] = project_update.mapping
+
+    if changes:
+        changes["updated_at"] = datetime.now(timezone.utc)
+        try:
+            await update_project_fields(project.id, changes, expected_version)
+        except ProjectConflict:
+            raise HTTPException(status_code=409, detail="Le projet a été modifié entre-temps, rechargez-le avant de réessayer")
+        if project.is_featured or changes.get("is_featured"):
+            await invalidate_gallery()
+
+    # La tâche n'est lancée qu'une fois le fichier et le mapping enregistrés
+    if "mapping" in changes:
+        await preempt_speculative_jobs()
+        celery_task = async_process_graph_file.delay(
+            changes.get("source_file_path", project.source_file_path),
+            project_update.mapping, 
+            "auto", 
+            str(project.id),
+            False, # is_new_project
+            profile=profile_trigger(current_user)
+        )
+        return {
+            "id": str(project.id),
+            "project_id": str(project.id),
+            "job_id": celery_task.id,
+            "status": "PENDING",
+            "message": "Traitement du graphe lancé. Veuillez patienter et poller /projects/tasks/{job_id} pour le résultat."
+        }
     
     response_data = {
         "id": str(project.id),
-        "name": project.name,
+        "name": changes.get("name", project.name),
         "created_at": project.created_at,
-        "updated_at": project.updated_at,
-        "metadata": project.metadata or {},
-        "graph_data": project.graph_data or {},
+        "updated_at": changes.get("updated_at", project.updated_at),
+        "is_public": changes.get("is_public", project.is_public),
+        "is_featured": changes.get("is_featured", project.is_featured),
         "mapping": project.mapping or {},
+        "version": expected_version + 1 if changes else project.version,
         "message": "Projet mis à jour avec succès"
     }
     return clean_nans(response_data)
@@ -344,14 +492,12 @@ async def update_project(
 @router.get("/", response_model=List[Dict[str, Any]])
 async def list_projects(current_user: User = Depends(get_current_user)):
     """Liste les projets de l'utilisateur."""
-    # Projection pour éviter de charger graph_data volumineuses
+    # Projection : graph_data et metadata ne sont pas lus
     projects = await Project.find(
         Project.owner.id == current_user.id,
-        projection_model=None  # Use raw dict projection below
+        projection_model=ProjectSummary
     ).sort(-Project.created_at).to_list()
-    
-    # Note: Beanie doesn't support field projection directly with find(),
-    # but we avoid serializing graph_data by not including it in response
+
     return [
         {
             "id": str(p.id),
@@ -360,9 +506,10 @@ async def list_projects(current_user: User = Depends(get_current_user)):
             "created_at": p.created_at,
             "is_public": p.is_public,
             "algorithm": p.algorithm or "auto",
+            "preview_key": p.preview_key,
             "stats": {
-                "nodes": (p.metadata or {}).get("node_count", 0),
-                "edges": (p.metadata or {}).get("edge_count", 0)
+                "nodes": p.node_count,
+                "edges": p.edge_count
             }
         }
         for p in projects
@@ -371,34 +518,38 @@ async def list_projects(current_user: User = Depends(get_current_user)):
 
 # ===== List Public Projects (Gallery) =====
 @router.get("/public", response_model=List[Dict[str, Any]])
-async def list_public_projects():
-    """Liste tous les projets publics pour la galerie."""
-    # Fetch featured projects (Gallery)
-    projects = await Project.find(Project.is_featured == True).sort(-Project.created_at).to_list()
-    
-    return [
-        {
-            "id": str(p.id),
-            "name": p.name,
-            "created_at": p.created_at,
-            "description": p.description,
-            "algorithm": p.algorithm or "auto",
-            "stats": {
-                "nodes": (p.metadata or {}).get("node_count", 0),
-                "edges": (p.metadata or {}).get("edge_count", 0)
-            }
-        }
-        for p in projects
-    ]
+async def list_public_projects(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(GALLERY_DEFAULT_LIMIT, ge=1, le=GALLERY_MAX_LIMIT)
+):
+    """
+    Liste une page des projets publiés dans la galerie (plus récents d'abord).
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    """
+    try:
+        items, next_cursor = await gallery_page(cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 # ===== Get Project by ID =====
 @router.get("/{project_id}", response_model=Dict[str, Any])
 async def get_project(
     project_id: str,
+    edges: str = Query("auto", pattern="^(auto|full|backbone)$"),
     current_user: User = Depends(get_current_user)
 ):
-    """Récupère un projet par son ID."""
+    """
+    Récupère un projet par son ID.
+
+    `edges` choisit le jeu d'arêtes : "auto" (squelette s'il a été extrait,
+    sinon toutes les arêtes), "full" ou "backbone".
+    """
     try:
         project = await Project.get(PydanticObjectId(project_id))
     except:
@@ -415,42 +566,400 @@ async def get_project(
         # If public, we allow access (Gallery Mode)
         # Previous restriction for non-superusers is removed to support the Gallery.
 
+    await record_project_open(str(project.id))
+
+    if project.parent_id:
+        return clean_nans({
+            "id": str(project.id),
+            "name": project.name,
+            "created_at": project.created_at,
+            "updated_at": project.updated_at,
+            "metadata": project.metadata or {},
+            "graph_data": await _derived_graph_data(project),
+            "mapping": project.mapping or {},
+            "algorithm": project.algorithm or "auto",
+            "parent_id": project.parent_id
+        })
         
     try:
+        graph_data = project.graph_data or {}
+
+        # Les positions de graph_data sont celles du dernier calcul complet :
+        # si l'algorithme actif est une autre variante, on applique ses positions.
+        if graph_data and project.topology_key and project.algorithm != graph_data.get("algorithm_used"):
+            variant = await get_variant(str(project.id), project.algorithm, project.topology_key)
+            if variant:
+                graph_data = apply_positions(graph_data, variant.positions)
+
+        graph_data = await _select_edges(project, graph_data, edges)
+
         response_data = {
             "id": str(project.id),
             "name": project.name,
             "created_at": project.created_at,
             "updated_at": project.updated_at,
             "metadata": project.metadata or {},
-            "graph_data": project.graph_data or {},
+            "graph_data": graph_data,
             "mapping": project.mapping or {},
             "algorithm": project.algorithm or "auto"
         }
         return clean_nans(response_data)
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
 
 
+async def _select_edges(project: Project, graph_data: Dict[str, Any], edges: str) -> Dict[str, Any]:
+    """Remplace les arêtes par le squelette extrait (graph_data["edge_set"] indique le jeu servi)."""
+    summary = (project.metadata or {}).get("backbone")
+    if edges == "full" or not graph_data or (edges == "auto" and not project.backbone_path):
+        return {**graph_data, "edge_set": "full"} if graph_data else graph_data
+    if not project.backbone_path or not summary:
+        raise HTTPException(status_code=404, detail="Aucun squelette d'arêtes pour ce projet (POST /projects/{id}/backbone)")
+
+    project_id = str(project.id)
+    try:
+        backbone = await backbone_cache.get(project_id, project.topology_key)
+        if not backbone.matches(summary):
+            # Squelette recalculé (autre méthode ou budget) depuis la mise en cache
+            backbone_cache.invalidate(project_id)
+            backbone = await backbone_cache.get(project_id, project.topology_key)
+    except FileNotFoundError:
+        # Fichier .backbone.npz absent (supprimé ou pas encore écrit) : toutes les arêtes
+        return {**graph_data, "edge_set": "full"}
+    return {**graph_data, "edges": backbone.select(graph_data.get("edges") or []), "edge_set": "backbone"}
+
+
+# ===== Layout Variants =====
+@router.get("/{project_id}/layouts", response_model=Dict[str, Any])
+async def list_project_layouts(
+    project_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Liste les variantes de layout déjà calculées pour la topologie courante."""
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1, "algorithm": 1})
+
+    variants = []
+    if doc.get("topology_key"):
+        variants = await list_variants(project_id, doc["topology_key"])
+
+    return {
+        "active": doc.get("algorithm") or "auto",
+        "variants": variants
+    }
+
+
+@router.get("/{project_id}/layouts/{algorithm}")
+async def get_project_layout_positions(
+    project_id: str,
+    algorithm: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Retourne le buffer de positions d'une variante (float32 little-endian, N x 3),
+    dans l'ordre des nœuds de graph_data.
+    """
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1})
+
+    variant = None
+    if doc.get("topology_key"):
+        variant = await get_variant(project_id, algorithm, doc["topology_key"])
+
+    if not variant:
+        raise HTTPException(status_code=404, detail="Variante de layout introuvable")
+
+    return Response(
+        content=variant.positions,
+        media_type="application/octet-stream",
+        headers={
+            "X-Node-Count": str(variant.node_count),
+            "X-Layout-Algorithm": variant.algorithm
+        }
+    )
+
+
+# ===== Subgraph Extraction =====
+async def _load_derived(project: Project):
+    """Adjacence du parent, indices des nœuds et attributs du parent d'un projet dérivé."""
+    # Seuls les nœuds du parent sont lus (attributs) : les arêtes viennent de la topologie en cache
+    parent = None
+    if ObjectId.is_valid(project.parent_id):
+        parent = await Project.get_motor_collection().find_one(
+            {"_id": ObjectId(project.parent_id)},
+            {"topology_key": 1, "is_public": 1, "owner": 1, "graph_data.nodes": 1}
+        )
+    node_docs = ((parent or {}).get("graph_data") or {}).get("nodes")
+    if not node_docs or parent.get("topology_key") != project.parent_topology_key:
+        raise HTTPException(status_code=409, detail="Le projet parent a été modifié ou supprimé")
+    # Les attributs servis sont ceux du parent : il doit rester lisible par le propriétaire du dérivé
+    if not parent.get("is_public", True) and parent["owner"].id != project.owner.ref.id:
+        raise HTTPException(status_code=403, detail="Le projet parent n'est plus accessible")
+
+    topology = await topology_cache.get(project.parent_id, parent["topology_key"])
+    nodes = np.asarray(project.subgraph_nodes or [], dtype=np.int64)
+    return topology, nodes, node_docs
+
+
+async def _derived_graph_data(project: Project, with_positions: bool = True) -> Dict[str, Any]:
+    """Reconstruit graph_data d'un projet dérivé à partir du parent et de sa variante active."""
+    topology, nodes, node_docs = await _load_derived(project)
+    G = await asyncio.to_thread(build_subgraph, topology, nodes, node_docs)
+    graph_data = subgraph_graph_data(G, nodes, project.algorithm)
+
+    if with_positions:
+        variant = await get_variant(str(project.id), project.algorithm, project.topology_key)
+        if variant:
+            graph_data = apply_positions(graph_data, variant.positions)
+    return graph_data
+
+
+@router.post("/{project_id}/subgraph", response_model=Dict[str, Any])
+async def extract_subgraph(
+    project_id: str,
+    request: SubgraphExtract,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Extrait un sous-graphe (nœuds de départ + sauts, prédicat d'attribut ou
+    communauté) et ne spatialise que lui. Avec `save`, le résultat devient un
+    projet dérivé qui partage les données du parent ; sinon c'est une vue temporaire.
+    """
+    # Seuls les nœuds (attributs des prédicats) sont lus : les arêtes viennent de la topologie en cache
+    project = await get_readable_project_doc(project_id, current_user, {
+        "name": 1, "parent_id": 1, "topology_key": 1, "mapping": 1, "graph_data.nodes": 1
+    })
+
+    if project.get("parent_id"):
+        raise HTTPException(status_code=400, detail="Extraction impossible depuis un projet dérivé")
+    node_docs = (project.get("graph_data") or {}).get("nodes")
+    if not node_docs or not project.get("topology_key"):
+        raise HTTPException(status_code=409, detail="Le graphe du projet n'est pas encore traité")
+    topology_key = project["topology_key"]
+
+    selectors = [request.seeds is not None, request.predicate is not None, request.community is not None]
+    if sum(selectors) != 1:
+        raise HTTPException(status_code=400, detail="Indiquer un seul sélecteur : seeds, predicate ou community")
+    if not 0 <= request.hops <= MAX_HOPS:
+        raise HTTPException(status_code=400, detail=f"hops doit être compris entre 0 et {MAX_HOPS}")
+
+    topology = await topology_cache.get(project_id, topology_key)
+
+    try:
+        if request.seeds is not None:
+            # Une limite dépassée d'un nœud suffit à signaler un sous-graphe trop grand
+            hood = await asyncio.to_thread(topology.neighborhood, request.seeds, request.hops, SUBGRAPH_MAX_NODES + 1)
+            nodes = np.asarray(hood["nodes"], dtype=np.int64)
+        elif request.predicate is not None:
+            p = request.predicate
+            nodes = await asyncio.to_thread(match_predicate, node_docs, p.attribute, p.op, p.value)
+        else:
+            column = await get_column(project_id, "community", topology_key)
+            if not column:
+                raise HTTPException(status_code=409, detail="Communautés non calculées (POST /projects/{id}/analytics)")
+            nodes = np.flatnonzero(unpack_values(column) == request.community)
+
+        nodes = np.unique(nodes)
+        prediction = await asyncio.to_thread(predict_subgraph_layout, topology, nodes, request.algorithm)
+        inline = prediction["seconds"] <= SUBGRAPH_INLINE_SECONDS
+        graph_data = await asyncio.to_thread(layout_subgraph, topology, nodes, node_docs, request.algorithm) if inline else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not request.save:
+        if not inline:
+            await preempt_speculative_jobs()
+            celery_task = subgraph_layout.delay(project_id, topology_key, nodes.tolist(), request.algorithm)
+            return {"job_id": celery_task.id, "status": "PENDING", "saved": False}
+        return clean_nans({"status": "SUCCESS", "saved": False, "graph_data": graph_data})
+
+    # Le dérivé sert les attributs du parent : il en hérite la visibilité
+    is_public = project.get("is_public", True)
+    if not is_public and not current_user.is_elite:
+        raise HTTPException(status_code=403, detail="La confidentialité privée est réservée aux membres Élite.")
+
+    metadata = graph_data["metadata"] if graph_data else {"node_count": len(nodes), "edge_count": prediction["edge_count"]}
+    derived = Project(
+        name=(request.name or f"{project['name']} (extrait)")[:100],
+        description=f"Sous-graphe de « {project['name']} »",
+        owner=current_user,
+        is_public=is_public,
+        metadata={**metadata, "parent_id": project_id},
+        node_count=metadata.get("node_count", 0),
+        edge_count=metadata.get("edge_count", 0),
+        mapping=project.get("mapping"),
+        algorithm=graph_data["algorithm_used"] if graph_data else request.algorithm,
+        topology_key=derive_topology_key(topology_key, nodes),
+        parent_id=project_id,
+        parent_topology_key=topology_key,
+        subgraph_nodes=nodes.tolist(),
+        expires_at=free_plan_expiry(current_user)
+    )
+    await derived.insert()
+
+    if not inline:
+        # Le layout est enregistré par la tâche comme variante active du dérivé
+        await preempt_speculative_jobs()
+        celery_task = subgraph_layout.delay(
+            project_id, topology_key, nodes.tolist(), request.algorithm, str(derived.id)
+        )
+        return {
+            "job_id": celery_task.id,
+            "status": "PENDING",
+            "saved": True,
+            "id": str(derived.id),
+            "project_id": str(derived.id)
+        }
+
+    await save_variant(str(derived.id), derived.algorithm, derived.topology_key, graph_data["nodes"])
+
+    return clean_nans({
+        "status": "SUCCESS",
+        "saved": True,
+        "id": str(derived.id),
+        "project_id": str(derived.id),
+        "graph_data": graph_data
+    })
+
+
+# ===== Edge Backbone =====
+@router.post("/{project_id}/backbone", response_model=Dict[str, Any])
+async def compute_project_backbone(
+    project_id: str,
+    request: BackboneRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Lance l'extraction d'un squelette d'arêtes (remplace le précédent)."""
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1, "parent_id": 1})
+
+    if doc["owner"].id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Accès non autorisé")
+
+    try:
+        validate_method(request.method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if request.budget < 1:
+        raise HTTPException(status_code=400, detail="Le budget doit être d'au moins une arête")
+
+    if doc.get("parent_id"):
+        raise HTTPException(status_code=400, detail="Squelette indisponible sur un projet dérivé")
+
+    if not doc.get("topology_key"):
+        raise HTTPException(status_code=409, detail="Le graphe du projet n'est pas encore traité")
+
+    await preempt_speculative_jobs()
+    celery_task = extract_graph_backbone.delay(project_id, request.method, request.budget)
+    return {
+        "job_id": celery_task.id,
+        "status": "PENDING",
+        "methods": list(BACKBONE_METHODS),
+        "message": "Extraction du squelette lancée. Veuillez patienter."
+    }
+
+
+# ===== Node Analytics =====
+@router.get("/{project_id}/analytics", response_model=Dict[str, Any])
+async def list_project_analytics(
+    project_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Liste les colonnes analytiques déjà calculées pour la topologie courante."""
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1})
+
+    columns = []
+    if doc.get("topology_key"):
+        columns = await list_columns(project_id, doc["topology_key"])
+
+    return clean_nans({
+        "available": ANALYTICS_METRICS,
+        "columns": columns
+    })
+
+
+@router.post("/{project_id}/analytics", response_model=Dict[str, Any])
+async def compute_project_analytics(
+    project_id: str,
+    request: AnalyticsRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Lance le calcul des métriques demandées (les colonnes déjà calculées sont réutilisées)."""
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1})
+
+    if doc["owner"].id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Accès non autorisé")
+
+    try:
+        metrics = validate_metrics(request.metrics)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not metrics:
+        raise HTTPException(status_code=400, detail="Aucune métrique demandée")
+
+    if not doc.get("topology_key"):
+        raise HTTPException(status_code=409, detail="Le graphe du projet n'est pas encore traité")
+
+    await preempt_speculative_jobs()
+    celery_task = compute_graph_analytics.delay(project_id, metrics, request.force)
+    return {
+        "job_id": celery_task.id,
+        "status": "PENDING",
+        "message": "Calcul des métriques lancé. Veuillez patienter."
+    }
+
+
+@router.get("/{project_id}/analytics/{metric}")
+async def get_project_analytics_column(
+    project_id: str,
+    metric: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Retourne les valeurs d'une métrique (buffer little-endian, type dans
+    X-Column-Dtype), dans l'ordre des nœuds de graph_data.
+    """
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1})
+
+    column = None
+    if doc.get("topology_key"):
+        column = await get_column(project_id, metric, doc["topology_key"])
+
+    if not column:
+        raise HTTPException(status_code=404, detail="Métrique non calculée")
+
+    return Response(
+        content=column.values,
+        media_type="application/octet-stream",
+        headers={
+            "X-Node-Count": str(column.node_count),
+            "X-Column-Dtype": column.dtype,
+            "X-Column-Params": column.params_key
+        }
+    )
+
+
 # ===== Delete Project =====
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(
     project_id: str,
     current_user: User = Depends(get_current_user)
 ):
-    """Supprime un projet."""
-    try:
-        project = await Project.get(PydanticObjectId(project_id))
-    except:
+    """Supprime un projet (projets dérivés, fichiers et données associées compris)."""
+    if not ObjectId.is_valid(project_id):
         raise HTTPException(status_code=404, detail="Projet introuvable")
-        
-    if not project:
+
+    doc = await Project.get_motor_collection().find_one(
+        {"_id": ObjectId(project_id)}, {"owner": 1, **DELETION_FIELDS}
+    )
+    if not doc:
         raise HTTPException(status_code=404, detail="Projet introuvable")
         
-    if project.owner.ref.id != current_user.id and not current_user.is_superuser:
+    if doc["owner"].id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Accès non autorisé")
         
-    await project.delete()
+    await delete_projects([doc])
     return None
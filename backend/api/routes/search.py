@@ -0,0 +1,37 @@
+"""
+Route API de recherche de nœuds (identifiants, libellés, attributs textuels).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Dict, Any
+
+from models.user import User
+from api.dependencies import get_current_user, get_readable_project_doc
+from services.search_index import search_cache
+
+
+router = APIRouter(prefix="/projects/{project_id}", tags=["Search"])
+
+
+@router.get("/search", response_model=Dict[str, Any])
+async def search_nodes(
+    project_id: str,
+    q: str = Query(..., min_length=1, max_length=200),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Recherche des nœuds : identifiant exact, libellé exact, préfixes, puis
+    sous-chaîne (libellé et attributs textuels). Retourne des indices dans
+    graph_data["nodes"], classés par pertinence et paginés.
+    """
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1, "parent_id": 1})
+
+    if doc.get("parent_id"):
+        raise HTTPException(status_code=400, detail="Recherche indisponible sur un projet dérivé (interroger le parent)")
+    if not doc.get("topology_key"):
+        raise HTTPException(status_code=409, detail="Le graphe du projet n'est pas encore traité")
+
+    index = await search_cache.get(project_id, doc["topology_key"])
+    return {"query": q, "offset": offset, "limit": limit, **index.search(q, offset, limit)}
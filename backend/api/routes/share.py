@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta, timezone
@@ -6,13 +7,18 @@ import uuid
 from beanie import PydanticObjectId
 
 from models.user import User
-from models.project import Project
+from models.project import Project, ProjectState
 from models.share_link import ShareLink
 from api.dependencies import get_current_user
 from services.graph_service import process_graph_file
-from tasks import async_process_graph_file
+from services.share_cache import resolve_token, shared_payload_path, MISSING, EXPIRED
+from services.share_layout import inflight_key, inflight_job, claim_job, release_job, charge_budget
+from services.speculative import preempt_speculative_jobs
+from services.layout_variants import get_variant
+from services.layout_selection import ALGORITHM_QUALITY, FEATURE_KEYS, resolve_auto_algorithm
+from tasks import shared_layout_preview
 from pathlib import Path
-import math
+import orjson
 
 router = APIRouter(prefix="/share", tags=["Share"])
 
@@ -23,18 +29,6 @@ class ShareLinkCreate(BaseModel):
 class LayoutUpdate(BaseModel):
     algorithm: str
 
-def clean_nans(obj):
-    """Remplace les NaN et Inf par 0 pour la sérialisation JSON."""
-    if isinstance(obj, float):
-        if math.isnan(obj) or math.isinf(obj):
-            return 0.0
-        return obj
-    elif isinstance(obj, dict):
-        return {k: clean_nans(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [clean_nans(v) for v in obj]
-    return obj
-
 @router.post("/generate", response_model=Dict[str, Any])
 async def generate_share_link(
     share_data: ShareLinkCreate,
@@ -42,14 +36,17 @@ async def generate_share_link(
 ):
     """Génère un lien de partage public pour un projet."""
     try:
-        project = await Project.get(PydanticObjectId(share_data.project_id))
+        project = await Project.find_one(
+            Project.id == PydanticObjectId(share_data.project_id),
+            projection_model=ProjectState
+        )
     except:
         raise HTTPException(status_code=404, detail="Projet introuvable")
         
     if not project:
         raise HTTPException(status_code=404, detail="Projet introuvable")
         
-    if project.owner.ref.id != current_user.id:
+    if project.owner.id != current_user.id:
         raise HTTPException(status_code=403, detail="Accès non autorisé")
         
     # Créer le token
@@ -71,84 +68,155 @@ async def generate_share_link(
         "url": f"/share/{token}" # Frontend URL path
     }
 
+async def _resolve(token: str) -> Dict[str, Any]:
+    """Lien de partage valide d'un token (résolution en cache)."""
+    link = await resolve_token(token)
+    if link.get("status") == EXPIRED:
+        raise HTTPException(status_code=410, detail="Lien de partage expiré")
+    if link.get("status") == MISSING:
+        raise HTTPException(status_code=404, detail="Lien de partage invalide")
+    return link
+
+
+def _stream_payload(f, shared_by: Optional[str]):
+    """Réponse partagée : la charge utile du projet, précédée du champ propre au lien."""
+    yield b'{"shared_by":' + orjson.dumps(str(shared_by)) + b","
+    with f:
+        f.seek(1)  # Accolade ouvrante déjà émise
+        while chunk := f.read(1024 * 1024):
+            yield chunk
+
+
 @router.get("/{token}", response_model=Dict[str, Any])
 async def get_shared_project(token: str):
-    """Récupère un projet via son token de partage."""
-    share_link = await ShareLink.find_one(ShareLink.token == token)
-    
-    if not share_link:
-        raise HTTPException(status_code=404, detail="Lien de partage invalide")
-    
-    # Gérer la comparaison de dates (naive vs aware)
-    expires_at = share_link.expires_at
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
-        
-    if expires_at < datetime.now(timezone.utc):
-        raise HTTPException(status_code=410, detail="Lien de partage expiré")
-        
-    project = await Project.get(PydanticObjectId(share_link.project_id))
-    
-    if not project:
-        raise HTTPException(status_code=404, detail="Projet introuvable")
-        
-    # Structure de réponse identique à get_project
-    response_data = {
-        "id": str(project.id),
-        "name": project.name,
-        "created_at": project.created_at,
-        "updated_at": project.updated_at,
-        "metadata": project.metadata or {},
-        "graph_data": project.graph_data or {},
-        "mapping": project.mapping or {},
-        "is_shared": True,
-        "shared_by": str(share_link.created_by)
-    }
-    
-    return clean_nans(response_data)
+    """
+    Récupère un projet via son token de partage. La réponse est servie depuis
+    la charge utile sérialisée de la version courante du projet.
+    """
+    link = await _resolve(token)
+    # Ouvert avant de répondre : le fichier reste lisible même s'il est remplacé pendant l'envoi.
+    # Une nouvelle version peut le supprimer entre sa construction et son ouverture : il est alors reconstruit.
+    for _ in range(2):
+        path = await shared_payload_path(link["project_id"])
+        if not path:
+            raise HTTPException(status_code=404, detail="Projet introuvable")
+        try:
+            f = open(path, "rb")
+            break
+        except FileNotFoundError:
+            continue
+    else:
+        raise HTTPException(status_code=503, detail="Projet en cours de mise à jour, réessayez", headers={"Retry-After": "1"})
+    return StreamingResponse(_stream_payload(f, link.get("created_by")), media_type="application/json")
 
 @router.post("/{token}/layout", response_model=Dict[str, Any])
-async def preview_shared_project_layout(token: str, layout_update: LayoutUpdate):
-    """Calcule un layout temporaire pour un projet partagé (sans sauvegarde)."""
-    share_link = await ShareLink.find_one(ShareLink.token == token)
-    
-    if not share_link:
-        raise HTTPException(status_code=404, detail="Lien de partage invalide")
-    
-    # Gérer la comparaison de dates (naive vs aware)
-    expires_at = share_link.expires_at
-    if expires_at.tzinfo is None:
-        expires_at = expires_at.replace(tzinfo=timezone.utc)
-        
-    if expires_at < datetime.now(timezone.utc):
-        raise HTTPException(status_code=410, detail="Lien de partage expiré")
-        
-    project = await Project.get(PydanticObjectId(share_link.project_id))
+async def preview_shared_project_layout(token: str, layout_update: LayoutUpdate, request: Request):
+    """
+    Layout temporaire d'un projet partagé (le projet n'est pas modifié).
+
+    Une variante déjà calculée pour la topologie courante est signalée
+    immédiatement (`positions_url` : buffer de positions à appliquer au graphe
+    partagé, sans renvoyer graph_data) ; sinon un job est lancé, partagé par
+    les demandes identiques concurrentes et décompté du budget du token et de
+    l'adresse IP.
+    "auto" est résolu par le modèle de coût avant la recherche en cache :
+    la variante déjà calculée de l'algorithme retenu est réutilisée.
+    """
+    if layout_update.algorithm != "auto" and layout_update.algorithm not in ALGORITHM_QUALITY:
+        raise HTTPException(status_code=400, detail=f"Algorithme inconnu: {layout_update.algorithm}")
+
+    link = await _resolve(token)
+    project = await Project.find_one(
+        Project.id == PydanticObjectId(link["project_id"]),
+        projection_model=ProjectState
+    )
     
     if not project:
         raise HTTPException(status_code=404, detail="Projet introuvable")
 
-    if not project.source_file_path:
+    if not project.source_file_path or not project.topology_key:
         raise HTTPException(status_code=400, detail="Fichier source manquant")
-        
+
+    project_id = str(project.id)
+    algorithm = layout_update.algorithm
+    if algorithm == "auto":
+        doc = await Project.get_motor_collection().find_one(
+            {"_id": project.id}, {f"metadata.{key}": 1 for key in FEATURE_KEYS}
+        )
+        algorithm = resolve_auto_algorithm((doc or {}).get("metadata"), project.node_count, project.edge_count)
+
+    # Variante déjà calculée (par le propriétaire, en spéculatif ou pour un autre lecteur)
+    variant = await get_variant(project_id, algorithm, project.topology_key)
+    if variant:
+        return {
+            "status": "SUCCESS",
+            "cached": True,
+            "algorithm": variant.algorithm,
+            "node_count": variant.node_count,
+            "positions_url": f"/share/{token}/layouts/{variant.algorithm}"
+        }
+
+    # Même demande déjà en cours : on rejoint son job, sans coût
+    key = inflight_key(project_id, project.topology_key, algorithm)
+    job_id = await inflight_job(key)
+    if job_id:
+        return {"job_id": job_id, "status": "PENDING", "message": "Calcul du layout déjà en cours."}
+
     file_path = Path(project.source_file_path)
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Fichier source introuvable sur le disque")
 
-    # Calcul asynchrone via Celery (SANS SAUVEGARDE car project_id=None)
-    try:
-        celery_task = async_process_graph_file.delay(
-            str(file_path),
-            project.mapping or {},
-            layout_update.algorithm,
-            None  # Important: None pour ne pas sauvegarder en BDD
+    # Réservation avant le décompte : une demande qui rejoint un job concurrent ne coûte rien
+    job_id = str(uuid.uuid4())
+    concurrent_job = await claim_job(key, job_id)
+    if concurrent_job:
+        return {"job_id": concurrent_job, "status": "PENDING", "message": "Calcul du layout déjà en cours."}
+
+    allowed, retry_after = await charge_budget(token, request.client.host if request.client else None)
+    if not allowed:
+        await release_job(key)
+        raise HTTPException(
+            status_code=429,
+            detail="Trop de calculs de layout demandés pour ce lien, réessayez plus tard",
+            headers={"Retry-After": str(retry_after)}
         )
-        
-        return {
-            "job_id": celery_task.id,
-            "status": "PENDING",
-            "message": "Calcul du layout lancé."
-        }
-        
+
+    try:
+        await preempt_speculative_jobs()
+        shared_layout_preview.apply_async((project_id, algorithm, project.topology_key), task_id=job_id)
     except Exception as e:
+        await release_job(key)
         raise HTTPException(status_code=500, detail=f"Erreur lors du lancement du calcul: {str(e)}")
+
+    return {
+        "job_id": job_id,
+        "status": "PENDING",
+        "message": "Calcul du layout lancé."
+    }
+
+
+@router.get("/{token}/layouts/{algorithm}")
+async def get_shared_layout_positions(token: str, algorithm: str):
+    """
+    Buffer de positions (float32 little-endian, N x 3) d'une variante déjà
+    calculée du projet partagé, dans l'ordre des nœuds de la réponse partagée.
+    """
+    link = await _resolve(token)
+    project = await Project.find_one(
+        Project.id == PydanticObjectId(link["project_id"]),
+        projection_model=ProjectState
+    )
+    variant = None
+    if project and project.topology_key:
+        variant = await get_variant(str(project.id), algorithm, project.topology_key)
+    if not variant:
+        raise HTTPException(status_code=404, detail="Variante de layout introuvable")
+
+    return Response(
+        content=variant.positions,
+        media_type="application/octet-stream",
+        headers={
+            "X-Node-Count": str(variant.node_count),
+            "X-Layout-Algorithm": variant.algorithm
+        }
+    )
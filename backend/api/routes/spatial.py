@@ -0,0 +1,116 @@
+"""
+Routes API des requêtes spatiales (nœuds d'une région de la scène 3D).
+Les nœuds sont désignés et retournés par leur indice dans graph_data["nodes"].
+"""
+
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Dict, Any, Optional, Tuple
+from pydantic import BaseModel
+
+import numpy as np
+
+from models.user import User
+from api.dependencies import get_current_user, get_readable_project_doc
+from services.graph_analytics import METRIC_DTYPES
+from services.layout_variants import get_variant, unpack_positions
+from services.node_columns import get_column, unpack_values
+from services.spatial_index import spatial_cache, SpatialGrid, chunk_payload, CHUNK_MAX_NODES
+from services.topology import topology_cache
+
+
+router = APIRouter(prefix="/projects/{project_id}/spatial", tags=["Spatial"])
+
+
+class ChunkRequest(BaseModel):
+    box: Optional[List[List[float]]] = None  # [[min_x, min_y, min_z], [max_x, max_y, max_z]]
+    frustum: Optional[List[List[float]]] = None  # Plans [a, b, c, d], intérieur : a·x + b·y + c·z + d >= 0
+    algorithm: Optional[str] = None  # Variante de layout (algorithme courant du projet par défaut)
+    importance: str = "degree"  # "degree" ou une métrique analytique déjà calculée
+    limit: int = 10_000
+    edges: bool = True
+    incident: bool = False  # Inclure les arêtes vers des nœuds hors de la région
+
+
+async def _get_grid(project_id: str, current_user: User, algorithm: Optional[str]) -> Tuple[SpatialGrid, Dict[str, Any]]:
+    """Vérifie l'accès au projet et retourne la grille (en cache) de la variante demandée."""
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1, "parent_id": 1, "algorithm": 1})
+
+    if doc.get("parent_id"):
+        raise HTTPException(status_code=400, detail="Requêtes spatiales indisponibles sur un projet dérivé")
+    if not doc.get("topology_key"):
+        raise HTTPException(status_code=409, detail="Le graphe du projet n'est pas encore traité")
+
+    algorithm = algorithm or doc.get("algorithm")
+    variant = await get_variant(project_id, algorithm, doc["topology_key"])
+    if not variant:
+        raise HTTPException(status_code=404, detail=f"Aucune variante de layout '{algorithm}' pour ce projet")
+
+    grids = await spatial_cache.get(project_id, doc["topology_key"])
+    key = (variant.algorithm, variant.params_key)
+    grid = grids.get(key, variant.created_at)
+    if grid is None:
+        positions = unpack_positions(variant.positions)
+        grid = await asyncio.to_thread(SpatialGrid.from_variant, positions, variant.grid_bounds, variant.grid_cells)
+        grids.put(key, variant.created_at, grid)
+        spatial_cache.touch(project_id, doc["topology_key"])
+    return grid, doc
+
+
+@router.get("", response_model=Dict[str, Any])
+async def get_spatial_summary(
+    project_id: str,
+    algorithm: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Boîte englobante et occupation de la grille (pour découper la scène côté client)."""
+    grid, _ = await _get_grid(project_id, current_user, algorithm)
+    return grid.summary()
+
+
+@router.post("/chunk", response_model=Dict[str, Any])
+async def get_spatial_chunk(
+    project_id: str,
+    request: ChunkRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Nœuds d'une boîte ou d'un frustum, classés par importance décroissante
+    et bornés à `limit`, avec les arêtes entre eux (et, avec `incident`,
+    celles qui sortent de la région).
+    """
+    if (request.box is None) == (request.frustum is None):
+        raise HTTPException(status_code=400, detail="Préciser soit 'box', soit 'frustum'")
+    if not 1 <= request.limit <= CHUNK_MAX_NODES:
+        raise HTTPException(status_code=400, detail=f"limit doit être compris entre 1 et {CHUNK_MAX_NODES}")
+    if request.importance != "degree" and request.importance not in METRIC_DTYPES:
+        raise HTTPException(status_code=400, detail=f"Importance inconnue: {request.importance}")
+
+    grid, doc = await _get_grid(project_id, current_user, request.algorithm)
+    topology_key = doc["topology_key"]
+    topology = await topology_cache.get(project_id, topology_key) if request.edges or request.importance == "degree" else None
+
+    if request.importance == "degree":
+        importance = np.diff(topology.adjacency.indptr).astype(np.float64)
+    else:
+        column = await get_column(project_id, request.importance, topology_key)
+        if not column:
+            raise HTTPException(status_code=404, detail=f"Métrique '{request.importance}' non calculée pour ce projet")
+        importance = unpack_values(column).astype(np.float64)
+
+    def run():
+        if request.box is not None:
+            if len(request.box) != 2:
+                raise ValueError("La boîte attend [[min_x, min_y, min_z], [max_x, max_y, max_z]]")
+            nodes = grid.query_box(request.box[0], request.box[1])
+        else:
+            nodes = grid.query_frustum(request.frustum)
+        return chunk_payload(
+            grid, nodes, importance, request.limit,
+            topology if request.edges else None, request.incident
+        )
+
+    try:
+        return await asyncio.to_thread(run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,92 @@
+"""
+Routes API des requêtes topologiques (voisinage, chemin, composante, sous-graphe).
+Les nœuds sont désignés et retournés par leur indice dans graph_data["nodes"].
+"""
+
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Dict, Any
+from pydantic import BaseModel
+
+from models.user import User
+from api.dependencies import get_current_user, get_readable_project_doc
+from services.topology import topology_cache, ProjectTopology, MAX_HOPS, DEFAULT_MAX_NODES
+
+
+router = APIRouter(prefix="/projects/{project_id}/topology", tags=["Topology"])
+
+
+class SubgraphRequest(BaseModel):
+    nodes: List[int]
+
+
+async def _get_topology(project_id: str, current_user: User) -> ProjectTopology:
+    """Vérifie l'accès au projet (sans charger graph_data) et retourne son adjacence en cache."""
+    doc = await get_readable_project_doc(project_id, current_user, {"topology_key": 1, "parent_id": 1})
+
+    if doc.get("parent_id"):
+        raise HTTPException(status_code=400, detail="Requêtes topologiques indisponibles sur un projet dérivé (interroger le parent)")
+
+    if not doc.get("topology_key"):
+        raise HTTPException(status_code=409, detail="Le graphe du projet n'est pas encore traité")
+
+    return await topology_cache.get(project_id, doc["topology_key"])
+
+
+async def _run(fn, *args, **kwargs) -> Dict[str, Any]:
+    """Exécute une requête hors de la boucle ; un indice invalide donne une erreur 400."""
+    try:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/neighborhood", response_model=Dict[str, Any])
+async def get_neighborhood(
+    project_id: str,
+    nodes: List[int] = Query(..., description="Indices des nœuds de départ"),
+    hops: int = Query(1, ge=1, le=MAX_HOPS),
+    max_nodes: int = Query(DEFAULT_MAX_NODES, ge=1, le=DEFAULT_MAX_NODES),
+    current_user: User = Depends(get_current_user)
+):
+    """Voisinage à k sauts : indices des nœuds et distance (en sauts) de chacun."""
+    topology = await _get_topology(project_id, current_user)
+    return await _run(topology.neighborhood, nodes, hops, max_nodes)
+
+
+@router.get("/path", response_model=Dict[str, Any])
+async def get_shortest_path(
+    project_id: str,
+    source: int,
+    target: int,
+    weighted: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Plus court chemin entre deux nœuds (pondéré : le poids des arêtes sert de longueur)."""
+    topology = await _get_topology(project_id, current_user)
+    return await _run(topology.path, source, target, weighted)
+
+
+@router.get("/component/{node}", response_model=Dict[str, Any])
+async def get_component(
+    project_id: str,
+    node: int,
+    max_nodes: int = Query(DEFAULT_MAX_NODES, ge=1, le=DEFAULT_MAX_NODES),
+    current_user: User = Depends(get_current_user)
+):
+    """Composante connexe d'un nœud."""
+    topology = await _get_topology(project_id, current_user)
+    return await _run(topology.component, node, max_nodes)
+
+
+@router.post("/subgraph", response_model=Dict[str, Any])
+async def get_induced_subgraph(
+    project_id: str,
+    request: SubgraphRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Sous-graphe induit : arêtes entre les nœuds demandés, en paires d'indices."""
+    if len(request.nodes) > DEFAULT_MAX_NODES:
+        raise HTTPException(status_code=400, detail=f"Au plus {DEFAULT_MAX_NODES} nœuds par requête")
+    topology = await _get_topology(project_id, current_user)
+    return await _run(topology.subgraph, request.nodes)
@@ -0,0 +1,343 @@
+"""
+Banc de mesure du pipeline de traitement des graphes.
+
+Exécutable en local, sans MongoDB ni Redis :
+
+    python -m benchmarks.run --sizes 1000,10000 --output bench.json
+    python -m benchmarks.run --baseline bench_main.json --fail-on-regression
+    python -m benchmarks.run --stages layout --calibrate
+
+Chaque mesure tourne dans un processus dédié (pic RSS isolé, timeout).
+Le rapport JSON liste, par famille / taille / format / étape / algorithme,
+le temps mural, le pic RSS et le débit en arêtes par seconde.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import orjson
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.generators import FAMILIES, FORMATS, generate_edges, write_graph  # noqa: E402
+
+
+ALGORITHMS = ["random", "sphere", "grid", "drl", "fruchterman_reingold", "kamada_kawai", "force_atlas"]
+FILE_STAGES = ["parse", "pipeline"]  # Dépendent du format d'entrée
+GRAPH_STAGES = ["build", "metrics", "layout", "serialize"]  # Dépendent seulement du graphe
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+MIN_CALIBRATION_SAMPLES = 3  # Points minimum pour ajuster les 3 coefficients de temps
+MIN_CALIBRATION_NODES = 5_000  # Taille minimale du plus grand graphe mesuré (pas d'extrapolation depuis de petits graphes)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _build_graph(edges: np.ndarray, weights: np.ndarray):
+    import networkx as nx
+    G = nx.Graph()
+    G.add_weighted_edges_from(
+        zip(("n" + str(u) for u in edges[:, 0].tolist()),
+            ("n" + str(v) for v in edges[:, 1].tolist()),
+            weights.tolist())
+    )
+    return G
+
+
+def _run_stage(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Exécute une étape dans le processus courant et retourne temps + mémoire."""
+    import networkx as nx
+    from tasks import process_graph_file_sync, _read_csv_safe
+    from services.graph_service import apply_layout
+    from services.graph_metrics import compute_nx_metrics
+
+    stage = spec["stage"]
+    path = Path(spec["path"]) if spec.get("path") else None
+    graph = None
+
+    # Préparation (hors chronométrage)
+    if stage in GRAPH_STAGES:
+        arrays = np.load(spec["arrays"])
+        edges, weights = arrays["edges"], arrays["weights"]
+        if stage != "build":
+            graph = _build_graph(edges, weights)
+        if stage == "serialize":
+            apply_layout(graph, algorithm="random")
+
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+
+    extra = {}
+    if stage == "parse":
+        if spec["format"] == "csv":
+            _read_csv_safe(path)
+        elif spec["format"] == "json":
+            orjson.loads(path.read_bytes())
+        else:
+            nx.read_gexf(path)
+    elif stage == "pipeline":
+        result = process_graph_file_sync(path, spec["mapping"], "auto")
+        extra["algorithm_used"] = result.get("algorithm_used")
+        extra["stages"] = (result.get("metadata") or {}).get("stages")
+    elif stage == "build":
+        _build_graph(edges, weights)
+    elif stage == "metrics":
+        compute_nx_metrics(graph)
+    elif stage == "layout":
+        extra["algorithm_used"] = apply_layout(graph, algorithm=spec["algorithm"])
+    elif stage == "serialize":
+        orjson.dumps(nx.node_link_data(graph, edges="links"))
+    else:
+        raise ValueError(f"Étape inconnue: {stage}")
+
+    seconds = time.perf_counter() - start
+    peak = _peak_rss_mb()
+    return {
+        "seconds": seconds,
+        "peak_rss_mb": round(peak, 2),
+        "rss_delta_mb": round(max(peak - rss_before, 0.0), 2),
+        **{k: v for k, v in extra.items() if v is not None},
+    }
+
+
+def _child(spec: Dict[str, Any], queue) -> None:
+    os.chdir(BACKEND_DIR)
+    try:
+        queue.put({"ok": True, **_run_stage(spec)})
+    except Exception as e:
+        queue.put({"ok": False, "error": f"{type(e).__name__}: {e}"})
+
+
+def measure(spec: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """Lance une mesure dans un processus isolé (spawn) avec un timeout."""
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_child, args=(spec, queue))
+    process.start()
+    process.join(timeout)
+
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return {"ok": False, "error": f"timeout ({timeout:.0f}s)"}
+
+    if queue.empty():
+        return {"ok": False, "error": f"processus terminé (code {process.exitcode})"}
+    return queue.get()
+
+
+def _should_skip_layout(algorithm: str, nodes: int, edges: int, max_seconds: float) -> bool:
+    """Écarte les layouts dont le coût prédit dépasse largement le budget du banc."""
+    try:
+        from services.layout_selection import load_calibration, predict_cost
+        calibration = load_calibration()
+        if algorithm not in calibration["algorithms"]:
+            return False
+        features = {"node_count": nodes, "edge_count": edges}
+        return predict_cost(algorithm, features, calibration)["seconds"] > max_seconds
+    except Exception:
+        return False
+
+
+def _environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+    }
+
+
+def run_suite(args) -> Dict[str, Any]:
+    records: List[Dict[str, Any]] = []
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="graph_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    for family in args.families:
+        for size in args.sizes:
+            n, edges, weights = generate_edges(family, size, seed=args.seed)
+            arrays_path = workdir / f"{family}_{size}.npz"
+            np.savez(arrays_path, edges=edges, weights=weights)
+            base = {"family": family, "size": size, "nodes": n, "edges": int(len(edges))}
+
+            specs = []
+            for fmt in args.formats:
+                if not set(FILE_STAGES) & set(args.stages):
+                    break
+                path = workdir / f"{family}_{size}.{fmt}"
+                mapping = write_graph(fmt, path, n, edges, weights)
+                for stage in FILE_STAGES:
+                    if stage in args.stages:
+                        specs.append({**base, "stage": stage, "format": fmt, "path": str(path), "mapping": mapping})
+
+            for stage in GRAPH_STAGES:
+                if stage not in args.stages:
+                    continue
+                if stage == "layout":
+                    for algorithm in args.algorithms:
+                        # En calibration, tout est mesuré (borné par --timeout) : sinon un coût
+                        # surestimé ne serait jamais corrigé
+                        if not args.calibrate and _should_skip_layout(algorithm, n, len(edges), args.max_layout_seconds):
+                            records.append({**base, "stage": stage, "format": None, "algorithm": algorithm,
+                                            "status": "skipped", "error": "coût prédit hors budget"})
+                            continue
+                        specs.append({**base, "stage": stage, "format": None, "algorithm": algorithm,
+                                      "arrays": str(arrays_path)})
+                else:
+                    specs.append({**base, "stage": stage, "format": None, "arrays": str(arrays_path)})
+
+            for spec in specs:
+                outcome = measure(spec, args.timeout)
+                record = {k: v for k, v in spec.items() if k not in ("path", "arrays", "mapping")}
+                record.setdefault("algorithm", None)
+                if outcome.pop("ok"):
+                    record["status"] = "ok"
+                    record.update(outcome)
+                    record["throughput_edges_per_s"] = round(record["edges"] / record["seconds"], 1) if record["seconds"] > 0 else None
+                    record["seconds"] = round(record["seconds"], 4)
+                else:
+                    record["status"] = "error"
+                    record["error"] = outcome.get("error")
+                records.append(record)
+                _print_record(record)
+
+    return {
+        "schema_version": 1,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment(),
+        "records": records,
+    }
+
+
+def _record_key(record: Dict[str, Any]) -> tuple:
+    return (record["family"], record["size"], record.get("format"), record["stage"], record.get("algorithm"))
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float, noise_floor: float) -> List[Dict[str, Any]]:
+    """
+    Compare les mesures au rapport de référence.
+    Une régression = temps > référence x (1 + threshold) et écart > noise_floor secondes.
+    """
+    reference = {_record_key(r): r for r in baseline.get("records", []) if r.get("status") == "ok"}
+    comparisons = []
+    for record in report["records"]:
+        if record.get("status") != "ok":
+            continue
+        ref = reference.get(_record_key(record))
+        if not ref:
+            continue
+        ratio = record["seconds"] / ref["seconds"] if ref["seconds"] > 0 else float("inf")
+        regression = ratio > 1 + threshold and record["seconds"] - ref["seconds"] > noise_floor
+        comparison = {
+            "key": list(_record_key(record)),
+            "baseline_seconds": ref["seconds"],
+            "seconds": record["seconds"],
+            "ratio": round(ratio, 3),
+            "baseline_peak_rss_mb": ref.get("peak_rss_mb"),
+            "peak_rss_mb": record.get("peak_rss_mb"),
+            "regression": regression,
+        }
+        record["baseline"] = {"seconds": ref["seconds"], "ratio": comparison["ratio"], "regression": regression}
+        comparisons.append(comparison)
+    return comparisons
+
+
+def _print_record(record: Dict[str, Any]) -> None:
+    label = f"{record['family']:<9} {record['edges']:>9} {record.get('format') or '-':<5} {record['stage']:<9} {record.get('algorithm') or '-':<21}"
+    if record["status"] == "ok":
+        print(f"{label} {record['seconds']:>9.3f}s {record['peak_rss_mb']:>9.1f} Mo {record['throughput_edges_per_s'] or 0:>12.0f} arêtes/s")
+    else:
+        print(f"{label} {record['status'].upper()}: {record.get('error')}")
+
+
+def _csv_list(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Banc de mesure du pipeline de graphes")
+    parser.add_argument("--families", type=_csv_list, default=FAMILIES)
+    parser.add_argument("--formats", type=_csv_list, default=FORMATS)
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in _csv_list(v)], default=DEFAULT_SIZES,
+                        help="Nombres d'arêtes cibles (défaut: 1k,10k,100k,1M)")
+    parser.add_argument("--stages", type=_csv_list, default=FILE_STAGES + GRAPH_STAGES)
+    parser.add_argument("--algorithms", type=_csv_list, default=ALGORITHMS)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Timeout par mesure (s)")
+    parser.add_argument("--max-layout-seconds", type=float, default=300.0,
+                        help="Ignore les layouts dont le coût prédit dépasse cette durée (sauf avec --calibrate)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="Répertoire des fichiers générés (temporaire par défaut)")
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--baseline", default=None, help="Rapport de référence pour la comparaison")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Tolérance de régression (0.2 = +20 %%)")
+    parser.add_argument("--noise-floor", type=float, default=0.05, help="Écart absolu minimal (s) pour signaler une régression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Réécrit services/layout_calibration.json à partir des mesures de layout")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = run_suite(args)
+
+    regressions = []
+    if args.baseline:
+        baseline = orjson.loads(Path(args.baseline).read_bytes())
+        comparisons = compare_to_baseline(report, baseline, args.threshold, args.noise_floor)
+        report["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "results": comparisons}
+        regressions = [c for c in comparisons if c["regression"]]
+        print(f"\n{len(comparisons)} mesures comparées, {len(regressions)} régression(s)")
+        for c in regressions:
+            print(f"  REGRESSION {' / '.join(str(k) for k in c['key'] if k)}: {c['baseline_seconds']}s -> {c['seconds']}s (x{c['ratio']})")
+
+    if args.calibrate:
+        from services.layout_selection import fit_calibration, CALIBRATION_PATH
+        layout_records = [
+            {"algorithm": r["algorithm"], "nodes": r["nodes"], "edges": r["edges"],
+             "seconds": r["seconds"], "peak_rss_mb": r["rss_delta_mb"]}
+            for r in report["records"]
+            if r["stage"] == "layout" and r.get("status") == "ok" and r.get("algorithm_used") == r["algorithm"]
+        ]
+        fitted = fit_calibration(layout_records, version=datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+        # Les algorithmes trop peu mesurés, ou seulement sur de petits graphes, gardent leurs coefficients précédents
+        calibration = orjson.loads(CALIBRATION_PATH.read_bytes()) if CALIBRATION_PATH.exists() else {"algorithms": {}}
+        calibration["version"] = fitted["version"]
+        for algorithm, model in fitted["algorithms"].items():
+            if model["samples"] >= MIN_CALIBRATION_SAMPLES and model["max_nodes"] >= MIN_CALIBRATION_NODES:
+                calibration["algorithms"][algorithm] = model
+        CALIBRATION_PATH.write_bytes(orjson.dumps(calibration, option=orjson.OPT_INDENT_2))
+        print(f"\nCalibration écrite dans {CALIBRATION_PATH} ({len(layout_records)} mesures)")
+
+    Path(args.output).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"\nRapport écrit dans {args.output}")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,12 +25,25 @@ celery_app.conf.update(
     task_track_started=True,
     result_expires=3600,  # 1h
     broker_connection_retry_on_startup=True,
+    # Un seul message réservé à la fois : les calculs spéculatifs ne bloquent pas les imports
+    worker_prefetch_multiplier=1,
+    task_routes={
+        'tasks.speculative_layout': {'queue': 'speculative'},
+    },
     # Celery Beat schedule for periodic tasks
     beat_schedule={
         'cleanup-expired-free-projects': {
             'task': 'tasks.cleanup_expired_free_projects',
             'schedule': 300.0,  # Every 5 minutes
         },
+        'snapshot-admin-stats': {
+            'task': 'tasks.snapshot_admin_stats',
+            'schedule': crontab(minute=0),  # Every hour
+        },
+        'schedule-speculative-layouts': {
+            'task': 'tasks.schedule_speculative_layouts',
+            'schedule': 60.0,  # Every minute (no-op when workers are busy)
+        },
     },
 )
 
@@ -32,12 +32,75 @@ class MongoDB:
         from models.user import User
         from models.project import Project
         from models.share_link import ShareLink
+        from models.layout_variant import LayoutVariant
+        from models.profile_artifact import ProfileArtifact
+        from models.node_column import NodeColumn
+        from models.stats_snapshot import StatsSnapshot
         
         await init_beanie(
             database=cls.client[settings.DATABASE_NAME],
-            document_models=[User, Project, ShareLink]
+            document_models=[User, Project, ShareLink, LayoutVariant, ProfileArtifact, NodeColumn, StatsSnapshot]
+        )
+        await cls.backfill_project_counts()
+        await cls.backfill_search_terms()
+        await cls.backfill_project_expiry()
+
+    @classmethod
+    async def backfill_project_counts(cls):
+        """
+        Recopie metadata.node_count / edge_count en champs de premier niveau
+        pour les projets créés avant leur introduction (mise à jour côté serveur).
+        """
+        from models.project import Project
+
+        await Project.get_motor_collection().update_many(
+            {"node_count": {"$exists": False}},
+            [{"$set": {
+                "node_count": {"$ifNull": ["$metadata.node_count", 0]},
+                "edge_count": {"$ifNull": ["$metadata.edge_count", 0]}
+            }}]
         )
     
+    @classmethod
+    async def backfill_search_terms(cls):
+        """
+        Calcule les termes de recherche (voir core.search_terms) des utilisateurs
+        et projets créés avant leur introduction, par lots d'écritures.
+        """
+        from pymongo import UpdateOne
+        from models.user import User
+        from models.project import Project
+        from core.search_terms import search_terms
+
+        for model, fields, target in (
+            (User, ("email", "full_name"), "search_terms"),
+            (Project, ("name",), "name_terms"),
+        ):
+            collection = model.get_motor_collection()
+            batch = []
+            async for doc in collection.find({target: {"$exists": False}}, {field: 1 for field in fields}):
+                terms = search_terms(*(doc.get(field) for field in fields))
+                batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {target: terms}}))
+                if len(batch) >= 1000:
+                    await collection.bulk_write(batch, ordered=False)
+                    batch = []
+            if batch:
+                await collection.bulk_write(batch, ordered=False)
+
+    @classmethod
+    async def backfill_project_expiry(cls):
+        """Dénormalise le plan Free des propriétaires sur les projets antérieurs à `expires_at`."""
+        from models.user import User
+        from models.project import Project
+        from services.project_expiry import backfill_expiry
+
+        if not await Project.get_motor_collection().find_one({"expires_at": {"$exists": False}}, {"_id": 1}):
+            return
+        free_owners = await User.get_motor_collection().find(
+            {"is_elite": {"$ne": True}, "is_superuser": {"$ne": True}}, {"_id": 1}
+        ).to_list(None)
+        await backfill_expiry([doc["_id"] for doc in free_owners])
+
     @classmethod
     async def close(cls):
         """
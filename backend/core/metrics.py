@@ -0,0 +1,187 @@
+"""
+Instrumentation du pipeline et métriques Prometheus.
+
+Chaque job enregistre des spans par étape (durée, pic RSS, nombre de nœuds
+et d'arêtes, algorithme) via `StageRecorder`. Les spans sont stockés dans
+les métadonnées du projet et alimentent les métriques Prometheus exposées
+par l'API (`GET /metrics`) et par les workers Celery (`CELERY_METRICS_PORT`).
+
+Avec le pool prefork de Celery, les métriques sont partagées entre processus
+via `PROMETHEUS_MULTIPROC_DIR` (mode multiprocess de prometheus_client).
+"""
+
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from loguru import logger
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY,
+    CONTENT_TYPE_LATEST, generate_latest, start_http_server
+)
+
+
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+MEMORY_BUCKETS = tuple(mb * 1024 * 1024 for mb in (1, 8, 32, 128, 256, 512, 1024, 2048, 4096, 8192))
+
+STAGE_DURATION = Histogram(
+    "graph_stage_duration_seconds",
+    "Durée d'une étape du pipeline de traitement",
+    ["stage", "format", "algorithm"],
+    buckets=DURATION_BUCKETS
+)
+STAGE_MEMORY = Histogram(
+    "graph_stage_peak_rss_delta_bytes",
+    "Pic de mémoire résidente atteint pendant une étape, au-delà du RSS initial",
+    ["stage", "format"],
+    buckets=MEMORY_BUCKETS
+)
+STAGE_FAILURES = Counter(
+    "graph_stage_failures_total",
+    "Étapes du pipeline terminées en erreur",
+    ["stage", "format"]
+)
+JOBS = Counter(
+    "graph_jobs_total",
+    "Jobs de traitement de graphe terminés",
+    ["status", "format"]
+)
+JOB_EDGES = Counter(
+    "graph_job_edges_total",
+    "Arêtes traitées par les jobs réussis",
+    ["format"]
+)
+LAYOUT_FALLBACKS = Counter(
+    "graph_layout_fallbacks_total",
+    "Layouts en échec remplacés par un placement aléatoire",
+    ["algorithm"]
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Requêtes HTTP traitées par l'API",
+    ["method", "route", "status"]
+)
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Durée des requêtes HTTP de l'API",
+    ["method", "route"],
+    buckets=DURATION_BUCKETS
+)
+
+
+def _status_kb(field: str) -> Optional[int]:
+    """Lit un champ de /proc/self/status (Linux), en Ko."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Remet à zéro le pic RSS du processus (VmHWM), si le noyau le permet."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _max_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class StageRecorder:
+    """
+    Collecte les spans des étapes d'un job.
+
+    Usage:
+        recorder = StageRecorder(format="csv")
+        with recorder.stage("build") as span:
+            ...
+            span["nodes"] = G.number_of_nodes()
+    """
+
+    def __init__(self, format: str = "unknown"):
+        self.format = format
+        self.spans: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str, **fields):
+        span: Dict[str, Any] = {"stage": name, **fields}
+
+        # Pic RSS de l'étape : VmHWM remis à zéro au début (Linux),
+        # sinon croissance du pic historique du processus
+        rss_start = _status_kb("VmRSS")
+        use_hwm = rss_start is not None and _reset_peak_rss()
+        max_rss_start = _max_rss_kb()
+        start = time.perf_counter()
+
+        try:
+            yield span
+            span["status"] = "ok"
+        except Exception as e:
+            span["status"] = "error"
+            span["error"] = f"{type(e).__name__}: {e}"
+            STAGE_FAILURES.labels(stage=name, format=self.format).inc()
+            raise
+        finally:
+            span["seconds"] = round(time.perf_counter() - start, 4)
+            if use_hwm:
+                peak_kb = _status_kb("VmHWM") or rss_start
+                delta_kb = max(peak_kb - rss_start, 0)
+            else:
+                delta_kb = max(_max_rss_kb() - max_rss_start, 0)
+            span["peak_rss_delta_mb"] = round(delta_kb / 1024, 2)
+            self.spans.append(span)
+
+            STAGE_DURATION.labels(
+                stage=name, format=self.format, algorithm=span.get("algorithm") or ""
+            ).observe(span["seconds"])
+            STAGE_MEMORY.labels(stage=name, format=self.format).observe(delta_kb * 1024)
+
+
+def record_job(status: str, format: str, edges: int = 0) -> None:
+    """Comptabilise la fin d'un job de traitement."""
+    JOBS.labels(status=status, format=format).inc()
+    if status == "success" and edges:
+        JOB_EDGES.labels(format=format).inc(edges)
+
+
+def _registry() -> CollectorRegistry:
+    """Registre à exposer : agrégé sur tous les processus en mode multiprocess."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> tuple:
+    """Retourne (contenu, content-type) au format d'exposition Prometheus."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> None:
+    """Expose les métriques sur un port HTTP dédié (workers Celery)."""
+    try:
+        start_http_server(port, registry=_registry())
+        logger.info(f"Métriques Prometheus exposées sur le port {port}")
+    except OSError as e:
+        logger.warning(f"Impossible d'exposer les métriques sur le port {port}: {e}")
+
+
+def mark_process_dead(pid: int) -> None:
+    """Libère les fichiers de métriques d'un processus enfant terminé (mode multiprocess)."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
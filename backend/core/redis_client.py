@@ -4,7 +4,6 @@ Fournit un wrapper async autour de redis-py avec préfixes pour organisation.
 """
 
 from redis.asyncio import Redis
-from core.config import settings
 from typing import Optional, Any
 import orjson
 
@@ -27,6 +26,8 @@ class RedisClient:
         Doit être appelé au démarrage de l'application.
         Configure le client Redis avec hiredis parser pour performance.
         """
+        # Import local : ce module est aussi importé par les workers, qui n'ont pas la config API
+        from core.config import settings
         cls.client = Redis.from_url(
             settings.REDIS_URL,
             decode_responses=settings.REDIS_DECODE_RESPONSES,
@@ -150,3 +151,13 @@ class RedisClient:
         full_key = f"blacklist:{token}"
         result = await cls.client.exists(full_key)
         return result > 0
+
+
+def get_redis() -> Optional[Redis]:
+    """
+    Client Redis async de l'API.
+
+    None hors de l'API (workers Celery, qui utilisent un client synchrone)
+    ou avant la connexion : les appelants dégradent alors sans cache.
+    """
+    return RedisClient.client
@@ -0,0 +1,46 @@
+"""
+Termes de recherche normalisés (recherche par préfixe sur index).
+
+Chaque texte indexé (email, nom complet, nom de projet) est stocké avec la
+liste de ses termes en minuscules et sans accents : le texte entier et chacun
+de ses mots. Une recherche devient une requête par intervalle ancrée sur ce
+champ multiclé, [q, q + U+FFFF), servie par l'index au lieu d'une expression
+régulière non ancrée qui parcourt toute la collection.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+
+_WORD = re.compile(r"[^\W_]+")
+_SPACES = re.compile(r"\s+")
+MAX_TERM_LENGTH = 100
+
+
+def normalize(text: Optional[str]) -> str:
+    """Minuscules, sans accents, espaces réduits."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _SPACES.sub(" ", stripped).strip()
+
+
+def search_terms(*texts: Optional[str]) -> List[str]:
+    """Termes indexés des textes : chaque texte normalisé et chacun de ses mots."""
+    terms = set()
+    for text in texts:
+        text = normalize(text)
+        if text:
+            terms.add(text[:MAX_TERM_LENGTH])
+            terms.update(word[:MAX_TERM_LENGTH] for word in _WORD.findall(text))
+    return sorted(terms)
+
+
+def prefix_query(field: str, query: Optional[str]) -> Dict[str, Any]:
+    """Filtre MongoDB : un des termes de `field` commence par la requête normalisée ({} si vide)."""
+    prefix = normalize(query)[:MAX_TERM_LENGTH]
+    if not prefix:
+        return {}
+    return {field: {"$gte": prefix, "$lt": prefix + "\uffff"}}
@@ -3,12 +3,14 @@ Point d'entrée principal de l'application FastAPI.
 Configure les middlewares, les routes et le cycle de vie de l'application.
 """
 
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 from core.config import settings
-from api.routes import auth, files, projects, users, share, admin
+from core.metrics import HTTP_REQUESTS, HTTP_DURATION, render_metrics
+from api.routes import auth, files, projects, users, share, admin, topology, search, facets, lod, spatial, previews
 
 
 @asynccontextmanager
@@ -66,11 +68,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],  # Pagination (admin, galerie)
 )
 
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """Mesure chaque requête, étiquetée par le gabarit de route (cardinalité bornée)."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    HTTP_DURATION.labels(method=request.method, route=route_path).observe(time.perf_counter() - start)
+    HTTP_REQUESTS.labels(method=request.method, route=route_path, status=str(response.status_code)).inc()
+    return response
+
+
 app.include_router(auth.router)
 app.include_router(files.router)
 app.include_router(projects.router)
+app.include_router(topology.router)
+app.include_router(search.router)
+app.include_router(facets.router)
+app.include_router(lod.router)
+app.include_router(spatial.router)
+app.include_router(previews.router)
 app.include_router(users.router)
 app.include_router(share.router)
 app.include_router(admin.router)
@@ -103,3 +124,13 @@ async def health():
         "status": "healthy",
         "version": settings.APP_VERSION
     }
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """
+    Métriques au format Prometheus (requêtes HTTP et, en mode multiprocess,
+    étapes du pipeline de traitement).
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
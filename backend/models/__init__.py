@@ -1,5 +1,8 @@
 from models.user import User
 from models.project import Project
 from models.share_link import ShareLink
+from models.layout_variant import LayoutVariant
+from models.profile_artifact import ProfileArtifact
+from models.node_column import NodeColumn
 
-__all__ = ["User", "Project", "ShareLink"]
+__all__ = ["User", "Project", "ShareLink", "LayoutVariant", "ProfileArtifact", "NodeColumn"]
@@ -0,0 +1,48 @@
+"""
+Modèle LayoutVariant Beanie pour MongoDB.
+Stocke les positions 3D d'un projet pour un algorithme donné, sans la topologie.
+"""
+
+from beanie import Document
+from pydantic import Field
+from datetime import datetime, timezone
+from typing import List, Optional
+from pymongo import IndexModel, ASCENDING
+
+
+class LayoutVariant(Document):
+    """
+    Variante de spatialisation d'un projet.
+
+    Les positions sont stockées sous forme de buffer binaire compact
+    (float32 little-endian, N x 3, soit 12 octets par nœud) dans l'ordre
+    des nœuds de `project.graph_data["nodes"]`. La topologie et les
+    attributs restent partagés dans le document Project. La cellule de
+    chaque nœud dans une grille 3D (2 octets par nœud) est écrite avec les
+    positions pour les requêtes par région.
+    """
+
+    project_id: str
+    algorithm: str
+    params_key: str = ""  # Paramètres du layout sérialisés de façon canonique
+    topology_key: str  # Empreinte (fichier source + mapping) de la topologie associée
+    node_count: int = 0
+    positions: bytes
+    grid_bounds: Optional[List[float]] = None  # Boîte englobante de la grille spatiale (min xyz, max xyz)
+    grid_cells: Optional[bytes] = None  # Cellule de chaque nœud dans la grille (uint16, voir spatial_index)
+    speculative: bool = False  # Précalculé en tâche de fond, pas encore demandé par un utilisateur
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "layout_variants"
+        indexes = [
+            IndexModel(
+                [("project_id", ASCENDING), ("algorithm", ASCENDING), ("params_key", ASCENDING)],
+                name="project_algorithm_params",
+                unique=True
+            ),
+            IndexModel(
+                [("speculative", ASCENDING), ("created_at", ASCENDING)],
+                name="speculative_created_at"
+            )
+        ]
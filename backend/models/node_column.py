@@ -0,0 +1,40 @@
+"""
+Modèle NodeColumn Beanie pour MongoDB.
+Stocke une métrique analytique par nœud (centralité, communauté...) d'un projet.
+"""
+
+from beanie import Document
+from pydantic import Field
+from datetime import datetime, timezone
+from pymongo import IndexModel, ASCENDING
+
+
+class NodeColumn(Document):
+    """
+    Colonne typée calculée sur les nœuds d'un projet.
+
+    Les valeurs sont stockées sous forme de buffer binaire compact
+    (`dtype` NumPy little-endian, une valeur par nœud) dans l'ordre des
+    nœuds de `project.graph_data["nodes"]`, comme les variantes de layout.
+    """
+
+    project_id: str
+    metric: str  # degree, weighted_degree, pagerank, coreness, community, betweenness
+    params_key: str = ""  # Paramètres du calcul sérialisés de façon canonique
+    topology_key: str  # Empreinte (fichier source + mapping) de la topologie associée
+    dtype: str  # "<i4" ou "<f4"
+    node_count: int = 0
+    values: bytes
+    summary: dict = Field(default_factory=dict)  # min, max, mean (ou nombre de communautés)
+    seconds: float = 0.0  # Durée du calcul
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "node_columns"
+        indexes = [
+            IndexModel(
+                [("project_id", ASCENDING), ("metric", ASCENDING), ("params_key", ASCENDING)],
+                name="project_metric_params",
+                unique=True
+            )
+        ]
@@ -0,0 +1,46 @@
+"""
+Modèle ProfileArtifact Beanie pour MongoDB.
+Stocke le profil (échantillonnage + allocations) d'un job de traitement.
+"""
+
+from beanie import Document
+from pydantic import Field
+from datetime import datetime, timezone
+from typing import Optional, List
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+
+class ProfileArtifact(Document):
+    """
+    Profil d'exécution d'un job `async_process_graph_file`.
+
+    `folded` contient les piles échantillonnées au format "folded stacks"
+    (une pile par ligne, suivie du nombre d'échantillons), directement
+    exploitable par flamegraph.pl ou speedscope.
+    """
+
+    task_id: str
+    project_id: Optional[str] = None
+    user_id: Optional[str] = None
+    trigger: str  # admin, user ou sampled
+    status: str  # success ou failure
+    format: Optional[str] = None
+    algorithm: Optional[str] = None
+    node_count: int = 0
+    edge_count: int = 0
+    duration_seconds: float = 0.0
+    samples: int = 0
+    interval_ms: float = 0.0
+    traced_peak_mb: float = 0.0
+    top_allocations: List[dict] = Field(default_factory=list)
+    stages: List[dict] = Field(default_factory=list)
+    folded: str = ""
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "profile_artifacts"
+        indexes = [
+            IndexModel([("created_at", DESCENDING)], name="created_at_desc"),
+            IndexModel([("project_id", ASCENDING), ("created_at", DESCENDING)], name="project_created_at"),
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_created_at"),
+        ]
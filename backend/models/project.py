@@ -3,10 +3,12 @@ Modèle Projet Beanie pour MongoDB.
 Définit la structure des projets utilisateurs.
 """
 
-from beanie import Document, Link
-from pydantic import Field
+from beanie import Document, Link, PydanticObjectId, before_event, Insert, Replace, Save
+from pydantic import BaseModel, Field
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, List, Any
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from core.search_terms import search_terms
 from .user import User
 
 class Project(Document):
@@ -18,6 +20,7 @@ class Project(Document):
     """
     
     name: str = Field(..., min_length=1, max_length=100)
+    name_terms: List[str] = Field(default_factory=list)  # Nom normalisé et ses mots (recherche admin par préfixe)
     description: Optional[str] = None
     owner: Link[User]
     is_public: bool = True
@@ -25,10 +28,27 @@ class Project(Document):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: Optional[datetime] = None
     graph_data: Optional[dict] = None
+    node_count: int = 0  # Copie de metadata.node_count (tri et listes sans charger metadata)
+    edge_count: int = 0
     metadata: Optional[dict] = None
     mapping: Optional[dict] = None
     source_file_path: Optional[str] = None
     algorithm: Optional[str] = "auto"  # Layout algorithm used (auto, fruchterman_reingold, etc.)
+    topology_key: Optional[str] = None  # Empreinte fichier + mapping partagée par les variantes de layout
+    search_index_path: Optional[str] = None  # Index de recherche des nœuds écrit à l'ingestion (.search.npz)
+    lod_path: Optional[str] = None  # Hiérarchie de niveaux de détail écrite à l'ingestion (.lod.npz)
+    backbone_path: Optional[str] = None  # Squelette d'arêtes (indices dans graph_data["edges"], .backbone.npz)
+    preview_path: Optional[str] = None  # Vignette PNG et nuage de points réduit du layout courant (.preview.<clé>.npz)
+    preview_key: Optional[str] = None  # Empreinte des aperçus (version des URL mises en cache)
+    parent_id: Optional[str] = None  # Projet dérivé : sous-graphe d'un autre projet (graph_data non dupliqué)
+    parent_topology_key: Optional[str] = None  # Topologie du parent au moment de l'extraction
+    subgraph_nodes: Optional[List[int]] = None  # Indices (triés) des nœuds dans graph_data du parent
+    expires_at: Optional[datetime] = None  # Plan Free : suppression à cette date (voir services.project_expiry)
+    version: int = 0  # Incrémentée à chaque écriture (concurrence optimiste, voir services.project_store)
+
+    @before_event(Insert, Replace, Save)
+    def refresh_name_terms(self):
+        self.name_terms = search_terms(self.name)
     
     class Settings:
         name = "projects"
@@ -36,7 +56,20 @@ class Project(Document):
             "owner",
             "is_public",
             "is_featured",
-            "created_at"
+            "created_at",
+            "parent_id",
+            "name_terms",
+            "expires_at",
+            # Tris de la liste administrateur : (champ, _id) pour un ordre stable entre les pages
+            *[
+                IndexModel([(field, ASCENDING), ("_id", ASCENDING)], name=f"admin_sort_{field}")
+                for field in ("created_at", "name", "is_public", "node_count", "edge_count")
+            ],
+            # Galerie : pagination par curseur (created_at, _id) parmi les projets publiés
+            IndexModel(
+                [("is_featured", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="gallery_keyset"
+            )
         ]
     
     class Config:
@@ -47,3 +80,32 @@ class Project(Document):
                 "is_public": True
             }
         }
+
+
+class ProjectSummary(BaseModel):
+    """
+    Projection des vues résumées (listes, galerie) : seuls ces champs sont
+    lus dans MongoDB, jamais graph_data ni metadata.
+    """
+    id: PydanticObjectId = Field(alias="_id")
+    name: str
+    description: Optional[str] = None
+    is_public: bool = True
+    is_featured: bool = False
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    algorithm: Optional[str] = "auto"
+    node_count: int = 0
+    edge_count: int = 0
+    parent_id: Optional[str] = None
+    preview_key: Optional[str] = None
+
+
+class ProjectState(ProjectSummary):
+    """Projection des champs nécessaires aux modifications (sans graph_data)."""
+    owner: Optional[Any] = None  # DBRef vers users
+    mapping: Optional[dict] = None
+    source_file_path: Optional[str] = None
+    topology_key: Optional[str] = None
+    version: int = 0
+
@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import IndexModel, ASCENDING
 from pydantic import Field
 from datetime import datetime
 from typing import Optional
@@ -18,5 +19,7 @@ class ShareLink(Document):
         name = "share_links"
         indexes = [
             "token",
-            "project_id"
+            "project_id",
+            # Suppression automatique des liens expirés (expires_at nul : jamais)
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0)
         ]
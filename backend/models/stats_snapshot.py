@@ -0,0 +1,38 @@
+"""
+Modèle StatsSnapshot Beanie pour MongoDB.
+Relevés horaires des compteurs d'administration (collection time-series).
+"""
+
+from beanie import Document, TimeSeriesConfig, Granularity
+from pydantic import Field
+from datetime import datetime, timezone
+from typing import Dict
+
+
+class StatsSnapshot(Document):
+    """
+    Relevé des compteurs globaux à un instant donné.
+
+    Stocké dans une collection time-series MongoDB (compression par
+    intervalles d'une heure, expiration après un an) : les graphiques
+    d'évolution lisent ces relevés et ne parcourent jamais `projects`.
+    """
+
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    total_users: int = 0
+    active_users: int = 0
+    elite_users: int = 0
+    total_projects: int = 0
+    public_projects: int = 0
+    featured_projects: int = 0
+    total_nodes: int = 0
+    total_edges: int = 0
+    algorithms: Dict[str, int] = Field(default_factory=dict)
+
+    class Settings:
+        name = "stats_snapshots"
+        timeseries = TimeSeriesConfig(
+            time_field="timestamp",
+            granularity=Granularity.hours,
+            expire_after_seconds=365 * 24 * 3600
+        )
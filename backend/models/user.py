@@ -3,10 +3,12 @@ Modèle utilisateur Beanie pour MongoDB.
 Définit la structure et les index pour la collection users.
 """
 
-from beanie import Document
+from beanie import Document, before_event, Insert, Replace, Save
 from pydantic import EmailStr, Field
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, List
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from core.search_terms import search_terms
 
 
 class User(Document):
@@ -29,14 +31,23 @@ class User(Document):
     elite_request_status: str = "NONE" # NONE, PENDING, APPROVED, REJECTED
     elite_request_date: Optional[datetime] = None
     
+    profiling_enabled: bool = False  # Jobs de traitement profilés (activé par un admin)
+    
     preferences: dict = Field(default_factory=dict)
+    search_terms: List[str] = Field(default_factory=list)  # Email et nom normalisés (recherche admin par préfixe)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: Optional[datetime] = None
+
+    @before_event(Insert, Replace, Save)
+    def refresh_search_terms(self):
+        self.search_terms = search_terms(self.email, self.full_name)
     
     class Settings:
         name = "users"
         indexes = [
-            "email"
+            "email",
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+            IndexModel([("search_terms", ASCENDING), ("created_at", ASCENDING)], name="search_terms")
         ]
     
     class Config:
@@ -1,12 +1,37 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
+class HistogramBucket(BaseModel):
+    min: float
+    max: Optional[float] = None  # None : dernière classe, sans borne supérieure
+    count: int
+
 class AdminStats(BaseModel):
     total_users: int
     total_projects: int
     active_users: int
     public_projects: int
+    elite_users: int = 0
+    featured_projects: int = 0
+    total_nodes: int = 0
+    total_edges: int = 0
+    node_histogram: List[HistogramBucket] = []
+    edge_histogram: List[HistogramBucket] = []
+    job_durations: List[HistogramBucket] = []  # Secondes, somme des étapes du dernier job de chaque projet
+    algorithms: Dict[str, int] = {}
+    computed_at: Optional[datetime] = None
+
+class StatsPoint(BaseModel):
+    timestamp: datetime
+    total_users: int = 0
+    active_users: int = 0
+    elite_users: int = 0
+    total_projects: int = 0
+    public_projects: int = 0
+    featured_projects: int = 0
+    total_nodes: int = 0
+    total_edges: int = 0
 
 class UserAdminView(BaseModel):
     id: str
@@ -18,6 +43,7 @@ class UserAdminView(BaseModel):
     is_elite: bool = False
     elite_request_status: str = "NONE"
     elite_request_date: Optional[datetime] = None
+    profiling_enabled: bool = False
     created_at: datetime
     last_login: Optional[datetime] = None
 
@@ -33,6 +59,7 @@ class UserUpdateAdmin(BaseModel):
     role: Optional[str] = None
     is_elite: Optional[bool] = None
     elite_request_status: Optional[str] = None
+    profiling_enabled: Optional[bool] = None
 
 class ProjectAdminView(BaseModel):
     id: str
@@ -47,3 +74,24 @@ class ProjectUpdateAdmin(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     is_public: Optional[bool] = None
+
+class ProfileArtifactView(BaseModel):
+    id: str
+    task_id: str
+    project_id: Optional[str] = None
+    user_id: Optional[str] = None
+    trigger: str
+    status: str
+    format: Optional[str] = None
+    algorithm: Optional[str] = None
+    node_count: int = 0
+    edge_count: int = 0
+    duration_seconds: float = 0.0
+    samples: int = 0
+    interval_ms: float = 0.0
+    traced_peak_mb: float = 0.0
+    created_at: datetime
+
+class ProfileArtifactDetail(ProfileArtifactView):
+    top_allocations: List[dict] = []
+    stages: List[dict] = []
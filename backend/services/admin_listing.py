@@ -0,0 +1,111 @@
+"""
+Listes administrateur (projets, utilisateurs) en une seule agrégation MongoDB.
+
+Le tri (sur un index composé champ + _id, ordre stable entre les pages)
+précède une étape `$facet` qui calcule dans le même aller-retour la page
+demandée, avec l'email du propriétaire joint par `$lookup` sur les seuls
+projets de la page, et le nombre total de projets correspondant aux filtres.
+"""
+
+from typing import Dict, Any, List, Tuple
+
+from models.project import Project
+from models.user import User
+
+
+ADMIN_PROJECT_SORTS = ("created_at", "name", "is_public", "node_count", "edge_count")
+
+# Champs lus avant la pagination : graph_data et metadata ne transitent jamais dans le pipeline
+_LISTED_FIELDS = {"name": 1, "owner": 1, "is_public": 1, "created_at": 1, "node_count": 1, "edge_count": 1}
+
+_USER_FIELDS = (
+    "email", "full_name", "is_active", "is_superuser", "role", "is_elite",
+    "elite_request_status", "elite_request_date", "profiling_enabled", "created_at"
+)
+
+# Identifiant du propriétaire (DBRef) : un chemin "owner.$id" est refusé dans les expressions
+_OWNER_ID = {"$getField": {"field": {"$literal": "$id"}, "input": "$owner"}}
+
+
+def _owner_lookup() -> Dict[str, Any]:
+    return {"$lookup": {
+        "from": "users",
+        "let": {"owner_id": _OWNER_ID},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": ["$_id", "$$owner_id"]}}},
+            {"$project": {"_id": 0, "email": 1}}
+        ],
+        "as": "owner_doc"
+    }}
+
+
+async def list_admin_projects(
+    match: Dict[str, Any],
+    sort_by: str,
+    sort_order: str,
+    skip: int,
+    limit: int
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Une page de projets (avec `owner_email`) et le total des projets filtrés.
+
+    Raises:
+        ValueError: champ de tri non autorisé
+    """
+    if sort_by not in ADMIN_PROJECT_SORTS:
+        raise ValueError(f"Tri non supporté: {sort_by} (disponibles: {', '.join(ADMIN_PROJECT_SORTS)})")
+    direction = -1 if sort_order == "desc" else 1
+
+    pipeline = [
+        {"$match": match},
+        {"$sort": {sort_by: direction, "_id": direction}},
+        {"$project": _LISTED_FIELDS},
+        {"$facet": {
+            "items": [
+                {"$skip": skip},
+                {"$limit": limit},
+                _owner_lookup(),
+                {"$project": {
+                    "_id": 0,
+                    "id": {"$toString": "$_id"},
+                    "name": 1,
+                    "is_public": 1,
+                    "created_at": 1,
+                    "node_count": {"$ifNull": ["$node_count", 0]},
+                    "edge_count": {"$ifNull": ["$edge_count", 0]},
+                    "owner_email": {"$ifNull": [{"$first": "$owner_doc.email"}, "Unknown"]}
+                }}
+            ],
+            "total": [{"$count": "count"}]
+        }}
+    ]
+
+    async for page in Project.get_motor_collection().aggregate(pipeline):
+        total = page["total"][0]["count"] if page["total"] else 0
+        return page["items"], total
+    return [], 0
+
+
+async def list_admin_users(match: Dict[str, Any], skip: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Une page d'utilisateurs (plus récents d'abord) et le total des utilisateurs filtrés."""
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$facet": {
+            "items": [
+                {"$skip": skip},
+                {"$limit": limit},
+                {"$project": {
+                    "_id": 0,
+                    "id": {"$toString": "$_id"},
+                    **{field: 1 for field in _USER_FIELDS}
+                }}
+            ],
+            "total": [{"$count": "count"}]
+        }}
+    ]
+
+    async for page in User.get_motor_collection().aggregate(pipeline):
+        total = page["total"][0]["count"] if page["total"] else 0
+        return page["items"], total
+    return [], 0
@@ -0,0 +1,187 @@
+"""
+Statistiques d'administration.
+
+Tous les compteurs et distributions sont calculés en une seule agrégation :
+les utilisateurs et (via `$unionWith`) les projets, réduits à quelques champs,
+traversent une étape `$facet` qui produit compteurs, histogrammes de taille
+des graphes, usage des algorithmes et durées des jobs (somme des spans de
+`metadata.stages`). Le résultat est mis en cache dans Redis (ADMIN_STATS_TTL).
+
+Un relevé horaire des compteurs est écrit dans la collection time-series
+`stats_snapshots` ; les graphiques d'évolution ne lisent que ces relevés.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
+
+import orjson
+
+from core.redis_client import get_redis
+from models.user import User
+from models.stats_snapshot import StatsSnapshot
+
+
+ADMIN_STATS_TTL = int(os.getenv("ADMIN_STATS_TTL", "60"))  # secondes
+STATS_CACHE_KEY = "admin:stats"
+SIZE_BUCKETS = [0, 100, 1_000, 10_000, 100_000, 1_000_000]  # Nœuds ou arêtes
+DURATION_BUCKETS = [0, 1, 5, 30, 120, 600]  # Secondes
+SNAPSHOT_COUNTERS = (
+    "total_users", "active_users", "elite_users", "total_projects", "public_projects",
+    "featured_projects", "total_nodes", "total_edges"
+)
+HISTORY_RESOLUTIONS = ("hour", "day")
+
+
+def _count_if(condition: Dict[str, Any]) -> Dict[str, Any]:
+    return {"$sum": {"$cond": [condition, 1, 0]}}
+
+
+def _histogram(field: str, boundaries: List[float], match: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    return [
+        {"$match": {"kind": "project", **(match or {})}},
+        {"$bucket": {
+            "groupBy": f"${field}",
+            "boundaries": boundaries,
+            "default": "overflow",  # Au-delà de la dernière borne
+            "output": {"count": {"$sum": 1}}
+        }}
+    ]
+
+
+def _stats_pipeline() -> List[Dict[str, Any]]:
+    return [
+        {"$project": {"_id": 0, "kind": {"$literal": "user"}, "is_active": 1, "is_elite": 1}},
+        {"$unionWith": {"coll": "projects", "pipeline": [
+            {"$project": {
+                "_id": 0,
+                "kind": {"$literal": "project"},
+                "is_public": 1,
+                "is_featured": 1,
+                "algorithm": {"$ifNull": ["$algorithm", "auto"]},
+                "node_count": {"$ifNull": ["$node_count", 0]},
+                "edge_count": {"$ifNull": ["$edge_count", 0]},
+                # Durée du dernier job (projets antérieurs aux spans : aucune)
+                "duration": {"$cond": [
+                    {"$isArray": "$metadata.stages"}, {"$sum": "$metadata.stages.seconds"}, None
+                ]}
+            }}
+        ]}},
+        {"$facet": {
+            "users": [
+                {"$match": {"kind": "user"}},
+                {"$group": {
+                    "_id": None,
+                    "total_users": {"$sum": 1},
+                    "active_users": _count_if({"$ne": ["$is_active", False]}),
+                    "elite_users": _count_if({"$eq": ["$is_elite", True]})
+                }}
+            ],
+            "projects": [
+                {"$match": {"kind": "project"}},
+                {"$group": {
+                    "_id": None,
+                    "total_projects": {"$sum": 1},
+                    "public_projects": _count_if({"$ne": ["$is_public", False]}),
+                    "featured_projects": _count_if({"$eq": ["$is_featured", True]}),
+                    "total_nodes": {"$sum": "$node_count"},
+                    "total_edges": {"$sum": "$edge_count"}
+                }}
+            ],
+            "node_histogram": _histogram("node_count", SIZE_BUCKETS),
+            "edge_histogram": _histogram("edge_count", SIZE_BUCKETS),
+            "job_durations": _histogram("duration", DURATION_BUCKETS, {"duration": {"$ne": None}}),
+            "algorithms": [
+                {"$match": {"kind": "project"}},
+                {"$group": {"_id": "$algorithm", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ]
+        }}
+    ]
+
+
+def _buckets(rows: List[Dict[str, Any]], boundaries: List[float]) -> List[Dict[str, Any]]:
+    """Histogramme complet (classes vides comprises) : [{"min", "max", "count"}]."""
+    counts = {row["_id"]: row["count"] for row in rows}
+    buckets = [{"min": lo, "max": hi, "count": counts.get(lo, 0)} for lo, hi in zip(boundaries, boundaries[1:])]
+    buckets.append({"min": boundaries[-1], "max": None, "count": counts.get("overflow", 0)})
+    return buckets
+
+
+async def compute_stats() -> Dict[str, Any]:
+    """Compteurs et distributions (une agrégation, un aller-retour)."""
+    page = None
+    async for page in User.get_motor_collection().aggregate(_stats_pipeline()):
+        break
+    page = page or {}
+
+    stats = {counter: 0 for counter in SNAPSHOT_COUNTERS}
+    for group in ("users", "projects"):
+        if page.get(group):
+            stats.update({k: v for k, v in page[group][0].items() if k != "_id"})
+    stats.update({
+        "node_histogram": _buckets(page.get("node_histogram", []), SIZE_BUCKETS),
+        "edge_histogram": _buckets(page.get("edge_histogram", []), SIZE_BUCKETS),
+        "job_durations": _buckets(page.get("job_durations", []), DURATION_BUCKETS),
+        "algorithms": {row["_id"]: row["count"] for row in page.get("algorithms", [])},
+        "computed_at": datetime.now(timezone.utc)
+    })
+    return stats
+
+
+async def get_stats() -> Dict[str, Any]:
+    """Statistiques servies depuis Redis si elles ont moins de ADMIN_STATS_TTL secondes."""
+    redis = get_redis()
+    if redis:
+        try:
+            cached = await redis.get(STATS_CACHE_KEY)
+            if cached:
+                return orjson.loads(cached)
+        except Exception:
+            redis = None
+
+    stats = await compute_stats()
+    if redis:
+        try:
+            await redis.setex(STATS_CACHE_KEY, ADMIN_STATS_TTL, orjson.dumps(stats))
+        except Exception:
+            pass
+    return stats
+
+
+async def record_snapshot() -> StatsSnapshot:
+    """Écrit le relevé courant des compteurs dans la collection time-series."""
+    stats = await compute_stats()
+    snapshot = StatsSnapshot(
+        **{counter: stats[counter] for counter in SNAPSHOT_COUNTERS},
+        algorithms=stats["algorithms"]
+    )
+    await snapshot.insert()
+    return snapshot
+
+
+async def stats_history(days: int, resolution: str) -> List[Dict[str, Any]]:
+    """
+    Évolution des compteurs sur `days` jours : dernier relevé de chaque heure
+    ou de chaque jour (`resolution`).
+
+    Raises:
+        ValueError: résolution inconnue
+    """
+    if resolution not in HISTORY_RESOLUTIONS:
+        raise ValueError(f"Résolution inconnue: {resolution} (disponibles: {', '.join(HISTORY_RESOLUTIONS)})")
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    pipeline = [
+        {"$match": {"timestamp": {"$gte": since}}},
+        {"$sort": {"timestamp": 1}},
+        {"$group": {
+            "_id": {"$dateTrunc": {"date": "$timestamp", "unit": resolution}},
+            **{counter: {"$last": f"${counter}"} for counter in SNAPSHOT_COUNTERS}
+        }},
+        {"$sort": {"_id": 1}}
+    ]
+    return [
+        {"timestamp": row.pop("_id"), **row}
+        async for row in StatsSnapshot.get_motor_collection().aggregate(pipeline)
+    ]
@@ -0,0 +1,175 @@
+"""
+Extraction d'un squelette d'arêtes (backbone) pour respecter un budget de rendu.
+
+Chaque méthode classe les arêtes par importance, de façon vectorisée ;
+les `budget` premières forment le squelette :
+- "disparity" : filtre de disparité (Serrano et al.) — une arête est
+  significative si son poids pèse lourd dans la force d'au moins une de ses
+  extrémités : alpha = (1 - w / s)^(k - 1), classement par alpha croissant ;
+- "topk" : rang de l'arête parmi les plus lourdes de chaque extrémité
+  (une arête du top-k d'un de ses nœuds passe avant toute arête de rang k+1) ;
+- "forest" : forêt couvrante de poids maximal (préserve la connectivité
+  visible), complétée par les arêtes les plus lourdes.
+
+Le squelette est stocké comme liste d'indices dans graph_data["edges"]
+(`.backbone.npz` à côté du fichier source) : le jeu complet reste disponible.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+from bson import ObjectId
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree
+
+from models.project import Project
+from services.graph_metrics import GraphArrays
+from services.layout_variants import sidecar_path
+from services.project_cache import ProjectCache
+
+
+BACKBONE_METHODS = ("disparity", "topk", "forest")
+BACKBONE_EDGE_BUDGET = int(os.getenv("BACKBONE_EDGE_BUDGET", "100000"))
+BACKBONE_CACHE_BYTES = int(float(os.getenv("BACKBONE_CACHE_MB", "128")) * 1024 * 1024)
+
+
+def validate_method(method: str) -> str:
+    if method not in BACKBONE_METHODS:
+        raise ValueError(f"Méthode inconnue: {method} (disponibles: {', '.join(BACKBONE_METHODS)})")
+    return method
+
+
+def _positive_weights(weights: np.ndarray) -> np.ndarray:
+    return np.where(np.isfinite(weights) & (weights > 0), weights, 1.0)
+
+
+def _disparity_order(num_nodes: int, edges: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    u, v = edges[:, 0], edges[:, 1]
+    strength = np.bincount(u, weights, minlength=num_nodes) + np.bincount(v, weights, minlength=num_nodes)
+    degree = np.bincount(edges.ravel(), minlength=num_nodes)
+
+    def alpha(node: np.ndarray) -> np.ndarray:
+        k = degree[node]
+        p = weights / np.maximum(strength[node], 1e-300)
+        # Un nœud de degré 1 ne rend aucune arête significative de son côté
+        return np.where(k > 1, np.power(np.clip(1.0 - p, 0.0, 1.0), np.maximum(k - 1, 1)), 1.0)
+
+    scores = np.minimum(alpha(u), alpha(v))
+    scores[u == v] = np.inf  # Boucles : aucun apport visuel
+    return np.lexsort((-weights, scores)), scores
+
+
+def _topk_order(num_nodes: int, edges: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    m = len(edges)
+    ends = np.concatenate([edges[:, 0], edges[:, 1]])
+    ids = np.concatenate([np.arange(m), np.arange(m)])
+    # Extrémités groupées par nœud, arêtes de poids décroissant dans chaque groupe
+    order = np.lexsort((-np.concatenate([weights, weights]), ends))
+    sorted_ends = ends[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ends[1:] != sorted_ends[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    ranks = np.full(m, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(ranks, ids[order], np.arange(len(order)) - group_start)
+    return np.lexsort((-weights, ranks)), ranks.astype(np.float64)
+
+
+def _forest_order(num_nodes: int, edges: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    lo = np.minimum(edges[:, 0], edges[:, 1])
+    hi = np.maximum(edges[:, 0], edges[:, 1])
+    keys = lo * num_nodes + hi
+    # Arête la plus lourde de chaque paire (multi-arêtes) ; boucles exclues
+    by_weight = np.lexsort((-weights, keys))
+    first = by_weight[np.r_[True, keys[by_weight][1:] != keys[by_weight][:-1]]]
+    first = first[lo[first] != hi[first]]
+
+    lengths = 1.0 / weights[first]  # Arbre couvrant minimal sur 1/w = forêt de poids maximal
+    graph = coo_matrix((lengths, (lo[first], hi[first])), shape=(num_nodes, num_nodes)).tocsr()
+    tree = minimum_spanning_tree(graph).tocoo()
+    tree_keys = np.minimum(tree.row, tree.col).astype(np.int64) * num_nodes + np.maximum(tree.row, tree.col)
+
+    first_keys = keys[first]
+    sort = np.argsort(first_keys)
+    in_forest = np.zeros(len(edges), dtype=bool)
+    in_forest[first[sort[np.searchsorted(first_keys[sort], tree_keys)]]] = True
+    scores = np.where(in_forest, 0.0, 1.0)
+    return np.lexsort((-weights, scores)), scores
+
+
+def extract_backbone(arrays: GraphArrays, method: str, budget: int) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Indices (triés) dans graph_data["edges"] des `budget` arêtes les plus
+    importantes selon la méthode, et résumé du squelette.
+    """
+    validate_method(method)
+    start = time.perf_counter()
+    num_nodes = len(arrays.node_keys)
+    weights = _positive_weights(arrays.weights)
+    rows = arrays.rows if arrays.rows is not None else np.arange(len(arrays.edges))
+
+    if len(arrays.edges) == 0:
+        order, scores = np.zeros(0, dtype=np.int64), np.zeros(0)
+    else:
+        order, scores = {
+            "disparity": _disparity_order,
+            "topk": _topk_order,
+            "forest": _forest_order,
+        }[method](num_nodes, arrays.edges, weights)
+
+    kept = order[:budget]
+    kept = kept[np.isfinite(scores[kept])]
+    summary = {
+        "method": method,
+        "budget": budget,
+        "edges": int(len(kept)),
+        "edge_count": int(len(arrays.edges)),
+        "seconds": round(time.perf_counter() - start, 4)
+    }
+    if len(kept):
+        summary["max_score"] = float(scores[kept].max())  # alpha maximal, rang maximal ou 1 (hors forêt)
+    return np.sort(rows[kept]).astype(np.uint32), summary
+
+
+def save_backbone(rows: np.ndarray, summary: Dict[str, Any], source_file_path: str, topology_key: str) -> str:
+    path = sidecar_path(source_file_path, topology_key, "backbone")
+    with open(path, "wb") as f:
+        np.savez(f, rows=rows, method=np.array(summary["method"]), budget=np.array(summary["budget"]))
+    return str(path)
+
+
+class Backbone:
+    """Indices des arêtes du squelette d'un projet."""
+
+    def __init__(self, rows: np.ndarray, method: str, budget: int):
+        self.rows = rows
+        self.method = method
+        self.budget = budget
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes
+
+    def matches(self, summary: Dict[str, Any]) -> bool:
+        """Vrai si l'entrée correspond au squelette décrit par `metadata.backbone` (recalcul éventuel)."""
+        return (summary.get("method"), summary.get("budget"), summary.get("edges")) == (self.method, self.budget, len(self.rows))
+
+    def select(self, edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [edges[i] for i in self.rows.tolist() if i < len(edges)]
+
+
+async def _load_backbone(project_id: str) -> Backbone:
+    doc = await Project.get_motor_collection().find_one({"_id": ObjectId(project_id)}, {"backbone_path": 1})
+    path = (doc or {}).get("backbone_path")
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError("Squelette d'arêtes absent")
+
+    def load():
+        with np.load(path, allow_pickle=False) as data:
+            return Backbone(data["rows"], str(data["method"]), int(data["budget"]))
+
+    return await asyncio.to_thread(load)
+
+
+backbone_cache = ProjectCache(_load_backbone, BACKBONE_CACHE_BYTES)
@@ -0,0 +1,196 @@
+"""
+Facettes des attributs de nœuds et évaluation de filtres côté serveur.
+
+À l'ingestion, les attributs des nœuds sont chargés en colonnes Polars :
+- catégoriels (chaînes, booléens) : nombre de valeurs distinctes et top-K
+  par `group_by` ;
+- numériques : min, max, moyenne et histogramme à pas constant.
+Les facettes sont stockées dans `project.metadata["facets"]`.
+
+Les filtres sont évalués en expressions Polars sur les mêmes colonnes
+(gardées dans un cache LRU de l'API) et retournent un bitset des nœuds
+retenus, dans l'ordre de `graph_data["nodes"]`.
+"""
+
+import asyncio
+import os
+from typing import Dict, Any, List
+
+import numpy as np
+import polars as pl
+from bson import ObjectId
+
+from models.project import Project
+from services.project_cache import ProjectCache
+
+
+FACET_CACHE_BYTES = int(float(os.getenv("FACET_CACHE_MB", "512")) * 1024 * 1024)
+TOP_K = 50
+HISTOGRAM_BINS = 20
+MAX_FACET_ATTRIBUTES = 50
+RESERVED_KEYS = ("id", "x", "y", "z")
+ROW_COLUMN = "__node__"  # Indice du nœud : garantit une ligne par nœud même sans attribut
+
+FILTER_OPS = ("eq", "ne", "gt", "gte", "lt", "lte", "in", "contains", "between", "missing")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def nodes_frame(nodes: List[Dict[str, Any]]) -> pl.DataFrame:
+    """
+    Colonnes des attributs de nœuds (une ligne par nœud, dans l'ordre de graph_data).
+    Un attribut est numérique (Float64) si toutes ses valeurs le sont, sinon texte.
+    """
+    keys: Dict[str, None] = {}
+    for node in nodes:
+        for key in node:
+            if key not in RESERVED_KEYS:
+                keys[key] = None
+
+    columns = {ROW_COLUMN: pl.Series(ROW_COLUMN, np.arange(len(nodes), dtype=np.int32))}
+    for key in list(keys)[:MAX_FACET_ATTRIBUTES]:
+        values = [node.get(key) for node in nodes]
+        present = [v for v in values if v is not None]
+        if present and all(isinstance(v, bool) for v in present):
+            columns[key] = pl.Series(key, values, dtype=pl.Boolean)
+        elif present and all(_is_number(v) for v in present):
+            columns[key] = pl.Series(key, values, dtype=pl.Float64)
+        else:
+            columns[key] = pl.Series(key, [None if v is None else str(v) for v in values], dtype=pl.String)
+    return pl.DataFrame(list(columns.values()))
+
+
+def _categorical_facet(df: pl.DataFrame, column: str) -> Dict[str, Any]:
+    series = df[column]
+    counts = (
+        df.lazy()
+        .filter(pl.col(column).is_not_null())
+        .group_by(column)
+        .agg(pl.len().alias("count"))
+        .sort(["count", column], descending=[True, False])
+        .collect()
+    )
+    top = counts.head(TOP_K)
+    return {
+        "type": "categorical",
+        "distinct": counts.height,
+        "missing": series.null_count(),
+        "top": [{"value": v, "count": int(c)} for v, c in zip(top[column].to_list(), top["count"].to_list())],
+        "truncated": counts.height > TOP_K
+    }
+
+
+def _numeric_facet(df: pl.DataFrame, column: str) -> Dict[str, Any]:
+    series = df[column]
+    values = series.drop_nulls().drop_nans().to_numpy()
+    facet = {"type": "numeric", "missing": series.null_count()}
+    if len(values) == 0:
+        return facet
+
+    low, high = float(values.min()), float(values.max())
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS, range=(low, high) if high > low else (low, low + 1))
+    facet.update({
+        "min": low,
+        "max": high,
+        "mean": float(values.mean()),
+        "distinct": int(series.drop_nulls().n_unique()),
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()}
+    })
+    return facet
+
+
+def compute_facets(df: pl.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Facette de chaque attribut : top-K pour les catégoriels, histogramme pour les numériques."""
+    facets = {}
+    for column, dtype in df.schema.items():
+        if column == ROW_COLUMN:
+            continue
+        if dtype == pl.Float64:
+            facets[column] = _numeric_facet(df, column)
+        else:
+            facets[column] = _categorical_facet(df, column)
+    return facets
+
+
+def _condition_expr(df: pl.DataFrame, condition: Dict[str, Any]) -> pl.Expr:
+    attribute = condition.get("attribute")
+    op = condition.get("op", "eq")
+    value = condition.get("value")
+
+    if op not in FILTER_OPS:
+        raise ValueError(f"Opérateur inconnu: {op} (disponibles: {', '.join(FILTER_OPS)})")
+    if attribute not in df.columns or attribute == ROW_COLUMN:
+        # Attribut absent de tous les nœuds : seule la condition "missing" est vraie
+        return pl.lit(op == "missing")
+
+    col = pl.col(attribute)
+    numeric = df.schema[attribute] == pl.Float64
+
+    def cast(v):
+        if numeric:
+            try:
+                return float(v)
+            except (TypeError, ValueError):
+                raise ValueError(f"Valeur numérique attendue pour {attribute}: {v!r}")
+        return v if df.schema[attribute] == pl.Boolean else str(v)
+
+    if op == "missing":
+        return col.is_null()
+    if op == "in":
+        if not isinstance(value, list):
+            raise ValueError("L'opérateur 'in' attend une liste de valeurs")
+        return col.is_in([cast(v) for v in value])
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError("L'opérateur 'between' attend [min, max]")
+        return col.is_between(cast(value[0]), cast(value[1]))
+    if op == "contains":
+        return col.cast(pl.String).str.to_lowercase().str.contains(str(value).lower(), literal=True)
+
+    v = cast(value)
+    return {
+        "eq": col == v, "ne": col != v,
+        "gt": col > v, "gte": col >= v,
+        "lt": col < v, "lte": col <= v,
+    }[op]
+
+
+def evaluate_filter(df: pl.DataFrame, conditions: List[Dict[str, Any]], mode: str = "all") -> np.ndarray:
+    """Masque booléen (une valeur par nœud) des conditions combinées en ET ("all") ou OU ("any")."""
+    if mode not in ("all", "any"):
+        raise ValueError("mode doit valoir 'all' ou 'any'")
+    if not conditions:
+        return np.ones(df.height, dtype=bool)
+
+    exprs = [_condition_expr(df, c) for c in conditions]
+    combined = pl.all_horizontal(exprs) if mode == "all" else pl.any_horizontal(exprs)
+    # with_columns diffuse les littéraux (attributs absents) sur toutes les lignes
+    mask = df.with_columns(combined.fill_null(False).alias("__mask__"))["__mask__"]
+    return mask.to_numpy().astype(bool)
+
+
+def pack_bitset(mask: np.ndarray) -> bytes:
+    """Bitset little-endian : le bit i (octet i // 8, bit i % 8) correspond au nœud i."""
+    return np.packbits(mask, bitorder="little").tobytes()
+
+
+class NodeFrame:
+    """Colonnes d'attributs d'un projet, gardées en cache pour l'évaluation des filtres."""
+
+    def __init__(self, df: pl.DataFrame):
+        self.df = df
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.df.estimated_size())
+
+
+async def _load_frame(project_id: str) -> NodeFrame:
+    doc = await Project.get_motor_collection().find_one({"_id": ObjectId(project_id)}, {"graph_data.nodes": 1})
+    nodes = ((doc or {}).get("graph_data") or {}).get("nodes") or []
+    return await asyncio.to_thread(lambda: NodeFrame(nodes_frame(nodes)))
+
+
+frame_cache = ProjectCache(_load_frame, FACET_CACHE_BYTES)
@@ -0,0 +1,115 @@
+"""
+Galerie publique : pagination par curseur et cache Redis des pages.
+
+Les pages sont lues dans l'ordre (created_at, _id) décroissant sur l'index
+composé (is_featured, created_at, _id) : la page suivante reprend après le
+dernier élément de la précédente (keyset), sans `skip`, si bien que le coût
+d'une page ne dépend pas du nombre de projets publiés.
+
+Chaque page est mise en cache quelques secondes sous une clé qui inclut un
+numéro de génération ; publier, retirer, renommer ou supprimer un projet de
+la galerie incrémente ce numéro, ce qui rend toutes les pages en cache
+obsolètes d'un coup (elles expirent ensuite d'elles-mêmes).
+"""
+
+import base64
+import os
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import orjson
+from beanie import PydanticObjectId
+from beanie.operators import Or, And
+
+from core.redis_client import get_redis
+from models.project import Project, ProjectSummary
+
+
+GALLERY_PAGE_TTL = int(os.getenv("GALLERY_PAGE_TTL", "30"))  # secondes
+GALLERY_DEFAULT_LIMIT = 50
+GALLERY_MAX_LIMIT = 100
+GENERATION_KEY = "gallery:generation"
+
+
+def encode_cursor(created_at: datetime, project_id: PydanticObjectId) -> str:
+    raw = f"{created_at.isoformat()}|{project_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, PydanticObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, project_id = raw.split("|")
+        return datetime.fromisoformat(created_at), PydanticObjectId(project_id)
+    except Exception:
+        raise ValueError("Curseur invalide")
+
+
+def _card(p: ProjectSummary) -> Dict[str, Any]:
+    return {
+        "id": str(p.id),
+        "name": p.name,
+        "created_at": p.created_at,
+        "description": p.description,
+        "algorithm": p.algorithm or "auto",
+        "preview_key": p.preview_key,
+        "stats": {
+            "nodes": p.node_count,
+            "edges": p.edge_count
+        }
+    }
+
+
+async def _read_page(cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    query = Project.find(Project.is_featured == True, projection_model=ProjectSummary)
+    if cursor:
+        created_at, project_id = decode_cursor(cursor)
+        query = query.find(Or(
+            Project.created_at < created_at,
+            And(Project.created_at == created_at, Project.id < project_id)
+        ))
+
+    # Un élément de plus que demandé : indique s'il existe une page suivante
+    projects = await query.sort(-Project.created_at, -Project.id).limit(limit + 1).to_list()
+    next_cursor = None
+    if len(projects) > limit:
+        projects = projects[:limit]
+        next_cursor = encode_cursor(projects[-1].created_at, projects[-1].id)
+    return [_card(p) for p in projects], next_cursor
+
+
+async def gallery_page(cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Une page de la galerie (servie depuis Redis si elle y est encore)."""
+    redis = get_redis()
+    key = None
+    if redis:
+        try:
+            generation = await redis.get(GENERATION_KEY) or 0
+            key = f"gallery:page:{generation}:{cursor or '-'}:{limit}"
+            cached = await redis.get(key)
+            if cached:
+                page = orjson.loads(cached)
+                return page["items"], page["next"]
+        except Exception:
+            key = None
+
+    items, next_cursor = await _read_page(cursor, limit)
+    payload = orjson.dumps({"items": items, "next": next_cursor})
+    if key:
+        try:
+            await redis.setex(key, GALLERY_PAGE_TTL, payload)
+        except Exception:
+            pass
+    # Même sérialisation qu'une page lue dans le cache
+    return orjson.loads(payload)["items"], next_cursor
+
+
+async def invalidate_gallery() -> None:
+    """Rend obsolètes toutes les pages en cache (projet publié, retiré, renommé ou supprimé)."""
+    redis = get_redis()
+    if not redis:
+        return
+    try:
+        await redis.incr(GENERATION_KEY)
+    except Exception:
+        pass
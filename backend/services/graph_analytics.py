@@ -0,0 +1,124 @@
+"""
+Métriques analytiques par nœud, calculées avec les routines C d'igraph.
+
+Chaque métrique est optionnelle et produit une colonne typée (une valeur par
+nœud, dans l'ordre de `graph_data["nodes"]`) stockée dans `node_columns` :
+le viewer peut filtrer et colorer sur ces colonnes sans les recalculer.
+
+La betweenness exacte est en O(n·m) : au-delà de BETWEENNESS_EXACT_MAX_NODES
+nœuds, elle est approchée en limitant la longueur des plus courts chemins
+(`cutoff`), ce qui est enregistré dans les paramètres de la colonne.
+"""
+
+import os
+import time
+import igraph as ig
+import numpy as np
+from typing import Dict, Any, List, Tuple, Optional
+
+from services.graph_metrics import GraphArrays
+
+
+BETWEENNESS_EXACT_MAX_NODES = int(os.getenv("ANALYTICS_BETWEENNESS_EXACT_MAX_NODES", "5000"))
+BETWEENNESS_CUTOFF = int(os.getenv("ANALYTICS_BETWEENNESS_CUTOFF", "4"))
+PAGERANK_DAMPING = 0.85
+LEIDEN_ITERATIONS = 2
+
+# Type NumPy (little-endian) de chaque colonne
+METRIC_DTYPES = {
+    "degree": "<i4",
+    "weighted_degree": "<f4",
+    "pagerank": "<f4",
+    "coreness": "<i4",
+    "community": "<i4",
+    "betweenness": "<f4",
+}
+ANALYTICS_METRICS = list(METRIC_DTYPES)
+
+
+def validate_metrics(metrics: Optional[List[str]]) -> List[str]:
+    """Dédoublonne les métriques demandées (ordre conservé) et rejette les inconnues."""
+    requested = list(dict.fromkeys(metrics or []))
+    unknown = [m for m in requested if m not in METRIC_DTYPES]
+    if unknown:
+        raise ValueError(f"Métriques inconnues: {', '.join(unknown)} (disponibles: {', '.join(ANALYTICS_METRICS)})")
+    return requested
+
+
+def metric_params(metric: str, num_nodes: int) -> Dict[str, Any]:
+    """Paramètres effectifs d'une métrique pour un graphe de cette taille (clé de cache)."""
+    if metric == "pagerank":
+        return {"damping": PAGERANK_DAMPING}
+    if metric == "community":
+        return {"method": "leiden", "objective": "modularity", "iterations": LEIDEN_ITERATIONS}
+    if metric == "betweenness" and num_nodes > BETWEENNESS_EXACT_MAX_NODES:
+        return {"cutoff": BETWEENNESS_CUTOFF}
+    return {}
+
+
+def build_igraph(arrays: GraphArrays) -> ig.Graph:
+    """
+    Graphe igraph non orienté portant des poids utilisables par les
+    centralités (finis et positifs, 1.0 sinon).
+    """
+    weights = np.where(np.isfinite(arrays.weights) & (arrays.weights > 0), arrays.weights, 1.0)
+    graph = ig.Graph(n=len(arrays.node_keys), edges=arrays.edges.tolist(), directed=False)
+    graph.es["weight"] = weights.tolist()
+    return graph
+
+
+def relabel_by_size(membership: List[int]) -> np.ndarray:
+    """Renumérote les communautés par taille décroissante (0 = la plus grande)."""
+    labels = np.asarray(membership, dtype=np.int64)
+    if len(labels) == 0:
+        return labels
+    sizes = np.bincount(labels)
+    order = np.argsort(-sizes, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[labels]
+
+
+def _compute(graph: ig.Graph, metric: str, params: Dict[str, Any]) -> np.ndarray:
+    if metric == "degree":
+        return np.asarray(graph.degree())
+    if metric == "weighted_degree":
+        return np.asarray(graph.strength(weights="weight"))
+    if metric == "pagerank":
+        return np.asarray(graph.pagerank(weights="weight", damping=params["damping"]))
+    if metric == "coreness":
+        return np.asarray(graph.coreness())
+    if metric == "community":
+        clustering = graph.community_leiden(
+            objective_function=params["objective"],
+            weights="weight",
+            n_iterations=params["iterations"]
+        )
+        return relabel_by_size(clustering.membership)
+    if metric == "betweenness":
+        # Non pondérée : les poids du fichier sont des intensités, pas des distances
+        return np.asarray(graph.betweenness(directed=False, cutoff=params.get("cutoff")))
+    raise ValueError(f"Métrique inconnue: {metric}")
+
+
+def summarize_column(metric: str, values: np.ndarray) -> Dict[str, Any]:
+    """Résumé d'une colonne, affiché par le panneau de filtres."""
+    if len(values) == 0:
+        return {}
+    if metric == "community":
+        return {"count": int(values.max()) + 1}
+    return {"min": float(values.min()), "max": float(values.max()), "mean": float(values.mean())}
+
+
+def compute_node_metric(graph: ig.Graph, metric: str) -> Tuple[np.ndarray, Dict[str, Any], float]:
+    """
+    Calcule une métrique sur le graphe igraph.
+
+    Returns:
+        (valeurs typées selon METRIC_DTYPES, paramètres effectifs, durée en secondes)
+    """
+    params = metric_params(metric, graph.vcount())
+    start = time.perf_counter()
+    values = _compute(graph, metric, params)
+    seconds = time.perf_counter() - start
+    return values.astype(METRIC_DTYPES[metric]), params, seconds
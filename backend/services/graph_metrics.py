@@ -0,0 +1,214 @@
+"""
+Métriques de synthèse des graphes, calculées en une passe sur des tableaux.
+
+Remplace les passes NetworkX en pur Python (`nx.density`, `nx.is_connected`,
+`sum(dict(G.degree()).values())`) : le graphe est réduit une seule fois à un
+tableau (m, 2) d'indices de nœuds et un tableau de poids, puis toutes les
+métriques sont obtenues par des opérations NumPy/SciPy vectorisées.
+"""
+
+import numpy as np
+import networkx as nx
+from typing import Dict, Any, List, NamedTuple, Optional
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+TOP_COMPONENT_SIZES = 20
+WEIGHT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class GraphArrays(NamedTuple):
+    """Représentation tabulaire d'un graphe : l'indice i correspond à node_keys[i]."""
+    node_keys: List[Any]
+    edges: np.ndarray  # (m, 2) int64
+    weights: np.ndarray  # (m,) float64
+    rows: Optional[np.ndarray] = None  # Indice de chaque arête dans graph_data["edges"] (graph_data_arrays)
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 1.0
+
+
+def graph_arrays(G: nx.Graph) -> GraphArrays:
+    """Extrait les tableaux d'arêtes et de poids d'un graphe NetworkX (une passe sur les arêtes)."""
+    node_keys = list(G.nodes())
+    index = {key: i for i, key in enumerate(node_keys)}
+    num_edges = G.number_of_edges()
+
+    edges = np.fromiter(
+        (index[endpoint] for edge in G.edges() for endpoint in edge),
+        dtype=np.int64, count=2 * num_edges
+    ).reshape(-1, 2)
+    weights = np.fromiter(
+        (_as_float(w) for _, _, w in G.edges(data="weight", default=1.0)),
+        dtype=np.float64, count=num_edges
+    )
+    return GraphArrays(node_keys, edges, weights)
+
+
+def degree_array(num_nodes: int, edges: np.ndarray) -> np.ndarray:
+    """Degré total de chaque nœud (une boucle compte deux fois, comme NetworkX)."""
+    if len(edges) == 0:
+        return np.zeros(num_nodes, dtype=np.int64)
+    return np.bincount(edges.ravel(), minlength=num_nodes)
+
+
+def component_labels(num_nodes: int, edges: np.ndarray) -> np.ndarray:
+    """Étiquette de composante (faiblement) connexe de chaque nœud."""
+    if len(edges) == 0:
+        return np.arange(num_nodes)
+    adjacency = coo_matrix(
+        (np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])),
+        shape=(num_nodes, num_nodes)
+    )
+    return connected_components(adjacency, directed=True, connection="weak")[1]
+
+
+def _log2_histogram(values: np.ndarray) -> Dict[str, List[int]]:
+    """Histogramme par puissances de 2 : [0], [1], [2-3], [4-7], ..."""
+    if len(values) == 0:
+        return {"bins": [], "counts": []}
+    buckets = np.zeros(len(values), dtype=np.int64)
+    positive = values > 0
+    buckets[positive] = np.floor(np.log2(values[positive])).astype(np.int64) + 1
+    counts = np.bincount(buckets)
+    bins = [0] + [2 ** (b - 1) for b in range(1, len(counts))]
+    return {"bins": bins, "counts": counts.tolist()}
+
+
+def _weight_summary(weights: np.ndarray) -> Optional[Dict[str, Any]]:
+    finite = weights[np.isfinite(weights)]
+    if len(finite) == 0:
+        return None
+    quantiles = np.quantile(finite, WEIGHT_QUANTILES)
+    return {
+        "min": float(finite.min()),
+        "max": float(finite.max()),
+        "mean": float(finite.mean()),
+        "std": float(finite.std()),
+        **{f"p{int(q * 100)}": float(v) for q, v in zip(WEIGHT_QUANTILES, quantiles)},
+    }
+
+
+def compute_graph_metrics(
+    num_nodes: int,
+    edges: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    directed: bool = False,
+    input_edge_rows: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Calcule les métriques de synthèse d'un graphe à partir de tableaux.
+
+    Args:
+        num_nodes: Nombre de nœuds (indices 0..n-1)
+        edges: Tableau (m, 2) des arêtes, doublons et boucles éventuels compris
+        weights: Poids des arêtes (m,), optionnel
+        directed: Graphe orienté (densité et doublons calculés en conséquence)
+        input_edge_rows: Si fourni, `edges` est supposé déjà dédoublonné (graphe
+            NetworkX) et le nombre de doublons est déduit des lignes d'entrée
+
+    Returns:
+        Métriques compatibles avec `project.metadata` (node_count, edge_count,
+        density, is_connected, avg_degree) complétées des composantes, de
+        l'histogramme des degrés, des boucles, doublons et poids.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    num_rows = len(edges)
+
+    self_loop_mask = edges[:, 0] == edges[:, 1]
+    self_loops = int(self_loop_mask.sum())
+
+    if input_edge_rows is not None:
+        unique_edges = edges
+        duplicate_edges = max(int(input_edge_rows) - num_rows, 0)
+    elif num_rows:
+        # Paire canonique (min, max) pour les graphes non orientés, codée sur un entier
+        pairs = edges if directed else np.sort(edges, axis=1)
+        keys = np.unique(pairs[:, 0] * max(num_nodes, 1) + pairs[:, 1])
+        unique_edges = np.column_stack([keys // max(num_nodes, 1), keys % max(num_nodes, 1)])
+        duplicate_edges = num_rows - len(keys)
+    else:
+        unique_edges = edges
+        duplicate_edges = 0
+
+    edge_count = len(unique_edges)
+    degrees = degree_array(num_nodes, unique_edges)
+    mean_degree = float(degrees.mean()) if num_nodes else 0.0
+
+    if num_nodes > 1:
+        possible = num_nodes * (num_nodes - 1) if directed else num_nodes * (num_nodes - 1) / 2
+        density = edge_count / possible
+    else:
+        density = 0.0
+
+    if num_nodes:
+        component_sizes = np.sort(np.bincount(component_labels(num_nodes, unique_edges)))[::-1]
+    else:
+        component_sizes = np.zeros(0, dtype=np.int64)
+
+    return {
+        "node_count": int(num_nodes),
+        "edge_count": int(edge_count),
+        "density": float(density),
+        "is_connected": bool(len(component_sizes) == 1),
+        "avg_degree": mean_degree,
+        "max_degree": int(degrees.max()) if num_nodes else 0,
+        "degree_cv": float(degrees.std() / mean_degree) if mean_degree > 0 else 0.0,
+        "degree_histogram": _log2_histogram(degrees),
+        "isolated_nodes": int((degrees == 0).sum()),
+        "component_count": int(len(component_sizes)),
+        "largest_component_size": int(component_sizes[0]) if len(component_sizes) else 0,
+        "component_sizes": component_sizes[:TOP_COMPONENT_SIZES].tolist(),
+        "self_loops": self_loops,
+        "duplicate_edges": int(duplicate_edges),
+        "weights": _weight_summary(np.asarray(weights, dtype=np.float64)) if weights is not None and len(weights) else None,
+    }
+
+
+def compute_nx_metrics(G: nx.Graph, arrays: Optional[GraphArrays] = None, input_edge_rows: Optional[int] = None) -> Dict[str, Any]:
+    """Métriques d'un graphe NetworkX (les tableaux peuvent être réutilisés pour le layout)."""
+    arrays = arrays or graph_arrays(G)
+    return compute_graph_metrics(
+        len(arrays.node_keys), arrays.edges, arrays.weights,
+        directed=G.is_directed(), input_edge_rows=input_edge_rows
+    )
+
+
+def factorize_edge_columns(sources, targets):
+    """
+    Convertit deux colonnes d'identifiants (quelconques) en indices de nœuds.
+
+    Returns:
+        (nombre de nœuds, arêtes (m, 2) int64)
+    """
+    sources = np.asarray(sources).astype(str)
+    targets = np.asarray(targets).astype(str)
+    labels, codes = np.unique(np.concatenate([sources, targets]), return_inverse=True)
+    return len(labels), codes.reshape(2, -1).T.astype(np.int64)
+
+
+def graph_data_arrays(graph_data: Dict[str, Any]) -> GraphArrays:
+    """
+    Tableaux d'un graphe déjà sérialisé (`project.graph_data`), dans l'ordre
+    de ses nœuds : les colonnes calculées restent alignées sur graph_data["nodes"].
+    """
+    nodes = graph_data.get("nodes") or []
+    links = graph_data.get("edges") or graph_data.get("links") or []
+    node_keys = [node.get("id") for node in nodes]
+    index = {key: i for i, key in enumerate(node_keys)}
+
+    pairs = [
+        (row, index.get(link.get("source")), index.get(link.get("target")), link.get("weight", 1.0))
+        for row, link in enumerate(links)
+    ]
+    pairs = [p for p in pairs if p[1] is not None and p[2] is not None]
+
+    edges = np.array([(u, v) for _, u, v, _ in pairs], dtype=np.int64).reshape(-1, 2)
+    weights = np.fromiter((_as_float(w) for *_, w in pairs), dtype=np.float64, count=len(pairs))
+    rows = np.fromiter((row for row, *_ in pairs), dtype=np.int64, count=len(pairs))
+    return GraphArrays(node_keys, edges, weights, rows)
@@ -6,10 +6,17 @@ import polars as pl
 import orjson
 import networkx as nx
 import igraph as ig
+import numpy as np
 from typing import Dict, Any, List
 from pathlib import Path
 import asyncio
 
+from loguru import logger
+
+from core.metrics import LAYOUT_FALLBACKS
+from services.layout_selection import compute_structural_features, select_algorithm
+from services.graph_metrics import GraphArrays, graph_arrays, compute_nx_metrics, compute_graph_metrics, factorize_edge_columns
+
 def _read_csv_safe(file_path: Path, n_rows: int = None) -> pl.DataFrame:
     """Tente de lire un CSV avec plusieurs encodages et séparateurs."""
     encodings = ['utf8', 'latin1', 'cp1252', 'iso-8859-1']
@@ -172,12 +179,7 @@ async def analyze_file_structure(file_path: Path) -> Dict[str, Any]:
                         "target": "target",
                         "format": "gexf_standard"
                     },
-                    "stats": {
-                        "node_count": G.number_of_nodes(),
-                        "edge_count": G.number_of_edges(),
-                        "density": round(nx.density(G), 4),
-                        "is_connected": nx.is_connected(G) if G.number_of_nodes() > 0 else False
-                    }
+                    "stats": _summarize_stats(compute_nx_metrics(G))
                 }
             except Exception as e:
                 raise ValueError(f"Erreur lecture GEXF: {str(e)}")
@@ -189,17 +191,26 @@ async def analyze_file_structure(file_path: Path) -> Dict[str, Any]:
     except Exception as e:
         raise ValueError(f"Erreur lors de l'analyse: {str(e)}")
 
+def _summarize_stats(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Sous-ensemble des métriques affiché lors de l'analyse d'un fichier."""
+    return {
+        "node_count": metrics["node_count"],
+        "edge_count": metrics["edge_count"],
+        "density": round(metrics["density"], 4),
+        "is_connected": metrics["is_connected"],
+        "component_count": metrics["component_count"],
+        "self_loops": metrics["self_loops"],
+        "duplicate_edges": metrics["duplicate_edges"]
+    }
+
 def _calculate_graph_stats(df: pl.DataFrame, src_col: str, tgt_col: str) -> Dict[str, Any]:
-    """Crée un graphe temporaire NetworkX pour calculer des stats."""
+    """Calcule les stats de l'échantillon directement sur les colonnes, sans construire de graphe."""
     try:
-        edges = df.select([src_col, tgt_col]).to_numpy()
-        G = nx.from_edgelist(edges)
+        sample = df.select([src_col, tgt_col]).drop_nulls()
+        num_nodes, edges = factorize_edge_columns(sample[src_col].to_numpy(), sample[tgt_col].to_numpy())
         
         return {
-            "node_count": G.number_of_nodes(),
-            "edge_count": G.number_of_edges(),
-            "density": round(nx.density(G), 4),
-            "is_connected": nx.is_connected(G) if G.number_of_nodes() > 0 else False,
+            **_summarize_stats(compute_graph_metrics(num_nodes, edges)),
             "sample_size": len(df)
         }
     except Exception:
@@ -304,17 +315,18 @@ def _process_csv_graph(file_path: Path, mapping: Dict[str, str], algorithm: str
             edge_attrs = {k: v for k, v in row.items() if k not in [src_col, tgt_col, weight_col]}
             G.add_edge(source, target, weight=weight, **edge_attrs)
     
+    arrays = graph_arrays(G)
     metadata = {
-        "node_count": G.number_of_nodes(),
-        "edge_count": G.number_of_edges(),
-        "density": nx.density(G),
-        "is_connected": nx.is_connected(G),
-        "avg_degree": sum(dict(G.degree()).values()) / G.number_of_nodes() if G.number_of_nodes() > 0 else 0,
+        **compute_nx_metrics(G, arrays),
         "columns": df.columns
     }
     
     # Calcul du layout 3D
-    resolved_algorithm = apply_layout(G, algorithm=algorithm)
+    resolved_algorithm = apply_layout(G, algorithm=algorithm, arrays=arrays, metrics=metadata)
+    if "layout_selection" in G.graph:
+        metadata["layout_selection"] = G.graph["layout_selection"]
+    if "layout_fallback" in G.graph:
+        metadata["layout_fallback"] = G.graph["layout_fallback"]
     
     # Explicitly use 'links' to preserve compatibility with existing frontend logic
     graph_data = nx.node_link_data(G, edges="links")
@@ -371,17 +383,18 @@ def _process_json_graph(file_path: Path, mapping: Dict[str, str], algorithm: str
         
         edge_keys = list(edges[0].keys()) if edges and len(edges) > 0 else []
 
+        arrays = graph_arrays(G)
         metadata = {
-            "node_count": G.number_of_nodes(),
-            "edge_count": G.number_of_edges(),
-            "density": nx.density(G),
-            "is_connected": nx.is_connected(G) if G.number_of_nodes() > 0 else False,
-            "avg_degree": sum(dict(G.degree()).values()) / G.number_of_nodes() if G.number_of_nodes() > 0 else 0,
+            **compute_nx_metrics(G, arrays),
             "columns": edge_keys
         }
         
         # Calcul du layout 3D
-        resolved_algorithm = apply_layout(G, algorithm=algorithm)
+        resolved_algorithm = apply_layout(G, algorithm=algorithm, arrays=arrays, metrics=metadata)
+        if "layout_selection" in G.graph:
+            metadata["layout_selection"] = G.graph["layout_selection"]
+        if "layout_fallback" in G.graph:
+            metadata["layout_fallback"] = G.graph["layout_fallback"]
         
         graph_data = nx.node_link_data(G, edges="links")
         
@@ -423,17 +436,18 @@ def _process_csv_graph_from_list(data: List[Dict], mapping: Dict[str, str], algo
     
     edge_keys = list(data[0].keys()) if data and len(data) > 0 else []
 
+    arrays = graph_arrays(G)
     metadata = {
-        "node_count": G.number_of_nodes(),
-        "edge_count": G.number_of_edges(),
-        "density": nx.density(G),
-        "is_connected": nx.is_connected(G) if G.number_of_nodes() > 0 else False,
-        "avg_degree": sum(dict(G.degree()).values()) / G.number_of_nodes() if G.number_of_nodes() > 0 else 0,
+        **compute_nx_metrics(G, arrays),
         "columns": edge_keys
     }
     
     # Calcul du layout 3D
-    resolved_algorithm = apply_layout(G, algorithm=algorithm)
+    resolved_algorithm = apply_layout(G, algorithm=algorithm, arrays=arrays, metrics=metadata)
+    if "layout_selection" in G.graph:
+        metadata["layout_selection"] = G.graph["layout_selection"]
+    if "layout_fallback" in G.graph:
+        metadata["layout_fallback"] = G.graph["layout_fallback"]
     
     graph_data = nx.node_link_data(G)
     
@@ -475,17 +489,18 @@ def _process_gexf_graph(file_path: Path, mapping: Dict[str, str], algorithm: str
             if isinstance(v, (set, tuple)):
                 data[k] = list(v)
                 
+    arrays = graph_arrays(G)
     metadata = {
-        "node_count": G.number_of_nodes(),
-        "edge_count": G.number_of_edges(),
-        "density": nx.density(G),
-        "is_connected": nx.is_connected(G) if G.number_of_nodes() > 0 else False,
-        "avg_degree": sum(dict(G.degree()).values()) / G.number_of_nodes() if G.number_of_nodes() > 0 else 0,
+        **compute_nx_metrics(G, arrays),
         "columns": []
     }
     
     # Calcul du layout 3D
-    resolved_algorithm = apply_layout(G, algorithm=algorithm)
+    resolved_algorithm = apply_layout(G, algorithm=algorithm, arrays=arrays, metrics=metadata)
+    if "layout_selection" in G.graph:
+        metadata["layout_selection"] = G.graph["layout_selection"]
+    if "layout_fallback" in G.graph:
+        metadata["layout_fallback"] = G.graph["layout_fallback"]
     
     graph_data = nx.node_link_data(G, edges="links")
     
@@ -497,85 +512,35 @@ def _process_gexf_graph(file_path: Path, mapping: Dict[str, str], algorithm: str
         "algorithm_used": resolved_algorithm
     }
 
-def apply_layout(G: nx.Graph, algorithm: str = "auto", scale: float = 50.0):
+def apply_layout(G: nx.Graph, algorithm: str = "auto", scale: float = 50.0, time_budget: float = None, arrays: GraphArrays = None, metrics: dict = None):
     """
     Applique un algorithme de spatialisation au graphe en utilisant igraph pour la performance et la 3D native.
     Modifie le graphe en place en ajoutant les attributs x, y, z aux nœuds.
+
+    En mode "auto", l'algorithme est choisi par le modèle de coût (voir layout_selection)
+    dans la limite de `time_budget` secondes ; la prédiction est conservée dans
+    `G.graph["layout_selection"]`. Un layout en échec est remplacé par un
+    placement aléatoire, consigné dans `G.graph["layout_fallback"]`. `arrays` et `metrics` (compute_graph_metrics)
+    évitent de réextraire les arêtes et de recalculer degrés et composantes
+    s'ils l'ont déjà été pour les métadonnées.
     """
     if G.number_of_nodes() == 0:
         return
 
     # Conversion NetworkX -> iGraph pour la performance
     # On map les IDs de noeuds vers des indices entiers pour igraph
-    node_keys = list(G.nodes())
-    node_map = {k: i for i, k in enumerate(node_keys)}
-    
-    # Ensure weights are floats for layout algorithms
-    cleaned_edges = []
-    weights = []
-    for u, v, d in G.edges(data=True):
-        w = d.get('weight', 1.0)
-        try:
-            w = float(w)
-        except (ValueError, TypeError):
-            w = 1.0
-        cleaned_edges.append((node_map[u], node_map[v]))
-        weights.append(w)
+    arrays = arrays or graph_arrays(G)
+    node_keys = arrays.node_keys
 
     ig_graph = ig.Graph(len(node_keys))
-    ig_graph.add_edges(cleaned_edges)
-    ig_graph.es['weight'] = weights
+    ig_graph.add_edges(arrays.edges.tolist())
+    ig_graph.es['weight'] = arrays.weights.tolist()
     
-    # Auto-sélection de l'algorithme basée sur plusieurs critères
+    # Auto-sélection par modèle de coût : caractéristiques calculées une seule fois sur les tableaux
     if algorithm == "auto":
-        num_nodes = G.number_of_nodes()
-        num_edges = G.number_of_edges()
-        
-        # Calcul de la densité du graphe
-        density = nx.density(G) if num_nodes > 0 else 0
-        
-        # Critère 1: Taille (prioritaire pour performance)
-        if num_nodes > 5000:
-            # Très grand graphe : DrL obligatoire
-            algorithm = "drl"
-        elif num_nodes > 2000:
-            # Grand graphe : DrL sauf si très sparse
-            if density < 0.01:  # Graphe très peu dense
-                algorithm = "sphere"  # Sphérique pour visualisation globale
-            else:
-                algorithm = "drl"
-        else:
-            # Graphes moyens/petits : critères avancés
-            
-            # Critère 2: Densité
-            if density > 0.3:
-                # Graphe dense : Kamada-Kawai préserve mieux la structure
-                algorithm = "kamada_kawai"
-            elif density < 0.05:
-                # Graphe très sparse : pas de structure forte
-                if num_nodes < 500:
-                    algorithm = "sphere"  # Visualisation globale
-                else:
-                    algorithm = "fruchterman_reingold"
-            else:
-                # Densité moyenne : vérifier la modularité
-                try:
-                    # Détection rapide de communautés pour évaluer la structure
-                    ig_test = ig.Graph(num_nodes)
-                    ig_test.add_edges([(node_map[u], node_map[v]) for u, v in G.edges()])
-                    communities = ig_test.community_multilevel()
-                    modularity = communities.modularity
-                    
-                    # Critère 3: Modularité (structure communautaire)
-                    if modularity > 0.4 and len(set(communities.membership)) > 3:
-                        # Structure communautaire forte : Force Atlas
-                        algorithm = "force_atlas"
-                    else:
-                        # Pas de communautés claires : Fruchterman-Reingold
-                        algorithm = "fruchterman_reingold"
-                except:
-                    # Fallback si détection échoue
-                    algorithm = "fruchterman_reingold"
+        features = compute_structural_features(len(node_keys), arrays.edges, metrics)
+        algorithm, prediction = select_algorithm(features, time_budget=time_budget)
+        G.graph["layout_selection"] = prediction
 
     layout = None
     
@@ -590,7 +555,6 @@ def apply_layout(G: nx.Graph, algorithm: str = "auto", scale: float = 50.0):
         elif algorithm == "force_atlas":
             # Force Atlas 2 avec extension 3D
             from fa2_modified import ForceAtlas2
-            import numpy as np
             
             # Initialiser Force Atlas 2
             forceatlas2 = ForceAtlas2(
@@ -609,6 +573,7 @@ def apply_layout(G: nx.Graph, algorithm: str = "auto", scale: float = 50.0):
             
             # Calculer le layout 2D (forceatlas2 retourne un dict {node_id: (x, y)})
             pos_2d = forceatlas2.forceatlas2_networkx_layout(G, pos=None, iterations=2000)
+            pos_2d = [pos_2d[node_id] for node_id in node_keys]
             
             # Étendre à 3D en utilisant la détection de communautés pour l'axe Z
             try:
@@ -671,8 +636,10 @@ def apply_layout(G: nx.Graph, algorithm: str = "auto", scale: float = 50.0):
             G.nodes[node_id]['z'] = float(norm_z * scale * 2)
             
     except Exception as e:
-        print(f"Erreur layout igraph {algorithm}: {e}. Fallback to NetworkX random.")
-        # Fallback ultime si igraph échoue
+        # Fallback ultime si igraph échoue : signalé dans les logs, les métriques et les métadonnées du job
+        logger.warning(f"Échec du layout {algorithm} ({G.number_of_nodes()} nœuds) : {type(e).__name__}: {e}. Placement aléatoire utilisé.")
+        LAYOUT_FALLBACKS.labels(algorithm=algorithm).inc()
+        G.graph["layout_fallback"] = {"requested": algorithm, "error": f"{type(e).__name__}: {e}"}
         pos = nx.random_layout(G, dim=3)
         for node_id, (x, y, z) in pos.items():
             G.nodes[node_id]['x'] = float(x) * scale
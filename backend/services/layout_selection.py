@@ -0,0 +1,265 @@
+"""
+Sélection automatique de l'algorithme de layout par modèle de coût.
+
+Les caractéristiques structurelles du graphe sont calculées une seule fois
+à partir des tableaux d'arêtes (NumPy/SciPy). Le temps et la mémoire de
+chaque algorithme sont prédits à partir d'une table de calibration produite
+par le banc de mesure, puis on retient l'algorithme de meilleure qualité
+qui tient dans le budget du job.
+"""
+
+import os
+import math
+import orjson
+import numpy as np
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.graph_metrics import degree_array, component_labels
+
+
+CALIBRATION_PATH = Path(__file__).with_name("layout_calibration.json")
+
+DEFAULT_TIME_BUDGET_SECONDS = float(os.getenv("LAYOUT_TIME_BUDGET_SECONDS", "120"))
+DEFAULT_MEMORY_BUDGET_MB = float(os.getenv("LAYOUT_MEMORY_BUDGET_MB", "2048"))
+
+# Qualité visuelle relative, du plus lisible au moins structuré
+ALGORITHM_QUALITY = {
+    "kamada_kawai": 0.90,
+    "force_atlas": 0.85,
+    "fruchterman_reingold": 0.80,
+    "drl": 0.60,
+    "sphere": 0.30,
+    "grid": 0.20,
+    "random": 0.10,
+}
+
+# Plancher des grands graphes : DrL est retenu (même hors budget de temps) plutôt
+# qu'un placement géométrique, tant que sa mémoire prédite tient dans le budget
+FLOOR_ALGORITHM = "drl"
+GEOMETRIC_ALGORITHMS = {"sphere", "grid", "random"}
+
+
+FEATURE_KEYS = ("node_count", "edge_count", "density", "avg_degree", "max_degree", "degree_cv", "component_count")
+
+
+def compute_structural_features(
+    num_nodes: int,
+    edges: np.ndarray,
+    metrics: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Calcule les caractéristiques structurelles à partir d'un tableau (m, 2)
+    d'indices de nœuds. Toutes les opérations sont vectorisées.
+    `metrics` (résultat de compute_graph_metrics) évite de recalculer degrés
+    et composantes connexes lorsqu'ils l'ont déjà été pour les métadonnées.
+    """
+    if metrics and all(key in metrics for key in FEATURE_KEYS):
+        return {key: metrics[key] for key in FEATURE_KEYS}
+
+    num_edges = int(len(edges))
+    features = {
+        "node_count": int(num_nodes),
+        "edge_count": num_edges,
+        "density": 0.0,
+        "avg_degree": 0.0,
+        "max_degree": 0,
+        "degree_cv": 0.0,
+        "component_count": int(num_nodes),
+    }
+    if num_nodes == 0:
+        return features
+
+    degrees = degree_array(num_nodes, edges)
+    mean_degree = float(degrees.mean())
+
+    features["density"] = 2.0 * num_edges / (num_nodes * (num_nodes - 1)) if num_nodes > 1 else 0.0
+    features["avg_degree"] = mean_degree
+    features["max_degree"] = int(degrees.max())
+    features["degree_cv"] = float(degrees.std() / mean_degree) if mean_degree > 0 else 0.0
+    features["component_count"] = int(component_labels(num_nodes, edges).max()) + 1
+
+    return features
+
+
+@lru_cache(maxsize=4)
+def load_calibration(path: Path = CALIBRATION_PATH) -> Dict[str, Any]:
+    """Charge la table de calibration (coefficients de temps et de mémoire par algorithme)."""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def predict_cost(algorithm: str, features: Dict[str, Any], calibration: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Prédit le temps (s) et la mémoire (Mo) d'un algorithme.
+
+    Temps : log(t) = a + b.log(n) + c.log(m + 1)
+    Mémoire : mem = m0 + m1.n + m2.m + m3.n²
+    """
+    model = calibration["algorithms"][algorithm]
+    n = max(features["node_count"], 1)
+    m = features["edge_count"]
+
+    a, b, c = model["time"]
+    seconds = math.exp(a + b * math.log(n) + c * math.log(m + 1))
+
+    m0, m1, m2, m3 = model["memory"]
+    memory_mb = m0 + m1 * n + m2 * m + m3 * n * n
+
+    return {"seconds": round(seconds, 4), "memory_mb": round(memory_mb, 2)}
+
+
+def in_calibrated_range(algorithm: str, node_count: int, calibration: Dict[str, Any]) -> bool:
+    """Le graphe reste-t-il dans la plage mesurée de l'algorithme ? (au-delà, le modèle extrapole)"""
+    max_nodes = calibration["algorithms"][algorithm].get("max_nodes")
+    return max_nodes is None or node_count <= max_nodes
+
+
+def fits_budget(
+    algorithm: str,
+    node_count: int,
+    edge_count: int,
+    time_budget: Optional[float] = None,
+    memory_budget_mb: Optional[float] = None
+) -> bool:
+    """
+    Le coût prédit de l'algorithme tient-il dans le budget ? (vrai pour un
+    algorithme non calibré, faux au-delà de sa plage calibrée `max_nodes`)
+    """
+    calibration = load_calibration()
+    if algorithm not in calibration["algorithms"]:
+        return True
+    if not in_calibrated_range(algorithm, node_count, calibration):
+        return False
+    cost = predict_cost(algorithm, {"node_count": node_count, "edge_count": edge_count}, calibration)
+    time_budget = time_budget if time_budget is not None else DEFAULT_TIME_BUDGET_SECONDS
+    memory_budget_mb = memory_budget_mb if memory_budget_mb is not None else DEFAULT_MEMORY_BUDGET_MB
+    return cost["seconds"] <= time_budget and cost["memory_mb"] <= memory_budget_mb
+
+
+def _quality(algorithm: str, features: Dict[str, Any]) -> float:
+    """Qualité attendue, ajustée par la structure du graphe."""
+    quality = ALGORITHM_QUALITY[algorithm]
+    # Kamada-Kawai repose sur les distances : peu adapté aux graphes morcelés
+    if algorithm == "kamada_kawai" and features["component_count"] > 1:
+        quality -= 0.4
+    # Force Atlas fait mieux ressortir les hubs des graphes à degrés hétérogènes
+    if algorithm == "force_atlas" and features["degree_cv"] > 1.0:
+        quality += 0.1
+    return quality
+
+
+def select_algorithm(
+    features: Dict[str, Any],
+    time_budget: Optional[float] = None,
+    memory_budget_mb: Optional[float] = None,
+    calibration: Optional[Dict[str, Any]] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Choisit l'algorithme de meilleure qualité dont le coût prédit tient dans
+    le budget. Les algorithmes dont la plage calibrée (`max_nodes`) est
+    dépassée sont écartés : leur coût ne serait qu'extrapolé. Les placements
+    géométriques ne remplacent DrL que si sa mémoire prédite dépasse le
+    budget ; si rien ne tient, retient le moins coûteux.
+
+    Returns:
+        (algorithme, prédiction) — la prédiction est destinée aux métadonnées du projet.
+    """
+    calibration = calibration or load_calibration()
+    time_budget = time_budget if time_budget is not None else DEFAULT_TIME_BUDGET_SECONDS
+    memory_budget_mb = memory_budget_mb if memory_budget_mb is not None else DEFAULT_MEMORY_BUDGET_MB
+
+    calibrated = [algorithm for algorithm in ALGORITHM_QUALITY if algorithm in calibration["algorithms"]]
+    in_range = [
+        algorithm for algorithm in calibrated
+        if in_calibrated_range(algorithm, features["node_count"], calibration)
+    ]
+    # Graphe plus grand que toutes les mesures : extrapolation inévitable
+    predictions = {
+        algorithm: predict_cost(algorithm, features, calibration)
+        for algorithm in (in_range or calibrated)
+    }
+
+    fitting = [
+        algorithm for algorithm, cost in predictions.items()
+        if cost["seconds"] <= time_budget and cost["memory_mb"] <= memory_budget_mb
+    ]
+    floor = predictions.get(FLOOR_ALGORITHM)
+    if floor and floor["memory_mb"] <= memory_budget_mb:
+        fitting = [algorithm for algorithm in fitting if algorithm not in GEOMETRIC_ALGORITHMS] or [FLOOR_ALGORITHM]
+
+    if fitting:
+        chosen = max(fitting, key=lambda algorithm: _quality(algorithm, features))
+    else:
+        chosen = min(predictions, key=lambda algorithm: predictions[algorithm]["seconds"])
+
+    return chosen, {
+        "algorithm": chosen,
+        "predicted_seconds": predictions[chosen]["seconds"],
+        "predicted_memory_mb": predictions[chosen]["memory_mb"],
+        "time_budget_seconds": time_budget,
+        "memory_budget_mb": memory_budget_mb,
+        "within_budget": (
+            predictions[chosen]["seconds"] <= time_budget and predictions[chosen]["memory_mb"] <= memory_budget_mb
+        ),
+        "calibration": calibration.get("version"),
+        "features": features,
+    }
+
+
+def resolve_auto_algorithm(metadata: Optional[Dict[str, Any]], node_count: int = 0, edge_count: int = 0) -> str:
+    """
+    Algorithme que retient le mode "auto", d'après les métriques déjà
+    enregistrées d'un projet (sans relire le graphe). Les caractéristiques
+    absentes des anciens projets prennent une valeur neutre.
+    """
+    features = {
+        "node_count": node_count,
+        "edge_count": edge_count,
+        "density": 0.0,
+        "avg_degree": 0.0,
+        "max_degree": 0,
+        "degree_cv": 0.0,
+        "component_count": 1,
+    }
+    features.update({key: metadata[key] for key in FEATURE_KEYS if metadata and metadata.get(key) is not None})
+    return select_algorithm(features)[0]
+
+
+def fit_calibration(records: List[Dict[str, Any]], version: str = "custom") -> Dict[str, Any]:
+    """
+    Ajuste la table de calibration à partir de mesures du banc de test.
+
+    Chaque mesure contient : algorithm, nodes, edges, seconds, peak_rss_mb.
+    Temps ajusté en log-log (moindres carrés, exposants b et c contraints
+    positifs : le coût ne décroît jamais avec la taille), mémoire en moindres
+    carrés positifs sur (1, n, m, n²).
+    """
+    from scipy.optimize import lsq_linear, nnls
+
+    by_algorithm: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_algorithm.setdefault(record["algorithm"], []).append(record)
+
+    algorithms = {}
+    for algorithm, rows in by_algorithm.items():
+        n = np.array([max(r["nodes"], 1) for r in rows], dtype=float)
+        m = np.array([r["edges"] for r in rows], dtype=float)
+        seconds = np.array([max(r["seconds"], 1e-4) for r in rows], dtype=float)
+        memory = np.array([max(r.get("peak_rss_mb", 0.0), 0.0) for r in rows], dtype=float)
+
+        X_time = np.column_stack([np.ones_like(n), np.log(n), np.log(m + 1)])
+        time_coefs = lsq_linear(X_time, np.log(seconds), bounds=([-np.inf, 0.0, 0.0], np.inf)).x
+
+        X_mem = np.column_stack([np.ones_like(n), n, m, n * n])
+        mem_coefs, _ = nnls(X_mem, memory)
+
+        algorithms[algorithm] = {
+            "time": [round(float(c), 6) for c in time_coefs],
+            "memory": [float(f"{c:.6g}") for c in mem_coefs],
+            "samples": len(rows),
+            "max_nodes": int(n.max()),
+        }
+
+    return {"version": version, "algorithms": algorithms}
@@ -0,0 +1,213 @@
+"""
+Service de gestion des variantes de layout.
+
+Chaque variante ne contient que les positions 3D (float32 N x 3) d'un
+algorithme donné ; la topologie et les attributs restent dans le projet.
+Changer d'algorithme revient alors à échanger un buffer de N x 12 octets.
+"""
+
+import hashlib
+import numpy as np
+import orjson
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from beanie.operators import Set
+
+from models.layout_variant import LayoutVariant
+from services.spatial_index import grid_bounds, grid_cells, CELL_DTYPE
+
+
+POSITION_DTYPE = np.dtype("<f4")
+VARIANT_BYTES_PER_NODE = 3 * POSITION_DTYPE.itemsize + CELL_DTYPE.itemsize  # Positions + cellule de la grille
+
+
+def compute_topology_key(source_file_path: Optional[str], mapping: Optional[dict]) -> str:
+    """Empreinte de la topologie : un même fichier avec le même mapping produit les mêmes nœuds dans le même ordre."""
+    payload = orjson.dumps(
+        {"file": source_file_path or "", "mapping": mapping or {}},
+        option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.sha1(payload).hexdigest()
+
+
+def sidecar_path(source_file_path: str, topology_key: str, kind: str) -> Path:
+    """Fichier dérivé d'une topologie (index, hiérarchie...), écrit à côté du fichier source."""
+    source = Path(source_file_path)
+    return source.with_name(f"{source.stem}.{topology_key[:12]}.{kind}.npz")
+
+
+def make_params_key(params: Optional[dict] = None) -> str:
+    """Sérialise les paramètres du layout de façon canonique ("" si aucun)."""
+    if not params:
+        return ""
+    return orjson.dumps(params, option=orjson.OPT_SORT_KEYS).decode()
+
+
+def pack_positions(nodes: List[Dict[str, Any]]) -> bytes:
+    """Extrait x, y, z des nœuds dans un buffer float32 little-endian."""
+    coords = np.zeros((len(nodes), 3), dtype=POSITION_DTYPE)
+    for i, node in enumerate(nodes):
+        coords[i, 0] = node.get("x", 0.0) or 0.0
+        coords[i, 1] = node.get("y", 0.0) or 0.0
+        coords[i, 2] = node.get("z", 0.0) or 0.0
+    return coords.tobytes()
+
+
+def unpack_positions(buffer: bytes) -> np.ndarray:
+    """Reconstruit le tableau (N, 3) à partir d'un buffer de positions."""
+    return np.frombuffer(buffer, dtype=POSITION_DTYPE).reshape(-1, 3)
+
+
+def apply_positions(graph_data: Dict[str, Any], buffer: bytes) -> Dict[str, Any]:
+    """
+    Retourne une copie superficielle de graph_data dont les nœuds portent
+    les positions du buffer. Le document d'origine n'est pas modifié.
+    """
+    nodes = graph_data.get("nodes") or []
+    coords = unpack_positions(buffer)
+    if len(coords) != len(nodes):
+        raise ValueError("Le nombre de positions ne correspond pas au nombre de nœuds")
+
+    new_nodes = []
+    for node, (x, y, z) in zip(nodes, coords.tolist()):
+        new_node = dict(node)
+        new_node["x"] = x
+        new_node["y"] = y
+        new_node["z"] = z
+        new_nodes.append(new_node)
+
+    return {**graph_data, "nodes": new_nodes}
+
+
+async def save_variant(
+    project_id: str,
+    algorithm: str,
+    topology_key: str,
+    nodes: List[Dict[str, Any]],
+    params: Optional[dict] = None,
+    speculative: bool = False
+) -> None:
+    """Enregistre (ou remplace) la variante d'un algorithme pour un projet."""
+    params_key = make_params_key(params)
+    positions = pack_positions(nodes)
+    coords = unpack_positions(positions)
+    bounds = grid_bounds(coords)
+    cells = grid_cells(coords, bounds)
+    now = datetime.now(timezone.utc)
+
+    await LayoutVariant.find_one(
+        LayoutVariant.project_id == project_id,
+        LayoutVariant.algorithm == algorithm,
+        LayoutVariant.params_key == params_key
+    ).upsert(
+        Set({
+            LayoutVariant.topology_key: topology_key,
+            LayoutVariant.node_count: len(nodes),
+            LayoutVariant.positions: positions,
+            LayoutVariant.grid_bounds: bounds,
+            LayoutVariant.grid_cells: cells,
+            LayoutVariant.speculative: speculative,
+            LayoutVariant.created_at: now
+        }),
+        on_insert=LayoutVariant(
+            project_id=project_id,
+            algorithm=algorithm,
+            params_key=params_key,
+            topology_key=topology_key,
+            node_count=len(nodes),
+            positions=positions,
+            grid_bounds=bounds,
+            grid_cells=cells,
+            speculative=speculative,
+            created_at=now
+        )
+    )
+
+
+async def get_variant(
+    project_id: str,
+    algorithm: str,
+    topology_key: str,
+    params: Optional[dict] = None
+) -> Optional[LayoutVariant]:
+    """Récupère une variante compatible avec la topologie courante du projet."""
+    return await LayoutVariant.find_one(
+        LayoutVariant.project_id == project_id,
+        LayoutVariant.algorithm == algorithm,
+        LayoutVariant.params_key == make_params_key(params),
+        LayoutVariant.topology_key == topology_key
+    )
+
+
+async def list_variants(project_id: str, topology_key: str) -> List[Dict[str, Any]]:
+    """Liste les variantes disponibles (sans charger les buffers de positions)."""
+    collection = LayoutVariant.get_motor_collection()
+    cursor = collection.find(
+        {"project_id": project_id, "topology_key": topology_key},
+        {"positions": 0, "grid_cells": 0}
+    ).sort("created_at", -1)
+
+    return [
+        {
+            "algorithm": doc["algorithm"],
+            "params_key": doc.get("params_key", ""),
+            "node_count": doc.get("node_count", 0),
+            "size_bytes": doc.get("node_count", 0) * VARIANT_BYTES_PER_NODE,
+            "speculative": doc.get("speculative", False),
+            "created_at": doc.get("created_at")
+        }
+        async for doc in cursor
+    ]
+
+
+async def delete_variants(project_id: str, keep_topology_key: Optional[str] = None) -> int:
+    """Supprime les variantes d'un projet (toutes, ou celles d'une autre topologie)."""
+    query = {"project_id": project_id}
+    if keep_topology_key:
+        query["topology_key"] = {"$ne": keep_topology_key}
+    result = await LayoutVariant.get_motor_collection().delete_many(query)
+    return result.deleted_count
+
+
+async def list_variant_algorithms(project_id: str, topology_key: str) -> List[str]:
+    """Algorithmes ayant déjà une variante pour la topologie courante."""
+    return await LayoutVariant.get_motor_collection().distinct(
+        "algorithm",
+        {"project_id": project_id, "topology_key": topology_key}
+    )
+
+
+async def speculative_storage_bytes() -> int:
+    """Volume total occupé par les variantes spéculatives non encore consultées."""
+    pipeline = [
+        {"$match": {"speculative": True}},
+        {"$group": {"_id": None, "nodes": {"$sum": "$node_count"}}}
+    ]
+    async for doc in LayoutVariant.get_motor_collection().aggregate(pipeline):
+        return int(doc.get("nodes", 0)) * VARIANT_BYTES_PER_NODE
+    return 0
+
+
+async def evict_speculative_variants(bytes_needed: int) -> int:
+    """
+    Supprime les variantes spéculatives jamais consultées, des plus anciennes
+    aux plus récentes, jusqu'à libérer `bytes_needed` ; retourne le volume libéré.
+    """
+    collection = LayoutVariant.get_motor_collection()
+    cursor = collection.find({"speculative": True}, {"node_count": 1}).sort("created_at", 1)
+    victims, freed = [], 0
+    async for doc in cursor:
+        if freed >= bytes_needed:
+            break
+        victims.append(doc["_id"])
+        freed += doc.get("node_count", 0) * VARIANT_BYTES_PER_NODE
+    if victims:
+        await collection.delete_many({"_id": {"$in": victims}, "speculative": True})
+    return freed
+
+
+async def mark_variant_used(variant: LayoutVariant) -> None:
+    """Une variante spéculative consultée devient une variante ordinaire (hors budget)."""
+    if variant.speculative:
+        await variant.set({LayoutVariant.speculative: False})
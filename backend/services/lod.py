@@ -0,0 +1,276 @@
+"""
+Hiérarchie de niveaux de détail (LOD) pour l'affichage progressif.
+
+Construite à l'ingestion à partir des niveaux successifs de la détection de
+communautés multiniveau (Louvain) d'igraph : au niveau 1, chaque super-nœud
+regroupe une communauté de nœuds ; chaque niveau suivant regroupe des
+super-nœuds du niveau précédent. Les arêtes sont agrégées par paire de
+super-nœuds (nombre d'arêtes et somme des poids).
+
+La hiérarchie ne dépend que de la topologie et est écrite à côté du fichier
+source (`.lod.npz`). La position d'un super-nœud est le barycentre de ses
+nœuds dans la variante de layout demandée : elle est calculée à la volée
+(une passe `bincount`) et reste valable pour tous les algorithmes.
+
+Le niveau 0 désigne les nœuds eux-mêmes (indices de graph_data["nodes"]).
+
+Louvain ne fusionne jamais deux composantes connexes : chaque nœud isolé ou
+petite composante resterait un super-nœud à tous les niveaux. Tant que le
+niveau le plus grossier dépasse LOD_MAX_CLUSTERS super-nœuds, un niveau
+supérieur garde les plus grands et regroupe les autres par paquets de
+tailles voisines, si bien que la vue initiale reste bornée.
+"""
+
+import asyncio
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+
+from models.project import Project
+from services.graph_analytics import build_igraph, relabel_by_size
+from services.graph_metrics import GraphArrays
+from services.layout_variants import sidecar_path
+from services.project_cache import ProjectCache
+
+
+LOD_MIN_NODES = int(os.getenv("LOD_MIN_NODES", "5000"))  # En dessous, le graphe est envoyé tel quel
+LOD_CACHE_BYTES = int(float(os.getenv("LOD_CACHE_MB", "512")) * 1024 * 1024)
+LOD_MAX_EDGES = 50_000  # Arêtes agrégées au plus par réponse (les plus fournies d'abord)
+MIN_LEVEL_REDUCTION = 0.9  # Un niveau n'est gardé que s'il réduit d'au moins 10 % le nombre de groupes
+LOD_MAX_CLUSTERS = int(os.getenv("LOD_MAX_CLUSTERS", "5000"))  # Super-nœuds au plus par niveau servi en entier
+
+
+def _aggregate_edges(
+    membership: np.ndarray,
+    edges: np.ndarray,
+    weights: np.ndarray,
+    counts: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Arêtes entre super-nœuds : tableau structuré (source, target, count, weight),
+    source < target, boucles internes exclues, trié par nombre d'arêtes décroissant.
+    `counts` (arêtes déjà agrégées) donne le nombre d'arêtes porté par chaque ligne.
+    """
+    a = membership[edges[:, 0]]
+    b = membership[edges[:, 1]]
+    external = a != b
+    lo = np.minimum(a[external], b[external]).astype(np.int64)
+    hi = np.maximum(a[external], b[external]).astype(np.int64)
+    k = int(membership.max()) + 1 if len(membership) else 0
+
+    keys, inverse = np.unique(lo * k + hi, return_inverse=True)
+    if counts is None:
+        counts = np.bincount(inverse, minlength=len(keys))
+    else:
+        counts = np.rint(np.bincount(inverse, weights=counts[external], minlength=len(keys))).astype(np.int64)
+    sums = np.bincount(inverse, weights=weights[external], minlength=len(keys))
+
+    aggregated = np.zeros(len(keys), dtype=[("source", "<i4"), ("target", "<i4"), ("count", "<i4"), ("weight", "<f4")])
+    aggregated["source"] = keys // max(k, 1)
+    aggregated["target"] = keys % max(k, 1)
+    aggregated["count"] = counts
+    aggregated["weight"] = sums
+    return aggregated[np.argsort(-counts, kind="stable")]
+
+
+def _group_small_clusters(groups: int) -> np.ndarray:
+    """
+    Groupe du niveau supérieur de chacun des `groups` super-nœuds (numérotés
+    par taille décroissante) : les LOD_MAX_CLUSTERS / 2 plus grands sont
+    gardés, les suivants regroupés par paquets consécutifs.
+    """
+    keep = LOD_MAX_CLUSTERS // 2
+    # Paquets bornés eux aussi : un super-nœud déplié ne dépasse pas LOD_MAX_CLUSTERS enfants
+    chunk = min(LOD_MAX_CLUSTERS, -(-(groups - keep) // (LOD_MAX_CLUSTERS - keep)))
+    ids = np.arange(groups)
+    return np.where(ids < keep, ids, keep + (ids - keep) // chunk).astype(np.int32)
+
+
+def _cap_levels(memberships: List[np.ndarray], level_edges: List[np.ndarray]) -> None:
+    """Ajoute des niveaux supérieurs tant que le plus grossier dépasse LOD_MAX_CLUSTERS super-nœuds."""
+    while memberships and int(memberships[-1].max()) + 1 > LOD_MAX_CLUSTERS:
+        mapping = _group_small_clusters(int(memberships[-1].max()) + 1)
+        memberships.append(mapping[memberships[-1]])
+        edges = level_edges[-1]
+        level_edges.append(_aggregate_edges(
+            mapping, np.column_stack([edges["source"], edges["target"]]), edges["weight"], edges["count"]
+        ))
+
+
+class LodHierarchy:
+    """
+    Appartenances par niveau (`memberships[l - 1][i]` = super-nœud du nœud i
+    au niveau l) et arêtes agrégées de chaque niveau.
+    """
+
+    def __init__(self, memberships: np.ndarray, level_edges: List[np.ndarray]):
+        self.memberships = memberships
+        self.level_edges = level_edges
+        self.sizes = [np.bincount(m) for m in memberships]
+        self._positions: Dict[str, Tuple[Any, np.ndarray]] = {}
+
+    @property
+    def levels(self) -> int:
+        return len(self.memberships)
+
+    @property
+    def nbytes(self) -> int:
+        positions = sum(p.nbytes for _, p in self._positions.values())
+        return (
+            self.memberships.nbytes + sum(e.nbytes for e in self.level_edges)
+            + sum(s.nbytes for s in self.sizes) + positions
+        )
+
+    @classmethod
+    def build(cls, arrays: GraphArrays) -> "LodHierarchy":
+        """Niveaux de la détection multiniveau, du plus fin au plus grossier."""
+        graph = build_igraph(arrays)
+        clusterings = graph.community_multilevel(weights="weight", return_levels=True)
+
+        memberships = []
+        previous = len(arrays.node_keys)
+        for clustering in clusterings:
+            membership = relabel_by_size(clustering.membership).astype(np.int32)
+            groups = int(membership.max()) + 1 if len(membership) else 0
+            if groups <= previous * MIN_LEVEL_REDUCTION:
+                memberships.append(membership)
+                previous = groups
+        # Sans aucune communauté (nœuds isolés seulement) : premier niveau de paquets de nœuds
+        if not memberships and len(arrays.node_keys) > LOD_MAX_CLUSTERS:
+            memberships.append(_group_small_clusters(len(arrays.node_keys)))
+
+        weights = np.where(np.isfinite(arrays.weights), arrays.weights, 1.0)
+        level_edges = [_aggregate_edges(m, arrays.edges, weights) for m in memberships]
+        _cap_levels(memberships, level_edges)
+        stacked = np.vstack(memberships) if memberships else np.zeros((0, len(arrays.node_keys)), dtype=np.int32)
+        return cls(stacked, level_edges)
+
+    def save(self, path) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, memberships=self.memberships, **{f"edges_{i}": e for i, e in enumerate(self.level_edges)})
+
+    @classmethod
+    def load(cls, path) -> "LodHierarchy":
+        with np.load(path, allow_pickle=False) as data:
+            memberships = data["memberships"]
+            level_edges = [data[f"edges_{i}"] for i in range(len(memberships))]
+        # Hiérarchies écrites avant le plafonnement des niveaux
+        if len(memberships) and int(memberships[-1].max()) + 1 > LOD_MAX_CLUSTERS:
+            levels = list(memberships)
+            _cap_levels(levels, level_edges)
+            memberships = np.vstack(levels)
+        return cls(memberships, level_edges)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return [
+            {"level": level + 1, "clusters": int(len(self.sizes[level])), "edges": int(len(self.level_edges[level]))}
+            for level in range(self.levels)
+        ]
+
+    def check_level(self, level: int) -> None:
+        if not 1 <= level <= self.levels:
+            raise ValueError(f"Niveau inconnu: {level} (1 à {self.levels})")
+
+    def cached_positions(self, algorithm: str, stamp: Any) -> Optional[np.ndarray]:
+        cached = self._positions.get(algorithm)
+        return cached[1] if cached and cached[0] == stamp else None
+
+    def remember_positions(self, algorithm: str, stamp: Any, positions: np.ndarray) -> None:
+        self._positions[algorithm] = (stamp, positions)
+
+    def centroids(self, level: int, positions: np.ndarray) -> np.ndarray:
+        """Barycentre (k, 3) des nœuds de chaque super-nœud d'un niveau."""
+        membership = self.memberships[level - 1]
+        sizes = np.maximum(self.sizes[level - 1], 1)
+        return np.column_stack([
+            np.bincount(membership, weights=positions[:, axis], minlength=len(sizes)) / sizes
+            for axis in range(3)
+        ])
+
+    def parents(self, level: int) -> Optional[np.ndarray]:
+        """Super-nœud parent (niveau l + 1) de chaque super-nœud du niveau l."""
+        if level >= self.levels:
+            return None
+        parents = np.zeros(len(self.sizes[level - 1]), dtype=np.int64)
+        parents[self.memberships[level - 1]] = self.memberships[level]
+        return parents
+
+    def _clusters_payload(self, level: int, clusters: np.ndarray, positions: np.ndarray) -> Dict[str, Any]:
+        centroids = self.centroids(level, positions)[clusters]
+        sizes = self.sizes[level - 1][clusters]
+        parents = self.parents(level)
+        selected = np.zeros(len(self.sizes[level - 1]), dtype=bool)
+        selected[clusters] = True
+
+        edges = self.level_edges[level - 1]
+        edges = edges[selected[edges["source"]] & selected[edges["target"]]]
+        truncated = len(edges) > LOD_MAX_EDGES
+        edges = edges[:LOD_MAX_EDGES]
+
+        return {
+            "level": level,
+            "clusters": [
+                {
+                    "id": int(c),
+                    "size": int(s),
+                    "x": float(x), "y": float(y), "z": float(z),
+                    "parent": int(parents[c]) if parents is not None else None
+                }
+                for c, s, (x, y, z) in zip(clusters.tolist(), sizes.tolist(), centroids.tolist())
+            ],
+            "edges": np.column_stack([edges["source"], edges["target"], edges["count"]]).tolist(),
+            "edge_weights": edges["weight"].tolist(),
+            "truncated": truncated
+        }
+
+    def level_view(self, level: int, positions: np.ndarray) -> Dict[str, Any]:
+        """Tous les super-nœuds d'un niveau et leurs arêtes agrégées."""
+        self.check_level(level)
+        return self._clusters_payload(level, np.arange(len(self.sizes[level - 1])), positions)
+
+    def children(self, level: int, cluster: int, positions: np.ndarray, topology=None) -> Dict[str, Any]:
+        """
+        Contenu d'un super-nœud déplié : super-nœuds du niveau inférieur ou,
+        au niveau 1, les nœuds eux-mêmes (arêtes lues dans l'adjacence en cache).
+        """
+        self.check_level(level)
+        if not 0 <= cluster < len(self.sizes[level - 1]):
+            raise ValueError(f"Super-nœud inconnu: {cluster}")
+
+        members = np.flatnonzero(self.memberships[level - 1] == cluster)
+        if level > 1:
+            return self._clusters_payload(level - 1, np.unique(self.memberships[level - 2][members]), positions)
+
+        edges, weights = topology.induced_edges(members) if topology is not None else (np.zeros((0, 2), dtype=np.int64), np.zeros(0))
+        truncated = len(edges) > LOD_MAX_EDGES
+        return {
+            "level": 0,
+            "nodes": [
+                {"index": int(i), "x": float(x), "y": float(y), "z": float(z)}
+                for i, (x, y, z) in zip(members.tolist(), positions[members].tolist())
+            ],
+            "edges": edges[:LOD_MAX_EDGES].tolist(),
+            "edge_weights": weights[:LOD_MAX_EDGES].tolist(),
+            "truncated": truncated
+        }
+
+
+def build_and_save(arrays: GraphArrays, source_file_path: str, topology_key: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """Construit la hiérarchie d'ingestion et l'écrit sur disque. Retourne (chemin, niveaux)."""
+    hierarchy = LodHierarchy.build(arrays)
+    path = sidecar_path(source_file_path, topology_key, "lod")
+    hierarchy.save(path)
+    return str(path), hierarchy.summary()
+
+
+async def _load_hierarchy(project_id: str) -> LodHierarchy:
+    doc = await Project.get_motor_collection().find_one({"_id": ObjectId(project_id)}, {"lod_path": 1})
+    path = (doc or {}).get("lod_path")
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError("Hiérarchie LOD absente")
+    return await asyncio.to_thread(LodHierarchy.load, path)
+
+
+lod_cache = ProjectCache(_load_hierarchy, LOD_CACHE_BYTES)
@@ -0,0 +1,104 @@
+"""
+Service de stockage des colonnes analytiques par nœud.
+
+Chaque colonne (une métrique, un jeu de paramètres) est un buffer typé de
+N valeurs aligné sur les nœuds du projet ; elle est réutilisée tant que la
+topologie (fichier + mapping) ne change pas.
+"""
+
+import numpy as np
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from beanie.operators import Set
+
+from models.node_column import NodeColumn
+from services.layout_variants import make_params_key
+
+
+def unpack_values(column: NodeColumn) -> np.ndarray:
+    """Reconstruit le tableau (N,) d'une colonne."""
+    return np.frombuffer(column.values, dtype=np.dtype(column.dtype))
+
+
+async def save_column(
+    project_id: str,
+    metric: str,
+    topology_key: str,
+    values: np.ndarray,
+    params: Optional[dict] = None,
+    summary: Optional[dict] = None,
+    seconds: float = 0.0
+) -> None:
+    """Enregistre (ou remplace) la colonne d'une métrique pour un projet."""
+    params_key = make_params_key(params)
+    dtype = values.dtype.newbyteorder("<").str
+    buffer = values.astype(dtype, copy=False).tobytes()
+    now = datetime.now(timezone.utc)
+    fields = {
+        "topology_key": topology_key,
+        "dtype": dtype,
+        "node_count": len(values),
+        "values": buffer,
+        "summary": summary or {},
+        "seconds": round(seconds, 4),
+        "created_at": now
+    }
+
+    await NodeColumn.find_one(
+        NodeColumn.project_id == project_id,
+        NodeColumn.metric == metric,
+        NodeColumn.params_key == params_key
+    ).upsert(
+        Set(fields),
+        on_insert=NodeColumn(project_id=project_id, metric=metric, params_key=params_key, **fields)
+    )
+
+
+async def get_column(project_id: str, metric: str, topology_key: str) -> Optional[NodeColumn]:
+    """Colonne la plus récente d'une métrique compatible avec la topologie courante."""
+    columns = await NodeColumn.find(
+        NodeColumn.project_id == project_id,
+        NodeColumn.metric == metric,
+        NodeColumn.topology_key == topology_key
+    ).sort(-NodeColumn.created_at).limit(1).to_list()
+    return columns[0] if columns else None
+
+
+async def list_columns(project_id: str, topology_key: str) -> List[Dict[str, Any]]:
+    """Liste les colonnes disponibles (sans charger les buffers de valeurs)."""
+    collection = NodeColumn.get_motor_collection()
+    cursor = collection.find(
+        {"project_id": project_id, "topology_key": topology_key},
+        {"values": 0}
+    ).sort("created_at", -1)
+
+    return [
+        {
+            "metric": doc["metric"],
+            "params_key": doc.get("params_key", ""),
+            "dtype": doc["dtype"],
+            "node_count": doc.get("node_count", 0),
+            "summary": doc.get("summary", {}),
+            "seconds": doc.get("seconds", 0.0),
+            "created_at": doc.get("created_at")
+        }
+        async for doc in cursor
+    ]
+
+
+async def existing_column_keys(project_id: str, topology_key: str) -> set:
+    """Couples (métrique, params_key) déjà calculés pour la topologie courante."""
+    cursor = NodeColumn.get_motor_collection().find(
+        {"project_id": project_id, "topology_key": topology_key},
+        {"metric": 1, "params_key": 1}
+    )
+    return {(doc["metric"], doc.get("params_key", "")) async for doc in cursor}
+
+
+async def delete_columns(project_id: str, keep_topology_key: Optional[str] = None) -> int:
+    """Supprime les colonnes d'un projet (toutes, ou celles d'une autre topologie)."""
+    query = {"project_id": project_id}
+    if keep_topology_key:
+        query["topology_key"] = {"$ne": keep_topology_key}
+    result = await NodeColumn.get_motor_collection().delete_many(query)
+    return result.deleted_count
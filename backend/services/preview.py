@@ -0,0 +1,161 @@
+"""
+Aperçus d'un layout pour la galerie : vignette PNG et nuage de points réduit.
+
+Après chaque layout, les positions sont projetées sur leurs deux axes
+principaux et rastérisées avec NumPy (arêtes échantillonnées le long de
+chaque segment, densités accumulées par `bincount` puis tonifiées) ; le PNG
+est encodé directement (zlib), sans dépendance d'imagerie. Le nuage de
+points ne garde que les PREVIEW_POINTS nœuds de plus fort degré, positions
+normalisées dans [-1, 1] (float32 N x 3).
+
+Les deux sont écrits dans un même fichier `.preview.<clé>.npz` à côté du
+fichier source ; la clé (empreinte du contenu) versionne les URL, si bien
+que les aperçus peuvent être mis en cache indéfiniment par les navigateurs.
+"""
+
+import hashlib
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+from services.layout_variants import sidecar_path, POSITION_DTYPE
+
+
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "256"))  # Pixels (vignette carrée)
+PREVIEW_POINTS = int(os.getenv("PREVIEW_POINTS", "4000"))
+PREVIEW_MAX_EDGES = 50_000  # Arêtes dessinées (échantillon régulier au-delà)
+SAMPLE_BUDGET = 2_000_000  # Pixels échantillonnés au total sur les arêtes
+
+BACKGROUND = np.array([11, 14, 20], dtype=np.float64)
+EDGE_COLOR = np.array([70, 110, 160], dtype=np.float64)
+NODE_COLOR = np.array([120, 220, 255], dtype=np.float64)
+MARGIN = 0.05  # Marge autour du graphe (fraction de la vignette)
+
+
+def _principal_plane(positions: np.ndarray) -> np.ndarray:
+    """Projection (N, 2) sur les deux axes de plus grande variance."""
+    centered = positions - positions.mean(axis=0)
+    if len(positions) < 3:
+        return centered[:, :2]
+    # Axes principaux : vecteurs propres de la covariance 3 x 3 (valeurs propres croissantes)
+    _, vectors = np.linalg.eigh(centered.T @ centered)
+    return centered @ vectors[:, [2, 1]]
+
+
+def _to_pixels(plane: np.ndarray, size: int) -> np.ndarray:
+    lo, hi = plane.min(axis=0), plane.max(axis=0)
+    scale = (1 - 2 * MARGIN) * (size - 1) / max(float((hi - lo).max()), 1e-9)
+    # Graphe centré, proportions conservées ; y vers le haut
+    pixels = (plane - (lo + hi) / 2) * scale + (size - 1) / 2
+    pixels[:, 1] = (size - 1) - pixels[:, 1]
+    return pixels
+
+
+def _edge_density(pixels: np.ndarray, edges: np.ndarray, size: int) -> np.ndarray:
+    if len(edges) > PREVIEW_MAX_EDGES:
+        edges = edges[::int(np.ceil(len(edges) / PREVIEW_MAX_EDGES))]
+    start, end = pixels[edges[:, 0]], pixels[edges[:, 1]]
+    delta = end - start
+    samples = np.ceil(np.abs(delta).max(axis=1)).astype(np.int64) + 1
+    total = samples.sum()
+    if total > SAMPLE_BUDGET:
+        samples = np.maximum((samples * (SAMPLE_BUDGET / total)).astype(np.int64), 1)
+
+    # Échantillons de toutes les arêtes concaténés : t_k = (k + 0.5) / n sur chaque segment
+    edge_of = np.repeat(np.arange(len(edges)), samples)
+    offsets = np.concatenate([[0], np.cumsum(samples)[:-1]])
+    t = (np.arange(samples.sum()) - offsets[edge_of] + 0.5) / samples[edge_of]
+    points = start[edge_of] + t[:, None] * delta[edge_of]
+    return _density(points, size)
+
+
+def _density(points: np.ndarray, size: int) -> np.ndarray:
+    ij = np.clip(np.rint(points).astype(np.int64), 0, size - 1)
+    return np.bincount(ij[:, 1] * size + ij[:, 0], minlength=size * size).astype(np.float64)
+
+
+def _opacity(density: np.ndarray, gain: float) -> np.ndarray:
+    """Opacité 1 - exp(-d / échelle) : les zones denses saturent sans masquer les détails isolés."""
+    occupied = density[density > 0]
+    if len(occupied) == 0:
+        return density
+    return 1.0 - np.exp(-gain * density / np.median(occupied))
+
+
+def encode_png(rgb: np.ndarray) -> bytes:
+    """Encode une image (H, W, 3) uint8 en PNG (filtre nul, zlib)."""
+    height, width, _ = rgb.shape
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), rgb.reshape(height, width * 3)]).tobytes()
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+def render_thumbnail(positions: np.ndarray, edges: np.ndarray, size: int = THUMBNAIL_SIZE) -> bytes:
+    """Vignette PNG (size x size) du graphe vu selon son plan principal."""
+    image = np.broadcast_to(BACKGROUND, (size * size, 3)).copy()
+    if len(positions):
+        pixels = _to_pixels(_principal_plane(positions), size)
+        layers = [(NODE_COLOR, _opacity(_density(pixels, size), 1.5))]
+        if len(edges):
+            layers.insert(0, (EDGE_COLOR, _opacity(_edge_density(pixels, edges, size), 0.7)))
+        for color, alpha in layers:
+            image += alpha[:, None] * (color - image)
+    return encode_png(image.reshape(size, size, 3).round().astype(np.uint8))
+
+
+def decimate_points(positions: np.ndarray, degree: np.ndarray, limit: int = PREVIEW_POINTS) -> np.ndarray:
+    """Positions (normalisées dans [-1, 1]) des `limit` nœuds de plus fort degré, par degré décroissant."""
+    keep = np.arange(len(positions))
+    if len(keep) > limit:
+        keep = np.argpartition(-degree, limit - 1)[:limit]
+    keep = keep[np.argsort(-degree[keep], kind="stable")]
+    points = positions[keep]
+    if len(points):
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        points = (points - (lo + hi) / 2) / max(float((hi - lo).max()) / 2, 1e-9)
+    return points.astype(POSITION_DTYPE)
+
+
+def build_preview(positions: np.ndarray, edges: np.ndarray, algorithm: str) -> Tuple[bytes, np.ndarray, Dict[str, Any]]:
+    """Vignette PNG, nuage de points réduit et résumé (dont la clé de version)."""
+    start = time.perf_counter()
+    positions = np.nan_to_num(np.asarray(positions, dtype=np.float64))
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    degree = np.bincount(edges.ravel(), minlength=len(positions))
+
+    png = render_thumbnail(positions, edges)
+    points = decimate_points(positions, degree)
+    summary = {
+        "key": hashlib.sha1(png + points.tobytes()).hexdigest()[:16],
+        "algorithm": algorithm,
+        "size": THUMBNAIL_SIZE,
+        "points": int(len(points)),
+        "node_count": int(len(positions)),
+        "seconds": round(time.perf_counter() - start, 4)
+    }
+    return png, points, summary
+
+
+def save_preview(png: bytes, points: np.ndarray, summary: Dict[str, Any], source_file_path: str, topology_key: str) -> str:
+    path = sidecar_path(source_file_path, topology_key, f"preview.{summary['key']}")
+    with open(path, "wb") as f:
+        np.savez(f, thumbnail=np.frombuffer(png, dtype=np.uint8), points=points)
+    return str(path)
+
+
+def load_preview(path: str, kind: str) -> bytes:
+    """Contenu brut d'un aperçu : "thumbnail" (PNG) ou "points" (float32 N x 3)."""
+    with np.load(path, allow_pickle=False) as data:
+        return data[kind].tobytes()
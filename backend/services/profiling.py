@@ -0,0 +1,141 @@
+"""
+Profilage à la demande des jobs de traitement.
+
+Un job profilé tourne sous un profileur par échantillonnage (thread qui
+relève la pile du thread du job à intervalle fixe) et sous tracemalloc.
+L'artefact produit (piles "folded" pour flame graph + principales
+allocations) est stocké dans la collection `profile_artifacts`.
+
+Déclenchement : par un admin, pour les utilisateurs dont `profiling_enabled`
+est actif, ou sur un échantillon des jobs (`PROFILE_SAMPLE_RATE`).
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from models.profile_artifact import ProfileArtifact
+
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # Fraction des jobs profilés (0 à 1)
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+TOP_ALLOCATIONS = 50
+MAX_FOLDED_STACKS = 5000  # Borne la taille de l'artefact (document MongoDB < 16 Mo)
+
+
+def profile_trigger(user) -> Optional[str]:
+    """Origine du profilage d'un job lancé par cet utilisateur, ou None."""
+    if getattr(user, "profiling_enabled", False):
+        return "user"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+class JobProfiler:
+    """
+    Profileur par échantillonnage + tracemalloc pour le thread courant.
+
+    Les extensions C qui gardent le GIL (calculs igraph, NumPy) retardent les
+    échantillons : leur temps est attribué à la pile Python qui les appelle.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target_thread = None
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started_tracemalloc = False
+        self._start = 0.0
+
+    def start(self) -> None:
+        self._target_thread = threading.get_ident()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name="job-profiler", daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> Dict[str, Any]:
+        """Arrête le profilage et retourne l'artefact."""
+        self._stop.set()
+        self._sampler.join()
+        duration = time.perf_counter() - self._start
+
+        snapshot = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        top_allocations = [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_mb": round(stat.size / (1024 * 1024), 3),
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+        ]
+
+        return {
+            "duration_seconds": round(duration, 3),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "traced_peak_mb": round(traced_peak / (1024 * 1024), 2),
+            "top_allocations": top_allocations,
+            "folded": "\n".join(
+                f"{stack} {count}" for stack, count in self.stacks.most_common(MAX_FOLDED_STACKS)
+            ),
+        }
+
+
+async def save_artifact(report: Dict[str, Any], **fields) -> ProfileArtifact:
+    """Enregistre l'artefact d'un job profilé."""
+    artifact = ProfileArtifact(**report, **fields)
+    await artifact.insert()
+    return artifact
+
+
+async def list_artifacts(
+    project_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """Liste les artefacts, du plus récent au plus ancien, sans les piles ni les allocations."""
+    query = {}
+    if project_id:
+        query["project_id"] = project_id
+    if user_id:
+        query["user_id"] = user_id
+
+    cursor = ProfileArtifact.get_motor_collection().find(
+        query, {"folded": 0, "top_allocations": 0, "stages": 0}
+    ).sort("created_at", -1).skip(skip).limit(limit)
+
+    artifacts = []
+    async for doc in cursor:
+        doc["id"] = str(doc.pop("_id"))
+        artifacts.append(doc)
+    return artifacts
@@ -0,0 +1,80 @@
+"""
+Cache mémoire (LRU, borné en octets) des structures construites à partir
+d'un projet, partagé par les requêtes topologiques et la recherche de nœuds.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, Callable, Awaitable
+
+
+class ProjectCache:
+    """
+    Cache LRU de structures dérivées d'un projet, borné par leur volume
+    mémoire total (attribut `nbytes` de chaque entrée).
+
+    `loader(project_id)` construit l'entrée en cas d'absence ; la clé inclut
+    l'empreinte de topologie, si bien qu'un nouveau fichier ou mapping
+    invalide naturellement l'entrée précédente.
+    """
+
+    def __init__(self, loader: Callable[[str], Awaitable[Any]], max_bytes: int):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._loading: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def _store(self, key: Tuple[str, str], entry: Any) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        total = self.size_bytes
+        # On garde toujours l'entrée la plus récente, même si elle dépasse le budget seule
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            total -= evicted.nbytes
+
+    def touch(self, project_id: str, topology_key: str) -> None:
+        """
+        Réévalue le budget après qu'une entrée a grossi (grille ou positions
+        ajoutées après son chargement) ; elle devient la plus récente.
+        """
+        key = (project_id, topology_key)
+        if key in self._entries:
+            self._store(key, self._entries[key])
+
+    def invalidate(self, project_id: str) -> None:
+        for key in [k for k in self._entries if k[0] == project_id]:
+            del self._entries[key]
+
+    async def get(self, project_id: str, topology_key: str) -> Any:
+        """Entrée du projet, construite une seule fois si absente du cache."""
+        key = (project_id, topology_key)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        # Requêtes concurrentes sur le même projet : un seul chargement
+        if key in self._loading:
+            return await asyncio.shield(self._loading[key])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            entry = await self.loader(project_id)
+            self._store(key, entry)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Marque l'exception comme consommée s'il n'y a pas d'attente
+            raise
+        finally:
+            del self._loading[key]
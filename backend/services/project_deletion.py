@@ -0,0 +1,70 @@
+"""
+Suppression d'un projet et de tout ce qui en dépend.
+
+Point d'entrée unique des suppressions (propriétaire, admin, purge des
+projets Free échus) : projets dérivés, variantes de layout, colonnes
+analytiques, liens de partage, fichiers (source et artefacts), charges
+utiles partagées, caches en mémoire du processus et pages de la galerie.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+from models.project import Project
+from models.layout_variant import LayoutVariant
+from models.node_column import NodeColumn
+from services.share_cache import drop_shared_payloads, delete_share_links
+from services.gallery import invalidate_gallery
+from services.topology import topology_cache
+from services.search_index import search_cache
+from services.facets import frame_cache
+from services.lod import lod_cache
+from services.spatial_index import spatial_cache
+from services.backbone import backbone_cache
+
+
+FILE_FIELDS = ("source_file_path", "search_index_path", "lod_path", "backbone_path", "preview_path")
+
+# Projection suffisante pour delete_projects
+DELETION_FIELDS = {"is_featured": 1, **{field: 1 for field in FILE_FIELDS}}
+
+_CACHES = (topology_cache, search_cache, frame_cache, lod_cache, spatial_cache, backbone_cache)
+
+
+async def delete_projects(docs: List[Dict[str, Any]]) -> int:
+    """
+    Supprime les projets (documents bruts lus avec DELETION_FIELDS) et leurs
+    projets dérivés, qui n'ont plus de nœuds sans leur parent.
+    Retourne le nombre de projets supprimés.
+    """
+    if not docs:
+        return 0
+    collection = Project.get_motor_collection()
+
+    parent_ids = [str(doc["_id"]) for doc in docs]
+    children = await collection.find({"parent_id": {"$in": parent_ids}}, DELETION_FIELDS).to_list(None)
+    docs = docs + children
+    object_ids = [doc["_id"] for doc in docs]
+    project_ids = [str(oid) for oid in object_ids]
+
+    result = await collection.delete_many({"_id": {"$in": object_ids}})
+    for model in (LayoutVariant, NodeColumn):
+        await model.get_motor_collection().delete_many({"project_id": {"$in": project_ids}})
+    await delete_share_links(project_ids)
+
+    for doc in docs:
+        for field in FILE_FIELDS:
+            if doc.get(field):
+                try:
+                    Path(doc[field]).unlink(missing_ok=True)
+                except Exception:
+                    pass
+
+    for project_id in project_ids:
+        drop_shared_payloads(project_id)
+        for cache in _CACHES:
+            cache.invalidate(project_id)
+
+    if any(doc.get("is_featured") for doc in docs):
+        await invalidate_gallery()
+    return result.deleted_count
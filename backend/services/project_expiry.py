@@ -0,0 +1,96 @@
+"""
+Expiration des projets du plan Free.
+
+Le plan du propriétaire est dénormalisé sur le projet : `expires_at` est fixé
+à la création pour un utilisateur Free (création + FREE_PROJECT_TTL) et reste
+nul sinon. Un changement de plan (passage Elite, rôle admin, ou l'inverse)
+met à jour les projets existants du propriétaire en une écriture.
+
+La purge périodique ne lit que les projets échus, via l'index sur
+`expires_at`, et les supprime par lots (voir services.project_deletion) : son
+coût est proportionnel à ce qui expire réellement. À la déconnexion d'un
+compte Free, ses projets sont supprimés de la même façon, immédiatement. Un index TTL MongoDB n'est pas utilisé, car il supprimerait
+les documents sans leurs fichiers et collections associés.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from models.project import Project
+from services.project_deletion import delete_projects, DELETION_FIELDS
+
+
+FREE_PROJECT_TTL = timedelta(hours=float(os.getenv("FREE_PROJECT_TTL_HOURS", "6")))
+EXPIRY_BATCH = 500
+
+
+def is_free_plan(user) -> bool:
+    return not user.is_elite and not user.is_superuser
+
+
+def free_plan_expiry(user, created_at: Optional[datetime] = None) -> Optional[datetime]:
+    """Date d'expiration d'un projet créé par `user` (None hors plan Free)."""
+    if not is_free_plan(user):
+        return None
+    return (created_at or datetime.now(timezone.utc)) + FREE_PROJECT_TTL
+
+
+def _expiry_from_creation():
+    # Pipeline de mise à jour : échéance calculée côté serveur à partir de created_at
+    return [{"$set": {"expires_at": {"$dateAdd": {
+        "startDate": "$created_at", "unit": "second", "amount": int(FREE_PROJECT_TTL.total_seconds())
+    }}}}]
+
+
+async def sync_owner_expiry(user) -> int:
+    """Aligne `expires_at` des projets de `user` sur son plan actuel."""
+    collection = Project.get_motor_collection()
+    if is_free_plan(user):
+        result = await collection.update_many(
+            {"owner.$id": user.id, "expires_at": None},
+            _expiry_from_creation()
+        )
+    else:
+        result = await collection.update_many(
+            {"owner.$id": user.id, "expires_at": {"$ne": None}},
+            {"$set": {"expires_at": None}}
+        )
+    return result.modified_count
+
+
+async def purge_owner_projects(user) -> int:
+    """Supprime immédiatement les projets de `user` et leurs dépendances (déconnexion Free)."""
+    return await _purge({"owner.$id": user.id})
+
+
+async def backfill_expiry(free_owner_ids: list) -> None:
+    """Renseigne `expires_at` des projets créés avant son introduction."""
+    collection = Project.get_motor_collection()
+    if free_owner_ids:
+        await collection.update_many(
+            {"expires_at": {"$exists": False}, "owner.$id": {"$in": free_owner_ids}},
+            _expiry_from_creation()
+        )
+    await collection.update_many({"expires_at": {"$exists": False}}, {"$set": {"expires_at": None}})
+
+
+async def purge_expired_projects(now: Optional[datetime] = None) -> int:
+    """Supprime par lots les projets échus et leurs dépendances ; retourne le nombre de projets supprimés."""
+    return await _purge({"expires_at": {"$lte": now or datetime.now(timezone.utc)}})
+
+
+async def _purge(query: dict) -> int:
+    collection = Project.get_motor_collection()
+    deleted = 0
+
+    while True:
+        expired = await collection.find(query, DELETION_FIELDS).limit(EXPIRY_BATCH).to_list(EXPIRY_BATCH)
+        if not expired:
+            break
+
+        deleted += await delete_projects(expired)
+
+        if len(expired) < EXPIRY_BATCH:
+            break
+    return deleted
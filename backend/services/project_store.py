@@ -0,0 +1,55 @@
+"""
+Écritures partielles des projets.
+
+Toute modification d'un projet passe par un `$set` des seuls champs modifiés
+(un renommage n'écrit que quelques octets, jamais graph_data) et incrémente
+le champ `version`. Avec `expected_version`, l'écriture n'a lieu que si le
+document n'a pas changé depuis sa lecture (concurrence optimiste) : deux
+traitements concurrents ne peuvent pas écraser silencieusement leurs écritures.
+"""
+
+from typing import Dict, Any, Optional
+
+from beanie.odm.utils.encoder import Encoder
+from bson import ObjectId
+
+from models.project import Project
+
+
+class ProjectConflict(Exception):
+    """Le projet a été modifié entre sa lecture et l'écriture."""
+
+
+def _version_filter(expected_version: int) -> Dict[str, Any]:
+    # Les projets antérieurs au champ `version` n'en ont pas : équivalent à 0
+    if expected_version == 0:
+        return {"version": {"$in": [0, None]}}
+    return {"version": expected_version}
+
+
+async def update_project_fields(
+    project_id,
+    fields: Dict[str, Any],
+    expected_version: Optional[int] = None
+) -> bool:
+    """
+    Applique `$set` sur les champs donnés (noms Beanie ou chemins pointés),
+    encodés comme le ferait `Document.save()`.
+
+    Returns:
+        False si le projet n'existe pas (sans `expected_version`)
+
+    Raises:
+        ProjectConflict: la version du projet ne correspond plus
+    """
+    query = {"_id": ObjectId(str(project_id))}
+    if expected_version is not None:
+        query.update(_version_filter(expected_version))
+
+    result = await Project.get_motor_collection().update_one(
+        query,
+        {"$set": {str(key): Encoder().encode(value) for key, value in fields.items()}, "$inc": {"version": 1}}
+    )
+    if result.matched_count == 0 and expected_version is not None:
+        raise ProjectConflict(f"Projet {project_id} modifié entre-temps (version attendue: {expected_version})")
+    return result.matched_count > 0
@@ -0,0 +1,262 @@
+"""
+Index de recherche des nœuds d'un projet (identifiants et libellés).
+
+Construit à l'ingestion par le worker et écrit à côté du fichier source
+(`.search.npz`, tableaux NumPy uniquement) :
+- identifiants et libellés normalisés, triés : égalité et préfixe par
+  recherche dichotomique ;
+- index de trigrammes (clés triées + listes de nœuds au format CSR) sur le
+  texte du nœud (libellé + quelques attributs textuels) : recherche de
+  sous-chaîne sans parcourir tous les nœuds.
+
+L'API charge l'index dans un cache LRU borné (`SEARCH_CACHE_MB`). Les
+résultats sont des indices dans `graph_data["nodes"]`, classés par pertinence.
+"""
+
+import asyncio
+import bisect
+import os
+import unicodedata
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import orjson
+from bson import ObjectId
+
+from models.project import Project
+from services.project_cache import ProjectCache
+from services.layout_variants import sidecar_path
+
+
+SEARCH_CACHE_BYTES = int(float(os.getenv("SEARCH_CACHE_MB", "512")) * 1024 * 1024)
+LABEL_FIELDS = ("label", "name", "title")  # Premier attribut présent = libellé du nœud
+MAX_TEXT_ATTRIBUTES = 5
+MAX_TEXT_LENGTH = 128  # Texte indexé par nœud (caractères)
+FIELD_SAMPLE_SIZE = 1000
+MAX_MATCHES = 10_000  # Résultats classés au plus par requête
+
+# Rang des correspondances (plus petit = plus pertinent)
+TIER_EXACT_ID, TIER_EXACT_LABEL, TIER_ID_PREFIX, TIER_LABEL_PREFIX, TIER_SUBSTRING = range(5)
+
+
+def normalize(value: Any) -> str:
+    """Minuscules, sans accents ni espaces superflus."""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def _trigram_codes(text: str) -> np.ndarray:
+    """Trigrammes distincts d'un texte, codés sur 63 bits (3 points de code de 21 bits)."""
+    if len(text) < 3:
+        return np.zeros(0, dtype=np.uint64)
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    return np.unique((codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:])
+
+
+def detect_text_fields(nodes: List[Dict[str, Any]]) -> Tuple[Optional[str], List[str]]:
+    """
+    Choisit le libellé et les attributs textuels à indexer à partir d'un
+    échantillon : attributs majoritairement chaînes et courts.
+    """
+    sample = nodes[:FIELD_SAMPLE_SIZE]
+    if not sample:
+        return None, []
+
+    stats: Dict[str, List[int]] = {}
+    for node in sample:
+        for key, value in node.items():
+            if key in ("id", "x", "y", "z") or not isinstance(value, str):
+                continue
+            count_length = stats.setdefault(key, [0, 0])
+            count_length[0] += 1
+            count_length[1] += len(value)
+
+    label = next((f for f in LABEL_FIELDS if f in stats), None)
+    candidates = [
+        (count, key) for key, (count, length) in stats.items()
+        if key != label and count >= len(sample) / 2 and length / count <= MAX_TEXT_LENGTH / 2
+    ]
+    candidates.sort(reverse=True)
+    return label, sorted(key for _, key in candidates[:MAX_TEXT_ATTRIBUTES])
+
+
+def _pack_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = blob.tobytes()
+    bounds = offsets.tolist()
+    return [raw[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+class NodeSearchIndex:
+    """Index en mémoire : listes triées (égalité, préfixe) + trigrammes (sous-chaîne)."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        labels: List[str],
+        texts: List[str],
+        tri_keys: np.ndarray,
+        tri_offsets: np.ndarray,
+        tri_postings: np.ndarray,
+        fields: Dict[str, Any]
+    ):
+        self.ids = ids
+        self.labels = labels
+        self.texts = texts
+        self.tri_keys = tri_keys
+        self.tri_offsets = tri_offsets
+        self.tri_postings = tri_postings
+        self.fields = fields
+
+        self.id_order = sorted(range(len(ids)), key=ids.__getitem__)
+        self.sorted_ids = [ids[i] for i in self.id_order]
+        self.label_order = sorted(range(len(labels)), key=labels.__getitem__)
+        self.sorted_labels = [labels[i] for i in self.label_order]
+
+    @property
+    def nbytes(self) -> int:
+        strings = sum(len(s) for s in self.ids) + sum(len(s) for s in self.labels) + sum(len(s) for s in self.texts)
+        # Estimation : objets str (~50 octets + contenu) et entrées des listes triées
+        overhead = len(self.ids) * (3 * 50 + 4 * 8)
+        return strings + overhead + self.tri_keys.nbytes + self.tri_offsets.nbytes + self.tri_postings.nbytes
+
+    @classmethod
+    def build(cls, nodes: List[Dict[str, Any]]) -> "NodeSearchIndex":
+        """Construit l'index à partir des nœuds sérialisés (ordre de graph_data["nodes"])."""
+        label_field, text_fields = detect_text_fields(nodes)
+        ids, labels, texts = [], [], []
+        keys, postings = [], []
+
+        for i, node in enumerate(nodes):
+            node_id = normalize(node.get("id", i))
+            label = normalize(node.get(label_field, "")) if label_field else ""
+            parts = [label or node_id] + [normalize(node[f]) for f in text_fields if node.get(f) is not None]
+            text = " ".join(p for p in parts if p)[:MAX_TEXT_LENGTH]
+            ids.append(node_id)
+            labels.append(label)
+            texts.append(text)
+
+            codes = _trigram_codes(text)
+            keys.append(codes)
+            postings.append(np.full(len(codes), i, dtype=np.int32))
+
+        all_keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.uint64)
+        all_postings = np.concatenate(postings) if postings else np.zeros(0, dtype=np.int32)
+        order = np.argsort(all_keys, kind="stable")  # Stable : nœuds croissants pour chaque trigramme
+        all_keys, all_postings = all_keys[order], all_postings[order]
+        tri_keys, starts = np.unique(all_keys, return_index=True)
+        tri_offsets = np.append(starts, len(all_keys)).astype(np.int64)
+
+        fields = {"label": label_field, "text": text_fields}
+        return cls(ids, labels, texts, tri_keys, tri_offsets, all_postings, fields)
+
+    def save(self, path: Path) -> None:
+        id_blob, id_offsets = _pack_strings(self.ids)
+        label_blob, label_offsets = _pack_strings(self.labels)
+        text_blob, text_offsets = _pack_strings(self.texts)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                id_blob=id_blob, id_offsets=id_offsets,
+                label_blob=label_blob, label_offsets=label_offsets,
+                text_blob=text_blob, text_offsets=text_offsets,
+                tri_keys=self.tri_keys, tri_offsets=self.tri_offsets, tri_postings=self.tri_postings,
+                fields=np.frombuffer(orjson.dumps(self.fields), dtype=np.uint8)
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "NodeSearchIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                _unpack_strings(data["id_blob"], data["id_offsets"]),
+                _unpack_strings(data["label_blob"], data["label_offsets"]),
+                _unpack_strings(data["text_blob"], data["text_offsets"]),
+                data["tri_keys"], data["tri_offsets"], data["tri_postings"],
+                orjson.loads(data["fields"].tobytes())
+            )
+
+    def _range(self, sorted_values: List[str], order: List[int], prefix: str, exact: bool) -> List[int]:
+        lo = bisect.bisect_left(sorted_values, prefix)
+        hi = bisect.bisect_right(sorted_values, prefix) if exact else bisect.bisect_left(sorted_values, prefix + "\U0010ffff")
+        return order[lo:min(hi, lo + MAX_MATCHES)]
+
+    def _substring(self, query: str) -> List[int]:
+        """Candidats par intersection des listes de trigrammes, puis vérification de la sous-chaîne."""
+        candidates = None
+        codes = _trigram_codes(query)
+        slots = np.searchsorted(self.tri_keys, codes)
+        lists = []
+        for code, slot in zip(codes.tolist(), slots.tolist()):
+            if slot >= len(self.tri_keys) or int(self.tri_keys[slot]) != code:
+                return []
+            lists.append(self.tri_postings[self.tri_offsets[slot]:self.tri_offsets[slot + 1]])
+
+        for posting in sorted(lists, key=len):
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                return []
+
+        texts = self.texts
+        return [i for i in candidates.tolist() if query in texts[i]][:MAX_MATCHES]
+
+    def search(self, query: str, offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """Indices des nœuds correspondant à la requête, classés puis paginés."""
+        q = normalize(query)
+        if not q:
+            return {"results": [], "total": 0, "truncated": False}
+
+        best: Dict[int, int] = {}
+
+        def add(indices: List[int], tier: int) -> None:
+            for i in indices:
+                if i not in best:
+                    best[i] = tier
+
+        add(self._range(self.sorted_ids, self.id_order, q, exact=True), TIER_EXACT_ID)
+        add(self._range(self.sorted_labels, self.label_order, q, exact=True), TIER_EXACT_LABEL)
+        add(self._range(self.sorted_ids, self.id_order, q, exact=False), TIER_ID_PREFIX)
+        add(self._range(self.sorted_labels, self.label_order, q, exact=False), TIER_LABEL_PREFIX)
+        if len(q) >= 3:
+            add(self._substring(q), TIER_SUBSTRING)
+
+        ranked = sorted(best, key=lambda i: (best[i], len(self.labels[i] or self.ids[i]), i))
+        page = ranked[offset:offset + limit]
+        return {
+            "results": [{"index": i, "id": self.ids[i], "label": self.labels[i], "tier": best[i]} for i in page],
+            "total": len(ranked),
+            "truncated": len(ranked) >= MAX_MATCHES
+        }
+
+
+def build_and_save(nodes: List[Dict[str, Any]], source_file_path: str, topology_key: str) -> Tuple[str, Dict[str, Any]]:
+    """Construit l'index d'ingestion et l'écrit sur disque. Retourne (chemin, résumé)."""
+    index = NodeSearchIndex.build(nodes)
+    path = sidecar_path(source_file_path, topology_key, "search")
+    index.save(path)
+    return str(path), {**index.fields, "nodes": len(nodes), "trigrams": int(len(index.tri_keys))}
+
+
+async def _load_index(project_id: str) -> NodeSearchIndex:
+    """Index écrit à l'ingestion, ou reconstruit à partir de graph_data (projets antérieurs)."""
+    doc = await Project.get_motor_collection().find_one(
+        {"_id": ObjectId(project_id)},
+        {"search_index_path": 1}
+    )
+    path = (doc or {}).get("search_index_path")
+    if path and Path(path).exists():
+        return await asyncio.to_thread(NodeSearchIndex.load, Path(path))
+
+    doc = await Project.get_motor_collection().find_one({"_id": ObjectId(project_id)}, {"graph_data.nodes": 1})
+    nodes = ((doc or {}).get("graph_data") or {}).get("nodes") or []
+    return await asyncio.to_thread(NodeSearchIndex.build, nodes)
+
+
+search_cache = ProjectCache(_load_index, SEARCH_CACHE_BYTES)
@@ -0,0 +1,216 @@
+"""
+Résolution des liens de partage et charge utile partagée, en cache.
+
+- Token → projet : la résolution (y compris l'absence ou l'expiration d'un
+  token) est mise en cache dans Redis ; un lien consulté en boucle ne
+  sollicite plus `share_links`. Les liens expirés sont supprimés par l'index
+  TTL de la collection.
+- Charge utile : la réponse partagée (graph_data compris) est sérialisée une
+  fois par version du projet dans un fichier JSON (`SHARE_PAYLOAD_DIR`) ; la
+  version courante du projet est elle-même gardée quelques secondes dans
+  Redis (SHARE_VERSION_TTL), si bien qu'un lien viral ne lit plus MongoDB.
+"""
+
+import asyncio
+import math
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import orjson
+from beanie import PydanticObjectId
+from bson import ObjectId
+
+from core.redis_client import get_redis
+from models.project import Project
+from models.share_link import ShareLink
+from services.layout_variants import get_variant, apply_positions
+
+
+SHARE_TOKEN_TTL = int(os.getenv("SHARE_TOKEN_CACHE_TTL", "300"))  # secondes
+SHARE_MISS_TTL = 60  # Tokens inconnus ou expirés
+SHARE_VERSION_TTL = int(os.getenv("SHARE_VERSION_TTL", "30"))  # Fraîcheur maximale d'une vue partagée
+SHARE_PAYLOAD_DIR = Path(os.getenv("SHARE_PAYLOAD_DIR", "uploads/shared"))
+
+MISSING, EXPIRED = "missing", "expired"
+
+_builds: Dict[str, asyncio.Task] = {}
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+async def resolve_token(token: str) -> Dict[str, Any]:
+    """
+    Lien de partage d'un token : {"project_id", "created_by", "expires_at"},
+    ou {"status": "missing" | "expired"}.
+    """
+    redis = get_redis()
+    key = f"share:token:{token}"
+    if redis:
+        try:
+            cached = await redis.get(key)
+            if cached:
+                link = orjson.loads(cached)
+                if link.get("expires_at") and datetime.fromisoformat(link["expires_at"]) < datetime.now(timezone.utc):
+                    return {"status": EXPIRED}
+                return link
+        except Exception:
+            redis = None
+
+    doc = await ShareLink.get_motor_collection().find_one(
+        {"token": token}, {"project_id": 1, "created_by": 1, "expires_at": 1}
+    )
+    now = datetime.now(timezone.utc)
+    ttl = SHARE_MISS_TTL
+    if not doc:
+        link = {"status": MISSING}
+    elif doc.get("expires_at") and _as_utc(doc["expires_at"]) < now:
+        # Pas encore supprimé par l'index TTL (passage toutes les 60 s)
+        link = {"status": EXPIRED}
+    else:
+        expires_at = _as_utc(doc["expires_at"]) if doc.get("expires_at") else None
+        link = {
+            "project_id": doc["project_id"],
+            "created_by": doc.get("created_by"),
+            "expires_at": expires_at.isoformat() if expires_at else None
+        }
+        ttl = SHARE_TOKEN_TTL
+        if expires_at:
+            ttl = max(1, min(ttl, int((expires_at - now).total_seconds())))
+
+    if redis:
+        try:
+            await redis.setex(key, ttl, orjson.dumps(link))
+        except Exception:
+            pass
+    return link
+
+
+async def forget_token(*tokens: str) -> None:
+    """Oublie la résolution en cache des tokens (lien supprimé)."""
+    redis = get_redis()
+    if redis and tokens:
+        try:
+            await redis.delete(*(f"share:token:{token}" for token in tokens))
+        except Exception:
+            pass
+
+
+async def delete_share_links(project_ids: List[str]) -> int:
+    """Supprime les liens de partage des projets, ainsi que leur résolution en cache."""
+    collection = ShareLink.get_motor_collection()
+    links = await collection.find({"project_id": {"$in": project_ids}}, {"token": 1}).to_list(None)
+    if not links:
+        return 0
+    await collection.delete_many({"project_id": {"$in": project_ids}})
+    await forget_token(*(link["token"] for link in links))
+    return len(links)
+
+
+def clean_nans(obj):
+    """Remplace les NaN et Inf par 0 (comme les réponses JSON de l'API)."""
+    if isinstance(obj, float):
+        return 0.0 if math.isnan(obj) or math.isinf(obj) else obj
+    if isinstance(obj, dict):
+        return {k: clean_nans(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [clean_nans(v) for v in obj]
+    return obj
+
+
+def _payload_path(project_id: str, version: int) -> Path:
+    return SHARE_PAYLOAD_DIR / f"{project_id}.{version}.json"
+
+
+def drop_shared_payloads(project_id: str, before_version: Optional[int] = None) -> None:
+    """Supprime les charges utiles sérialisées d'un projet (toutes, ou celles antérieures à `before_version`)."""
+    for path in SHARE_PAYLOAD_DIR.glob(f"{project_id}.*.json"):
+        version = path.suffixes[-2].lstrip(".") if len(path.suffixes) >= 2 else ""
+        if before_version is None or (version.isdigit() and int(version) < before_version):
+            path.unlink(missing_ok=True)
+
+
+async def _project_version(project_id: str) -> Optional[int]:
+    redis = get_redis()
+    key = f"share:version:{project_id}"
+    if redis:
+        try:
+            cached = await redis.get(key)
+            if cached is not None:
+                return int(cached)
+        except Exception:
+            redis = None
+
+    doc = await Project.get_motor_collection().find_one({"_id": ObjectId(project_id)}, {"version": 1})
+    if not doc:
+        return None
+    version = doc.get("version", 0)
+    if redis:
+        try:
+            await redis.setex(key, SHARE_VERSION_TTL, version)
+        except Exception:
+            pass
+    return version
+
+
+async def _build_payload(project_id: str, version: int, path: Path) -> None:
+    project = await Project.get(PydanticObjectId(project_id))
+    if not project:
+        raise FileNotFoundError("Projet introuvable")
+
+    # Positions de la variante active, comme la vue projet
+    graph_data = project.graph_data or {}
+    if graph_data and project.topology_key and project.algorithm != graph_data.get("algorithm_used"):
+        variant = await get_variant(project_id, project.algorithm, project.topology_key)
+        if variant:
+            graph_data = apply_positions(graph_data, variant.positions)
+
+    payload = {
+        "id": project_id,
+        "name": project.name,
+        "created_at": project.created_at,
+        "updated_at": project.updated_at,
+        "metadata": project.metadata or {},
+        "graph_data": graph_data,
+        "mapping": project.mapping or {},
+        "is_shared": True
+    }
+
+    def write():
+        content = orjson.dumps(clean_nans(payload))
+        SHARE_PAYLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        # La version précédente peut encore être servie (version en cache Redis) : on la garde
+        drop_shared_payloads(project_id, before_version=version - 1)
+
+    await asyncio.to_thread(write)
+
+
+async def shared_payload_path(project_id: str) -> Optional[Path]:
+    """
+    Fichier JSON de la réponse partagée pour la version courante du projet
+    (construit au premier accès ; les accès concurrents attendent la même construction).
+    """
+    version = await _project_version(project_id)
+    if version is None:
+        return None
+    path = _payload_path(project_id, version)
+    if path.exists():
+        return path
+
+    key = f"{project_id}.{version}"
+    task = _builds.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_build_payload(project_id, version, path))
+        _builds[key] = task
+        task.add_done_callback(lambda _: _builds.pop(key, None))
+    try:
+        await task
+    except FileNotFoundError:
+        return None
+    return path
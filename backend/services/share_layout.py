@@ -0,0 +1,110 @@
+"""
+Layouts de prévisualisation des projets partagés.
+
+`POST /share/{token}/layout` est accessible sans authentification : un calcul
+n'y est lancé que si nécessaire, et de façon bornée.
+
+- Cache : le layout calculé est enregistré comme variante du projet (par
+  topologie et algorithme) ; une demande déjà servie est renvoyée
+  immédiatement, sans job.
+- Coalescence : les demandes identiques concurrentes (même projet, topologie
+  et algorithme) rejoignent le même job, réservé dans Redis par SET NX.
+- Budget : chaque nouveau calcul est décompté par token et par adresse IP,
+  sur une fenêtre fixe (SHARE_LAYOUT_WINDOW) ; au-delà, la demande est
+  refusée (429). Les budgets sont vérifiés tous ensemble avant d'être
+  décomptés (script Lua atomique) : une demande refusée ne consomme rien.
+  Rejoindre un job en cours ou lire le cache ne coûte rien.
+"""
+
+import os
+from typing import Optional, Tuple
+
+from core.redis_client import get_redis
+
+
+SHARE_LAYOUT_TOKEN_BUDGET = int(os.getenv("SHARE_LAYOUT_TOKEN_BUDGET", "20"))  # Calculs par token et par fenêtre
+SHARE_LAYOUT_IP_BUDGET = int(os.getenv("SHARE_LAYOUT_IP_BUDGET", "10"))  # Calculs par adresse IP et par fenêtre
+SHARE_LAYOUT_WINDOW = int(os.getenv("SHARE_LAYOUT_WINDOW", "3600"))  # secondes
+SHARE_LAYOUT_JOB_TTL = 900  # Réservation maximale d'un job (libérée par le job à sa fin)
+
+# KEYS : compteurs ; ARGV : limite de chaque compteur, puis durée de la fenêtre.
+# Retourne {1, 0} si le calcul est décompté, {0, ttl du compteur épuisé} sinon.
+_CHARGE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if tonumber(redis.call('GET', key) or '0') >= tonumber(ARGV[i]) then
+        return {0, redis.call('TTL', key)}
+    end
+end
+for _, key in ipairs(KEYS) do
+    if redis.call('INCR', key) == 1 then
+        redis.call('EXPIRE', key, ARGV[#ARGV])
+    end
+end
+return {1, 0}
+"""
+
+
+def inflight_key(project_id: str, topology_key: str, algorithm: str) -> str:
+    """Clé Redis du job de prévisualisation en cours (partagée avec les workers)."""
+    return f"share:layout:{project_id}:{topology_key}:{algorithm}"
+
+
+async def inflight_job(key: str) -> Optional[str]:
+    """Identifiant du job en cours pour cette demande, s'il existe."""
+    redis = get_redis()
+    if not redis:
+        return None
+    try:
+        return await redis.get(key)
+    except Exception:
+        return None
+
+
+async def claim_job(key: str, job_id: str) -> Optional[str]:
+    """
+    Réserve la demande pour `job_id`. Retourne None si la réservation est
+    obtenue (le job doit être lancé), sinon l'identifiant du job concurrent.
+    """
+    redis = get_redis()
+    if not redis:
+        return None
+    try:
+        if await redis.set(key, job_id, nx=True, ex=SHARE_LAYOUT_JOB_TTL):
+            return None
+        return await redis.get(key)
+    except Exception:
+        return None
+
+
+async def release_job(key: str) -> None:
+    redis = get_redis()
+    if redis:
+        try:
+            await redis.delete(key)
+        except Exception:
+            pass
+
+
+async def charge_budget(token: str, client_ip: Optional[str]) -> Tuple[bool, int]:
+    """
+    Décompte un nouveau calcul pour le token et l'adresse IP, si aucun des
+    deux budgets n'est épuisé. Retourne (autorisé, secondes avant la fin de la fenêtre).
+    """
+    redis = get_redis()
+    if not redis:
+        return True, 0
+
+    budgets = [(f"share:budget:token:{token}", SHARE_LAYOUT_TOKEN_BUDGET)]
+    if client_ip:
+        budgets.append((f"share:budget:ip:{client_ip}", SHARE_LAYOUT_IP_BUDGET))
+
+    try:
+        allowed, ttl = await redis.eval(
+            _CHARGE_SCRIPT, len(budgets),
+            *(key for key, _ in budgets), *(limit for _, limit in budgets), SHARE_LAYOUT_WINDOW
+        )
+    except Exception:
+        return True, 0
+    if not allowed:
+        return False, int(ttl) if int(ttl) > 0 else SHARE_LAYOUT_WINDOW
+    return True, 0
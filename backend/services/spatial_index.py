@@ -0,0 +1,200 @@
+"""
+Index spatial des positions d'une variante de layout (grille 3D uniforme).
+
+À l'écriture d'une variante, la boîte englobante des nœuds est découpée en
+GRID_RESOLUTION³ cellules et la cellule de chaque nœud est stockée avec la
+variante (uint16, 2 octets par nœud). L'API en déduit un index trié par
+cellule (tri par comptage) : une requête par boîte ou par frustum ne teste
+que les nœuds des cellules qui l'intersectent.
+
+Les nœuds retournés sont classés par importance (degré, ou une colonne
+analytique déjà calculée) et bornés : le client XR charge d'abord les nœuds
+structurants de la zone visible, puis affine.
+"""
+
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from services.project_cache import ProjectCache
+
+
+GRID_RESOLUTION = 32  # Cellules par axe (32³ = 32768, indexable en uint16)
+CELL_DTYPE = np.dtype("<u2")
+SPATIAL_CACHE_BYTES = int(float(os.getenv("SPATIAL_CACHE_MB", "512")) * 1024 * 1024)
+CHUNK_MAX_NODES = 50_000
+CHUNK_MAX_EDGES = 200_000
+
+
+def grid_bounds(positions: np.ndarray) -> List[float]:
+    """Boîte englobante [min_x, min_y, min_z, max_x, max_y, max_z] des positions."""
+    if len(positions) == 0:
+        return [0.0] * 6
+    finite = positions[np.isfinite(positions).all(axis=1)]
+    if len(finite) == 0:
+        return [0.0] * 6
+    return finite.min(axis=0).tolist() + finite.max(axis=0).tolist()
+
+
+def _cell_coords(positions: np.ndarray, bounds: List[float]) -> np.ndarray:
+    lo = np.asarray(bounds[:3])
+    span = np.maximum(np.asarray(bounds[3:]) - lo, 1e-9)
+    coords = np.floor((positions - lo) / span * GRID_RESOLUTION)
+    return np.clip(np.nan_to_num(coords), 0, GRID_RESOLUTION - 1).astype(np.int64)
+
+
+def grid_cells(positions: np.ndarray, bounds: List[float]) -> bytes:
+    """Cellule (x·R² + y·R + z) de chaque nœud, en buffer uint16 little-endian."""
+    coords = _cell_coords(positions, bounds)
+    cells = (coords[:, 0] * GRID_RESOLUTION + coords[:, 1]) * GRID_RESOLUTION + coords[:, 2]
+    return cells.astype(CELL_DTYPE).tobytes()
+
+
+def _check_planes(planes: List[List[float]]) -> np.ndarray:
+    planes = np.asarray(planes, dtype=np.float64)
+    if planes.ndim != 2 or planes.shape[1] != 4 or not 1 <= len(planes) <= 6:
+        raise ValueError("Le frustum attend de 1 à 6 plans [a, b, c, d] (intérieur : a·x + b·y + c·z + d >= 0)")
+    return planes
+
+
+class SpatialGrid:
+    """Positions d'une variante et nœuds triés par cellule (format CSR)."""
+
+    def __init__(self, positions: np.ndarray, bounds: List[float], cells: np.ndarray):
+        self.positions = positions
+        self.bounds = bounds
+        self.order = np.argsort(cells, kind="stable").astype(np.int32)
+        counts = np.bincount(cells, minlength=GRID_RESOLUTION ** 3)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        lo = np.asarray(bounds[:3])
+        self.cell_size = np.maximum(np.asarray(bounds[3:]) - lo, 1e-9) / GRID_RESOLUTION
+        axis = np.arange(GRID_RESOLUTION)
+        ix, iy, iz = np.meshgrid(axis, axis, axis, indexing="ij")
+        self.cell_min = lo + np.column_stack([ix.ravel(), iy.ravel(), iz.ravel()]) * self.cell_size
+
+    @property
+    def nbytes(self) -> int:
+        return self.positions.nbytes + self.order.nbytes + self.offsets.nbytes + self.cell_min.nbytes
+
+    @classmethod
+    def from_variant(cls, positions: np.ndarray, bounds: Optional[List[float]], cells: Optional[bytes]) -> "SpatialGrid":
+        """Grille stockée avec la variante, ou recalculée (variantes antérieures à l'index)."""
+        if bounds is None or cells is None:
+            bounds = grid_bounds(positions)
+            cells = grid_cells(positions, bounds)
+        return cls(positions, bounds, np.frombuffer(cells, dtype=CELL_DTYPE).astype(np.int64))
+
+    def summary(self) -> Dict[str, Any]:
+        counts = np.diff(self.offsets)
+        return {
+            "bounds": self.bounds,
+            "resolution": GRID_RESOLUTION,
+            "cell_size": self.cell_size.tolist(),
+            "occupied_cells": int(np.count_nonzero(counts)),
+            "max_cell_nodes": int(counts.max()) if len(counts) else 0
+        }
+
+    def _nodes_in_cells(self, cells: np.ndarray) -> np.ndarray:
+        starts, ends = self.offsets[cells], self.offsets[cells + 1]
+        lengths = ends - starts
+        if lengths.sum() == 0:
+            return np.zeros(0, dtype=np.int64)
+        # Concaténation vectorisée des plages [start, end) de chaque cellule
+        shifts = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return self.order[np.arange(lengths.sum()) + shifts].astype(np.int64)
+
+    def query_box(self, box_min: List[float], box_max: List[float]) -> np.ndarray:
+        """Indices des nœuds dans la boîte [box_min, box_max]."""
+        box_min, box_max = np.asarray(box_min, dtype=np.float64), np.asarray(box_max, dtype=np.float64)
+        if box_min.shape != (3,) or box_max.shape != (3,) or (box_min > box_max).any():
+            raise ValueError("La boîte attend min [x, y, z] <= max [x, y, z]")
+        overlap = ((self.cell_min <= box_max) & (self.cell_min + self.cell_size >= box_min)).all(axis=1)
+        candidates = self._nodes_in_cells(np.flatnonzero(overlap))
+        points = self.positions[candidates]
+        inside = ((points >= box_min) & (points <= box_max)).all(axis=1)
+        return candidates[inside]
+
+    def query_frustum(self, planes: List[List[float]]) -> np.ndarray:
+        """Indices des nœuds du côté intérieur de tous les plans."""
+        planes = _check_planes(planes)
+        normals, offsets = planes[:, :3], planes[:, 3]
+        # Sommet de chaque cellule le plus avancé selon la normale : s'il est dehors, toute la cellule l'est
+        farthest = self.cell_min[:, None, :] + (normals[None, :, :] > 0) * self.cell_size
+        overlap = ((farthest * normals[None, :, :]).sum(axis=2) + offsets >= 0).all(axis=1)
+        candidates = self._nodes_in_cells(np.flatnonzero(overlap))
+        inside = ((self.positions[candidates] @ normals.T) + offsets >= 0).all(axis=1)
+        return candidates[inside]
+
+
+def chunk_payload(
+    grid: SpatialGrid,
+    nodes: np.ndarray,
+    importance: np.ndarray,
+    limit: int,
+    topology=None,
+    incident: bool = False
+) -> Dict[str, Any]:
+    """
+    Nœuds retenus (classés par importance) et arêtes : internes à la zone,
+    ou incidentes (`incident`) avec la position des extrémités extérieures.
+    """
+    total = len(nodes)
+    if total > limit:
+        top = np.argpartition(-importance[nodes], limit - 1)[:limit]
+        nodes = nodes[top]
+    nodes = nodes[np.argsort(-importance[nodes], kind="stable")]
+
+    payload = {
+        "nodes": nodes.tolist(),
+        "positions": grid.positions[nodes].round(4).tolist(),
+        "importance": importance[nodes].tolist(),
+        "total": total,
+        "truncated": total > limit
+    }
+    if topology is None:
+        return payload
+
+    selected = np.zeros(topology.num_nodes, dtype=bool)
+    selected[nodes] = True
+    rows = topology.adjacency[nodes].tocoo()
+    sources, targets = nodes[rows.row], rows.col
+    # Arête interne vue depuis ses deux extrémités : gardée une fois (u < v)
+    keep = ~selected[targets] if incident else np.zeros(len(targets), dtype=bool)
+    keep |= selected[targets] & (sources < targets)
+    edges = np.column_stack([sources[keep], targets[keep]])[:CHUNK_MAX_EDGES]
+    payload["edges"] = edges.tolist()
+    payload["edges_truncated"] = bool(keep.sum() > CHUNK_MAX_EDGES)
+
+    if incident:
+        external = np.unique(edges[:, 1][~selected[edges[:, 1]]])
+        payload["external_nodes"] = external.tolist()
+        payload["external_positions"] = grid.positions[external].round(4).tolist()
+    return payload
+
+
+class VariantGrids:
+    """Grilles des variantes d'un projet, par (algorithme, paramètres) et date d'écriture."""
+
+    def __init__(self):
+        self._grids: Dict[Tuple[str, str], Tuple[Any, SpatialGrid]] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(grid.nbytes for _, grid in self._grids.values())
+
+    def get(self, key: Tuple[str, str], stamp: Any) -> Optional[SpatialGrid]:
+        cached = self._grids.get(key)
+        return cached[1] if cached and cached[0] == stamp else None
+
+    def put(self, key: Tuple[str, str], stamp: Any, grid: SpatialGrid) -> None:
+        self._grids[key] = (stamp, grid)
+
+
+async def _new_grids(project_id: str) -> VariantGrids:
+    # Entrée vide au chargement : chaque grille ajoutée est décomptée via spatial_cache.touch
+    return VariantGrids()
+
+
+spatial_cache = ProjectCache(_new_grids, SPATIAL_CACHE_BYTES)
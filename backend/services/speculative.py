@@ -0,0 +1,107 @@
+"""
+Précalcul spéculatif des layouts alternatifs.
+
+Quand les workers sont inactifs, on précalcule pour les projets récemment
+ouverts les variantes de layout les plus susceptibles d'être demandées
+ensuite. Ces calculs passent par une file Celery dédiée, basse priorité,
+et sont interrompus dès qu'un calcul "au premier plan" est lancé.
+"""
+
+import os
+import time
+from typing import Dict, List, Iterable
+
+from core.redis_client import get_redis
+from services.layout_selection import fits_budget
+
+
+# File Celery dédiée aux calculs spéculatifs
+SPECULATIVE_QUEUE = "speculative"
+
+# Clés Redis partagées entre l'API et les workers
+RECENT_PROJECTS_KEY = "speculative:recent"  # ZSET project_id -> timestamp d'ouverture
+LAYOUT_CHOICES_KEY = "speculative:choices"  # HASH algorithm -> nombre de demandes
+INFLIGHT_KEY = "speculative:inflight"  # SET des task_id spéculatifs en cours
+FOREGROUND_ACTIVE_KEY = "jobs:foreground:active"  # ZSET task_id -> début des tâches de premier plan
+
+# Réglages (surchargeables par variables d'environnement)
+RECENT_WINDOW_SECONDS = int(os.getenv("SPECULATIVE_RECENT_WINDOW_SECONDS", str(24 * 3600)))
+RECENT_MAX_PROJECTS = 500
+STORAGE_BUDGET_BYTES = int(float(os.getenv("SPECULATIVE_STORAGE_BUDGET_MB", "512")) * 1024 * 1024)
+JOBS_PER_TICK = int(os.getenv("SPECULATIVE_JOBS_PER_TICK", "1"))
+
+# Poids a priori quand aucun choix utilisateur n'a encore été observé
+DEFAULT_ALGORITHM_WEIGHTS = {
+    "fruchterman_reingold": 5,
+    "force_atlas": 4,
+    "drl": 4,
+    "kamada_kawai": 3,
+    "sphere": 2,
+    "grid": 1,
+    "random": 1,
+}
+
+
+def rank_candidate_algorithms(
+    node_count: int,
+    edge_count: int,
+    choice_counts: Dict[str, int],
+    exclude: Iterable[str] = ()
+) -> List[str]:
+    """
+    Classe les algorithmes à précalculer pour un graphe de taille donnée.
+
+    Les algorithmes dont le coût prédit (modèle de layout_selection) dépasse
+    le budget d'un layout sont écartés, les autres sont triés par nombre de
+    demandes observées (puis par poids a priori en cas d'égalité).
+    """
+    excluded = set(exclude)
+    candidates = []
+    for algorithm in DEFAULT_ALGORITHM_WEIGHTS:
+        if algorithm in excluded:
+            continue
+        if not fits_budget(algorithm, node_count, edge_count):
+            continue
+        observed = int(choice_counts.get(algorithm, 0))
+        candidates.append((observed, DEFAULT_ALGORITHM_WEIGHTS.get(algorithm, 0), algorithm))
+
+    candidates.sort(reverse=True)
+    return [algorithm for _, _, algorithm in candidates]
+
+
+async def record_project_open(project_id: str) -> None:
+    """Mémorise l'ouverture d'un projet (alimente la liste des projets récents)."""
+    redis = get_redis()
+    if not redis:
+        return
+    try:
+        await redis.zadd(RECENT_PROJECTS_KEY, {project_id: time.time()})
+        await redis.zremrangebyrank(RECENT_PROJECTS_KEY, 0, -RECENT_MAX_PROJECTS - 1)
+    except Exception:
+        pass
+
+
+async def record_layout_choice(algorithm: str) -> None:
+    """Comptabilise un choix d'algorithme fait par un utilisateur."""
+    redis = get_redis()
+    if not redis or algorithm == "auto":
+        return
+    try:
+        await redis.hincrby(LAYOUT_CHOICES_KEY, algorithm, 1)
+    except Exception:
+        pass
+
+
+async def preempt_speculative_jobs() -> None:
+    """Interrompt les calculs spéculatifs en cours pour libérer les workers."""
+    redis = get_redis()
+    if not redis:
+        return
+    try:
+        task_ids = await redis.smembers(INFLIGHT_KEY)
+        if task_ids:
+            from celery_app import celery_app
+            celery_app.control.revoke(list(task_ids), terminate=True, signal="SIGTERM")
+            await redis.srem(INFLIGHT_KEY, *task_ids)
+    except Exception:
+        pass
@@ -0,0 +1,169 @@
+"""
+Extraction de sous-graphes (ego-network, prédicat d'attribut, communauté)
+et spatialisation limitée au sous-graphe.
+
+Un sous-graphe est décrit par les indices (triés) de ses nœuds dans
+`graph_data["nodes"]` du projet parent ; ses arêtes sont celles du
+sous-graphe induit, lues dans l'adjacence en cache (voir topology).
+Un projet dérivé ne stocke que ces indices et ses variantes de positions :
+les attributs et la topologie restent ceux du parent.
+"""
+
+import hashlib
+import operator
+import os
+from typing import Dict, Any, List, Optional
+
+import networkx as nx
+import numpy as np
+
+from services.graph_service import apply_layout
+from services.graph_metrics import compute_nx_metrics, graph_arrays
+from services.layout_selection import (
+    fits_budget, compute_structural_features, select_algorithm, predict_cost, load_calibration
+)
+from services.topology import ProjectTopology
+
+
+SUBGRAPH_MAX_NODES = int(os.getenv("SUBGRAPH_MAX_NODES", "20000"))
+SUBGRAPH_LAYOUT_BUDGET_SECONDS = float(os.getenv("SUBGRAPH_LAYOUT_BUDGET_SECONDS", "30"))
+# Au-delà de ce temps prédit, le layout passe par Celery : igraph et NetworkX
+# gardent le GIL et bloqueraient la boucle d'événements de l'API
+SUBGRAPH_INLINE_SECONDS = float(os.getenv("SUBGRAPH_INLINE_SECONDS", "2"))
+
+PREDICATE_OPS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda value, expected: value in expected,
+    "contains": lambda value, expected: str(expected).lower() in str(value).lower(),
+}
+
+POSITION_KEYS = ("x", "y", "z")
+
+
+def match_predicate(node_docs: List[Dict[str, Any]], attribute: str, op: str, value: Any) -> np.ndarray:
+    """Indices des nœuds dont l'attribut vérifie le prédicat (valeurs absentes ou incomparables exclues)."""
+    if op not in PREDICATE_OPS:
+        raise ValueError(f"Opérateur inconnu: {op} (disponibles: {', '.join(PREDICATE_OPS)})")
+    if op == "in" and not isinstance(value, list):
+        raise ValueError("L'opérateur 'in' attend une liste de valeurs")
+
+    test = PREDICATE_OPS[op]
+    matches = []
+    for i, node in enumerate(node_docs):
+        current = node.get(attribute)
+        if current is None:
+            continue
+        try:
+            if test(current, value):
+                matches.append(i)
+        except TypeError:
+            continue
+    return np.asarray(matches, dtype=np.int64)
+
+
+def check_layout_size(algorithm: str, node_count: int, edge_count: Optional[int] = None) -> None:
+    """
+    Rejette les sous-graphes vides ou trop grands, puis (arêtes connues) ceux
+    dont le coût prédit pour l'algorithme demandé dépasse le budget d'un layout.
+    """
+    if node_count == 0:
+        raise ValueError("Le sous-graphe est vide")
+    if node_count > SUBGRAPH_MAX_NODES:
+        raise ValueError(f"Sous-graphe trop grand ({node_count} nœuds, maximum {SUBGRAPH_MAX_NODES})")
+    if edge_count is not None and algorithm != "auto" and not fits_budget(algorithm, node_count, edge_count):
+        raise ValueError(f"{algorithm} est trop coûteux pour ce sous-graphe ({node_count} nœuds, {edge_count} arêtes)")
+
+
+def predict_subgraph_layout(topology: ProjectTopology, nodes: np.ndarray, algorithm: str = "auto") -> Dict[str, Any]:
+    """
+    Valide la taille du sous-graphe et prédit le temps de son layout
+    ({"seconds", "edge_count"}), sans construire le graphe NetworkX.
+
+    Raises:
+        ValueError: sous-graphe vide, trop grand ou trop coûteux pour l'algorithme
+    """
+    check_layout_size(algorithm, len(nodes))
+    edges, _ = topology.induced_edges(nodes)
+    check_layout_size(algorithm, len(nodes), len(edges))
+
+    if algorithm == "auto":
+        features = compute_structural_features(len(nodes), np.searchsorted(nodes, edges))
+        _, prediction = select_algorithm(features, time_budget=SUBGRAPH_LAYOUT_BUDGET_SECONDS)
+        seconds = prediction["predicted_seconds"]
+    else:
+        calibration = load_calibration()
+        features = {"node_count": len(nodes), "edge_count": len(edges)}
+        seconds = predict_cost(algorithm, features, calibration)["seconds"] if algorithm in calibration["algorithms"] else 0.0
+    return {"seconds": seconds, "edge_count": int(len(edges))}
+
+
+def derive_topology_key(parent_topology_key: str, nodes: np.ndarray) -> str:
+    """Empreinte d'un sous-graphe : topologie du parent + ensemble des nœuds retenus."""
+    digest = hashlib.sha1(parent_topology_key.encode())
+    digest.update(np.asarray(nodes, dtype="<i8").tobytes())
+    return digest.hexdigest()
+
+
+def build_subgraph(topology: ProjectTopology, nodes: np.ndarray, node_docs: List[Dict[str, Any]]) -> nx.Graph:
+    """
+    Graphe NetworkX induit par `nodes` (indices triés), nœuds insérés dans
+    cet ordre avec les attributs du parent (positions exclues).
+    """
+    G = nx.Graph()
+    ids = []
+    for index in nodes.tolist():
+        attrs = {k: v for k, v in node_docs[index].items() if k != "id" and k not in POSITION_KEYS}
+        node_id = node_docs[index].get("id", index)
+        G.add_node(node_id, **attrs)
+        ids.append(node_id)
+
+    edges, weights = topology.induced_edges(nodes)
+    local = np.searchsorted(nodes, edges)
+    for (u, v), w in zip(local.tolist(), weights.tolist()):
+        G.add_edge(ids[u], ids[v], weight=w)
+    return G
+
+
+def subgraph_graph_data(
+    G: nx.Graph,
+    nodes: np.ndarray,
+    algorithm_used: Optional[str],
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Sérialise un sous-graphe au format de `project.graph_data` (métriques calculées si absentes)."""
+    data = nx.node_link_data(G, edges="links")
+    metadata = dict(metadata) if metadata else compute_nx_metrics(G)
+    if "layout_selection" in G.graph:
+        metadata["layout_selection"] = G.graph["layout_selection"]
+    if "layout_fallback" in G.graph:
+        metadata["layout_fallback"] = G.graph["layout_fallback"]
+    return {
+        "metadata": metadata,
+        "nodes": data["nodes"],
+        "edges": data["links"],
+        "indices": nodes.tolist(),
+        "format": "subgraph",
+        "algorithm_used": algorithm_used
+    }
+
+
+def layout_subgraph(
+    topology: ProjectTopology,
+    nodes: np.ndarray,
+    node_docs: List[Dict[str, Any]],
+    algorithm: str = "auto"
+) -> Dict[str, Any]:
+    """Construit le sous-graphe et le spatialise seul (bloquant : à exécuter dans un thread)."""
+    check_layout_size(algorithm, len(nodes))
+    G = build_subgraph(topology, nodes, node_docs)
+    check_layout_size(algorithm, len(nodes), G.number_of_edges())
+    arrays = graph_arrays(G)
+    metadata = compute_nx_metrics(G, arrays)
+    resolved = apply_layout(G, algorithm=algorithm, time_budget=SUBGRAPH_LAYOUT_BUDGET_SECONDS, arrays=arrays, metrics=metadata)
+    return subgraph_graph_data(G, nodes, resolved or algorithm, metadata)
+
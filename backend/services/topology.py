@@ -0,0 +1,158 @@
+"""
+Requêtes topologiques côté serveur sur une adjacence CSR mise en cache.
+
+L'adjacence (symétrique, SciPy CSR) d'un projet est construite une fois à
+partir de `graph_data`, puis conservée en mémoire dans un cache LRU borné
+en octets (`TOPOLOGY_CACHE_MB`), indexé par projet et empreinte de topologie :
+un nouveau fichier ou mapping invalide naturellement l'entrée.
+
+Les nœuds sont désignés par leur indice dans `graph_data["nodes"]` (le même
+ordre que les buffers de positions et les colonnes analytiques).
+"""
+
+import asyncio
+import os
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+from models.project import Project
+from services.graph_metrics import graph_data_arrays
+from services.project_cache import ProjectCache
+
+
+TOPOLOGY_CACHE_BYTES = int(float(os.getenv("TOPOLOGY_CACHE_MB", "1024")) * 1024 * 1024)
+MAX_HOPS = 5
+DEFAULT_MAX_NODES = 100_000  # Taille maximale d'une réponse (nœuds)
+
+
+class ProjectTopology:
+    """Adjacence CSR non orientée d'un projet, avec composantes calculées à la demande."""
+
+    def __init__(self, num_nodes: int, edges: np.ndarray, weights: np.ndarray):
+        self.num_nodes = num_nodes
+        lengths = np.where(np.isfinite(weights) & (weights > 0), weights, 1.0)
+        rows = np.concatenate([edges[:, 0], edges[:, 1]])
+        cols = np.concatenate([edges[:, 1], edges[:, 0]])
+        self.adjacency = csr_matrix(
+            (np.concatenate([lengths, lengths]), (rows, cols)),
+            shape=(num_nodes, num_nodes)
+        )
+        self._labels: Optional[np.ndarray] = None
+
+    @property
+    def nbytes(self) -> int:
+        adj = self.adjacency
+        labels = self._labels.nbytes if self._labels is not None else self.num_nodes * 4
+        return adj.data.nbytes + adj.indices.nbytes + adj.indptr.nbytes + labels
+
+    def check_nodes(self, nodes) -> np.ndarray:
+        nodes = np.asarray(nodes, dtype=np.int64).ravel()
+        if len(nodes) and (nodes.min() < 0 or nodes.max() >= self.num_nodes):
+            raise ValueError(f"Indice de nœud hors limites (0..{self.num_nodes - 1})")
+        return nodes
+
+    def neighbors(self, nodes: np.ndarray) -> np.ndarray:
+        """Voisins (avec répétitions) d'un ensemble de nœuds."""
+        return self.adjacency[nodes].indices
+
+    def neighborhood(self, seeds, hops: int, max_nodes: int = DEFAULT_MAX_NODES) -> Dict[str, Any]:
+        """
+        Voisinage à k sauts (BFS par fronts, vectorisé).
+
+        Returns:
+            nodes (ordre de découverte), hops (distance de chaque nœud), truncated
+        """
+        seeds = np.unique(self.check_nodes(seeds))
+        distance = np.full(self.num_nodes, -1, dtype=np.int16)
+        distance[seeds] = 0
+        order = [seeds]
+        found = len(seeds)
+        frontier = seeds
+        truncated = False
+
+        for hop in range(1, hops + 1):
+            if len(frontier) == 0:
+                break
+            candidates = np.unique(self.neighbors(frontier))
+            frontier = candidates[distance[candidates] < 0]
+            if found + len(frontier) > max_nodes:
+                frontier = frontier[:max(max_nodes - found, 0)]
+                truncated = True
+            distance[frontier] = hop
+            order.append(frontier)
+            found += len(frontier)
+            if truncated:
+                break
+
+        nodes = np.concatenate(order)
+        return {"nodes": nodes.tolist(), "hops": distance[nodes].tolist(), "truncated": truncated}
+
+    def path(self, source: int, target: int, weighted: bool = False) -> Dict[str, Any]:
+        """Plus court chemin (en sauts, ou pondéré : le poids est une longueur)."""
+        source, target = self.check_nodes([source, target]).tolist()
+        dist, predecessors = dijkstra(
+            self.adjacency, directed=False, indices=source,
+            unweighted=not weighted, return_predecessors=True
+        )
+        if not np.isfinite(dist[target]):
+            return {"nodes": [], "length": None}
+
+        nodes = [target]
+        while nodes[-1] != source:
+            nodes.append(int(predecessors[nodes[-1]]))
+        nodes.reverse()
+        return {"nodes": nodes, "length": float(dist[target])}
+
+    def component_labels(self) -> np.ndarray:
+        if self._labels is None:
+            self._labels = connected_components(self.adjacency, directed=False)[1].astype(np.int32)
+        return self._labels
+
+    def component(self, node: int, max_nodes: int = DEFAULT_MAX_NODES) -> Dict[str, Any]:
+        """Composante connexe contenant un nœud."""
+        node = int(self.check_nodes([node])[0])
+        labels = self.component_labels()
+        members = np.flatnonzero(labels == labels[node])
+        return {
+            "nodes": members[:max_nodes].tolist(),
+            "size": int(len(members)),
+            "truncated": bool(len(members) > max_nodes)
+        }
+
+    def induced_edges(self, nodes) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Arêtes (u <= v, en indices globaux) du sous-graphe induit par un
+        ensemble de nœuds, avec leurs poids.
+        """
+        nodes = np.unique(self.check_nodes(nodes))
+        sub = self.adjacency[nodes][:, nodes].tocoo()
+        upper = sub.row <= sub.col
+        edges = np.column_stack([nodes[sub.row[upper]], nodes[sub.col[upper]]])
+        return edges, sub.data[upper]
+
+    def subgraph(self, nodes) -> Dict[str, Any]:
+        nodes = np.unique(self.check_nodes(nodes))
+        edges, _ = self.induced_edges(nodes)
+        return {"nodes": nodes.tolist(), "edges": edges.tolist()}
+
+
+async def load_topology(project_id: str) -> ProjectTopology:
+    """Charge uniquement les identifiants et extrémités des arêtes, puis construit la CSR dans un thread."""
+    doc = await Project.get_motor_collection().find_one(
+        {"_id": ObjectId(project_id)},
+        {"graph_data.nodes.id": 1, "graph_data.edges.source": 1, "graph_data.edges.target": 1, "graph_data.edges.weight": 1}
+    )
+    graph_data = (doc or {}).get("graph_data") or {}
+
+    def build():
+        arrays = graph_data_arrays(graph_data)
+        return ProjectTopology(len(arrays.node_keys), arrays.edges, arrays.weights)
+
+    return await asyncio.to_thread(build)
+
+
+topology_cache = ProjectCache(load_topology, TOPOLOGY_CACHE_BYTES)
@@ -9,7 +9,14 @@ if "/app" not in sys.path:
     sys.path.insert(0, "/app")
 
 from celery_app import celery_app
+from celery.signals import task_prerun, task_postrun, worker_init, worker_process_shutdown
 from models.project import Project
+from models.layout_variant import LayoutVariant
+from models.profile_artifact import ProfileArtifact
+from models.node_column import NodeColumn
+from models.user import User
+from models.stats_snapshot import StatsSnapshot
+from models.share_link import ShareLink
 from beanie import init_beanie
 import motor.motor_asyncio
 import os
@@ -17,9 +24,132 @@ from pathlib import Path
 import asyncio
 import networkx as nx
 import polars as pl
+import numpy as np
 import orjson
 from datetime import datetime, timezone
 from services.graph_service import apply_layout
+from services.graph_metrics import graph_arrays, compute_nx_metrics, graph_data_arrays
+from services.graph_analytics import validate_metrics, metric_params, build_igraph, compute_node_metric, summarize_column
+from services.node_columns import save_column, existing_column_keys, delete_columns
+from services.search_index import build_and_save as build_search_index
+from services.facets import nodes_frame, compute_facets
+from services.lod import build_and_save as build_lod, LOD_MIN_NODES
+from services.project_store import update_project_fields, ProjectConflict
+from services.backbone import extract_backbone, save_backbone, validate_method, BACKBONE_EDGE_BUDGET
+from services.preview import build_preview, save_preview
+from services.gallery import GENERATION_KEY as GALLERY_GENERATION_KEY
+from services.profiling import JobProfiler, save_artifact
+from services.admin_stats import record_snapshot
+from services.project_expiry import purge_expired_projects
+from core.metrics import StageRecorder, record_job, start_metrics_server, mark_process_dead
+from services.layout_variants import (
+    compute_topology_key, make_params_key, save_variant, get_variant, delete_variants,
+    list_variant_algorithms, speculative_storage_bytes, evict_speculative_variants, pack_positions, unpack_positions,
+    VARIANT_BYTES_PER_NODE
+)
+from services.speculative import (
+    RECENT_PROJECTS_KEY, LAYOUT_CHOICES_KEY, INFLIGHT_KEY, FOREGROUND_ACTIVE_KEY,
+    RECENT_WINDOW_SECONDS, STORAGE_BUDGET_BYTES, JOBS_PER_TICK,
+    rank_candidate_algorithms
+)
+from services.share_layout import inflight_key as share_layout_key
+from services.subgraph import layout_subgraph
+from services.topology import load_topology
+import time
+import redis
+from bson import ObjectId
+from loguru import logger
+
+
+FOREGROUND_TASKS = {
+    "tasks.async_process_graph_file", "tasks.shared_layout_preview", "tasks.subgraph_layout",
+    "tasks.compute_graph_analytics", "tasks.extract_graph_backbone"
+}
+FOREGROUND_MAX_SECONDS = 6 * 3600  # Au-delà, une entrée est considérée comme orpheline (worker tué)
+SAVE_ATTEMPTS = 3  # Écriture du résultat d'un job en cas de modification concurrente du projet
+
+_redis_client = None
+
+
+def _get_redis() -> redis.Redis:
+    """Client Redis synchrone partagé par les tâches du worker."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            decode_responses=True
+        )
+    return _redis_client
+
+
+def _run_in_db(async_fn, document_models: list):
+    """Exécute une coroutine Beanie dans une boucle dédiée (workers Celery synchrones)."""
+    mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+    db_name = os.getenv("MONGODB_DB", "pe_def_db")
+    client = motor.motor_asyncio.AsyncIOMotorClient(mongo_uri)
+    db = client[db_name]
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    async def runner():
+        await init_beanie(database=db, document_models=document_models)
+        return await async_fn()
+
+    try:
+        return loop.run_until_complete(runner())
+    finally:
+        loop.close()
+        client.close()
+
+
+@worker_init.connect
+def _start_worker_metrics(**kwargs):
+    """Expose les métriques Prometheus du worker (agrégées sur les processus enfants)."""
+    port = os.getenv("CELERY_METRICS_PORT")
+    if not port:
+        return
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        # Repartir d'un répertoire vide : les fichiers d'un ancien worker fausseraient les compteurs
+        Path(multiproc_dir).mkdir(parents=True, exist_ok=True)
+        for stale in Path(multiproc_dir).glob("*.db"):
+            stale.unlink(missing_ok=True)
+    start_metrics_server(int(port))
+
+
+@worker_process_shutdown.connect
+def _release_worker_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
+@task_prerun.connect
+def _track_foreground_start(sender=None, task_id=None, **kwargs):
+    """Enregistre les tâches de premier plan en cours (utilisé pour détecter l'inactivité)."""
+    if sender is not None and sender.name in FOREGROUND_TASKS:
+        try:
+            _get_redis().zadd(FOREGROUND_ACTIVE_KEY, {task_id: time.time()})
+        except Exception:
+            pass
+
+
+@task_postrun.connect
+def _track_foreground_end(sender=None, task_id=None, **kwargs):
+    if sender is not None and sender.name in FOREGROUND_TASKS:
+        try:
+            _get_redis().zrem(FOREGROUND_ACTIVE_KEY, task_id)
+        except Exception:
+            pass
+
+
+def _workers_idle(r: redis.Redis) -> bool:
+    """Vrai si aucune tâche de premier plan n'est en attente ni en cours."""
+    r.zremrangebyscore(FOREGROUND_ACTIVE_KEY, "-inf", time.time() - FOREGROUND_MAX_SECONDS)
+    return r.llen("celery") == 0 and r.zcard(FOREGROUND_ACTIVE_KEY) == 0
+
+
+def _graph_counts(G: nx.Graph) -> dict:
+    return {"nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
 
 
 def _read_csv_safe(file_path: Path, n_rows: int = None) -> pl.DataFrame:
@@ -48,10 +178,13 @@ def _read_csv_safe(file_path: Path, n_rows: int = None) -> pl.DataFrame:
     raise ValueError(f"Impossible de lire le fichier CSV. Dernière erreur: {str(last_error)}")
 
 
-def _process_csv_graph_sync(file_path: Path, mapping: dict, algorithm: str = "auto") -> dict:
+def _process_csv_graph_sync(file_path: Path, mapping: dict, algorithm: str = "auto", time_budget: float = None, recorder: StageRecorder = None) -> dict:
     """Version synchrone du traitement CSV pour Celery."""
+    recorder = recorder or StageRecorder("csv")
     
-    df = _read_csv_safe(file_path)
+    with recorder.stage("parse") as span:
+        df = _read_csv_safe(file_path)
+        span["rows"] = df.height
     
     src_col = mapping.get('source')
     tgt_col = mapping.get('target')
@@ -61,39 +194,46 @@ def _process_csv_graph_sync(file_path: Path, mapping: dict, algorithm: str = "au
         raise ValueError("Les colonnes source et target sont requises")
     
     G = nx.Graph()
+    edge_rows = 0  # Lignes d'arêtes valides, doublons compris
     
-    for row in df.iter_rows(named=True):
-        source = row[src_col]
-        target = row[tgt_col]
-        
-        weight = 1.0
-        if weight_col and weight_col in row:
-            val = row[weight_col]
-            if val is not None and str(val).strip() != "":
-                try:
-                    weight = float(val)
-                except (ValueError, TypeError):
-                    weight = 1.0
-        
-        if source is not None and target is not None and str(source).strip() != "" and str(target).strip() != "":
-            G.add_edge(source, target, weight=weight)
+    with recorder.stage("build") as span:
+        for row in df.iter_rows(named=True):
+            source = row[src_col]
+            target = row[tgt_col]
+            
+            weight = 1.0
+            if weight_col and weight_col in row:
+                val = row[weight_col]
+                if val is not None and str(val).strip() != "":
+                    try:
+                        weight = float(val)
+                    except (ValueError, TypeError):
+                        weight = 1.0
+            
+            if source is not None and target is not None and str(source).strip() != "" and str(target).strip() != "":
+                G.add_edge(source, target, weight=weight)
+                edge_rows += 1
+        span.update(_graph_counts(G))
     
-    # Check connectivity based on graph type
-    is_connected = False
-    if G.number_of_nodes() > 0:
-        is_connected = nx.is_weakly_connected(G) if G.is_directed() else nx.is_connected(G)
+    with recorder.stage("metrics", **_graph_counts(G)):
+        arrays = graph_arrays(G)
+        metadata = {
+            **compute_nx_metrics(G, arrays, input_edge_rows=edge_rows),
+            "columns": df.columns
+        }
     
-    metadata = {
-        "node_count": G.number_of_nodes(),
-        "edge_count": G.number_of_edges(),
-        "density": nx.density(G),
-        "is_connected": is_connected,
-        "avg_degree": sum(dict(G.degree()).values()) / G.number_of_nodes() if G.number_of_nodes() > 0 else 0,
-        "columns": df.columns
-    }
+    with recorder.stage("layout", **_graph_counts(G)) as span:
+        resolved_algorithm = apply_layout(G, algorithm=algorithm, time_budget=time_budget, arrays=arrays, metrics=metadata)
+        span["algorithm"] = resolved_algorithm
+        if "layout_fallback" in G.graph:
+            span["fallback_from"] = G.graph["layout_fallback"]["requested"]
+    if "layout_selection" in G.graph:
+        metadata["layout_selection"] = G.graph["layout_selection"]
+    if "layout_fallback" in G.graph:
+        metadata["layout_fallback"] = G.graph["layout_fallback"]
     
-    resolved_algorithm = apply_layout(G, algorithm=algorithm)
-    graph_data = nx.node_link_data(G, edges="links")
+    with recorder.stage("serialize", **_graph_counts(G)):
+        graph_data = nx.node_link_data(G, edges="links")
     
     return {
         "metadata": metadata,
@@ -104,11 +244,13 @@ def _process_csv_graph_sync(file_path: Path, mapping: dict, algorithm: str = "au
     }
 
 
-def _process_json_graph_sync(file_path: Path, mapping: dict, algorithm: str = "auto") -> dict:
+def _process_json_graph_sync(file_path: Path, mapping: dict, algorithm: str = "auto", time_budget: float = None, recorder: StageRecorder = None) -> dict:
     """Version synchrone du traitement JSON pour Celery."""
+    recorder = recorder or StageRecorder("json")
     
-    with open(file_path, 'rb') as f:
-        content = orjson.loads(f.read())
+    with recorder.stage("parse"):
+        with open(file_path, 'rb') as f:
+            content = orjson.loads(f.read())
     
     if isinstance(content, dict) and 'nodes' in content:
         nodes = content['nodes']
@@ -121,52 +263,59 @@ def _process_json_graph_sync(file_path: Path, mapping: dict, algorithm: str = "a
              # existing code flow expects edges.
              pass
 
-        if edges is not None:
-             G = nx.Graph()
+        edge_rows = 0
+        with recorder.stage("build") as span:
+            if edges is not None:
+                 G = nx.Graph()
              
-             for node in nodes:
-                 node_id = node.get('id')
-                 if node_id:
-                     G.add_node(node_id, **{k: v for k, v in node.items() if k != 'id'})
+                 for node in nodes:
+                     node_id = node.get('id')
+                     if node_id:
+                         G.add_node(node_id, **{k: v for k, v in node.items() if k != 'id'})
              
-             src_col = mapping.get('source') or 'source'
-             tgt_col = mapping.get('target') or 'target'
-             weight_col = mapping.get('weight') or 'weight'
+                 src_col = mapping.get('source') or 'source'
+                 tgt_col = mapping.get('target') or 'target'
+                 weight_col = mapping.get('weight') or 'weight'
              
-             # Fallback: if user didn't specify mapping and 'weight' not found, try 'value' (common in D3)
-             if not mapping.get('weight') and edges and 'value' in edges[0]:
-                 weight_col = 'value'
+                 # Fallback: if user didn't specify mapping and 'weight' not found, try 'value' (common in D3)
+                 if not mapping.get('weight') and edges and 'value' in edges[0]:
+                     weight_col = 'value'
              
-             for edge in edges:
-                 source = edge.get(src_col)
-                 target = edge.get(tgt_col)
-                 weight = edge.get(weight_col, 1.0)
+                 for edge in edges:
+                     source = edge.get(src_col)
+                     target = edge.get(tgt_col)
+                     weight = edge.get(weight_col, 1.0)
                  
-                 if source is not None and target is not None and str(source).strip() != "" and str(target).strip() != "":
-                     try:
-                         w = float(weight) if weight else 1.0
-                     except (ValueError, TypeError):
-                         w = 1.0
-                     G.add_edge(source, target, weight=w)
+                     if source is not None and target is not None and str(source).strip() != "" and str(target).strip() != "":
+                         try:
+                             w = float(weight) if weight else 1.0
+                         except (ValueError, TypeError):
+                             w = 1.0
+                         G.add_edge(source, target, weight=w)
+                         edge_rows += 1
              
-             edge_keys = list(edges[0].keys()) if edges else []
+                 edge_keys = list(edges[0].keys()) if edges else []
+                 span.update(_graph_counts(G))
 
-        # Check connectivity based on graph type
-        is_connected = False
-        if G.number_of_nodes() > 0:
-            is_connected = nx.is_weakly_connected(G) if G.is_directed() else nx.is_connected(G)
+        with recorder.stage("metrics", **_graph_counts(G)):
+            arrays = graph_arrays(G)
+            metadata = {
+                **compute_nx_metrics(G, arrays, input_edge_rows=edge_rows),
+                "columns": edge_keys
+            }
         
-        metadata = {
-            "node_count": G.number_of_nodes(),
-            "edge_count": G.number_of_edges(),
-            "density": nx.density(G),
-            "is_connected": is_connected,
-            "avg_degree": sum(dict(G.degree()).values()) / G.number_of_nodes() if G.number_of_nodes() > 0 else 0,
-            "columns": edge_keys
-        }
+        with recorder.stage("layout", **_graph_counts(G)) as span:
+            resolved_algorithm = apply_layout(G, algorithm=algorithm, time_budget=time_budget, arrays=arrays, metrics=metadata)
+            span["algorithm"] = resolved_algorithm
+            if "layout_fallback" in G.graph:
+                span["fallback_from"] = G.graph["layout_fallback"]["requested"]
+        if "layout_selection" in G.graph:
+            metadata["layout_selection"] = G.graph["layout_selection"]
+        if "layout_fallback" in G.graph:
+            metadata["layout_fallback"] = G.graph["layout_fallback"]
         
-        resolved_algorithm = apply_layout(G, algorithm=algorithm)
-        graph_data = nx.node_link_data(G, edges="links")
+        with recorder.stage("serialize", **_graph_counts(G)):
+            graph_data = nx.node_link_data(G, edges="links")
         
         used_mapping = {
             "source": src_col,
@@ -196,37 +345,44 @@ def _process_json_graph_sync(file_path: Path, mapping: dict, algorithm: str = "a
             raise ValueError("Les colonnes source et target sont requises")
         
         G = nx.Graph()
+        edge_rows = 0
         
-        for row in content:
-            source = row.get(src_col)
-            target = row.get(tgt_col)
-            weight = row.get(weight_col, 1.0)
+        with recorder.stage("build") as span:
+            for row in content:
+                source = row.get(src_col)
+                target = row.get(tgt_col)
+                weight = row.get(weight_col, 1.0)
             
-            if source is not None and target is not None and str(source).strip() != "" and str(target).strip() != "":
-                try:
-                    w = float(weight) if weight else 1.0
-                except (ValueError, TypeError):
-                    w = 1.0
-                G.add_edge(source, target, weight=w)
+                if source is not None and target is not None and str(source).strip() != "" and str(target).strip() != "":
+                    try:
+                        w = float(weight) if weight else 1.0
+                    except (ValueError, TypeError):
+                        w = 1.0
+                    G.add_edge(source, target, weight=w)
+                    edge_rows += 1
+            span.update(_graph_counts(G))
         
         edge_keys = list(content[0].keys()) if content else []
 
-        # Check connectivity based on graph type
-        is_connected = False
-        if G.number_of_nodes() > 0:
-            is_connected = nx.is_weakly_connected(G) if G.is_directed() else nx.is_connected(G)
+        with recorder.stage("metrics", **_graph_counts(G)):
+            arrays = graph_arrays(G)
+            metadata = {
+                **compute_nx_metrics(G, arrays, input_edge_rows=edge_rows),
+                "columns": edge_keys
+            }
         
-        metadata = {
-            "node_count": G.number_of_nodes(),
-            "edge_count": G.number_of_edges(),
-            "density": nx.density(G),
-            "is_connected": is_connected,
-            "avg_degree": sum(dict(G.degree()).values()) / G.number_of_nodes() if G.number_of_nodes() > 0 else 0,
-            "columns": edge_keys
-        }
+        with recorder.stage("layout", **_graph_counts(G)) as span:
+            resolved_algorithm = apply_layout(G, algorithm=algorithm, time_budget=time_budget, arrays=arrays, metrics=metadata)
+            span["algorithm"] = resolved_algorithm
+            if "layout_fallback" in G.graph:
+                span["fallback_from"] = G.graph["layout_fallback"]["requested"]
+        if "layout_selection" in G.graph:
+            metadata["layout_selection"] = G.graph["layout_selection"]
+        if "layout_fallback" in G.graph:
+            metadata["layout_fallback"] = G.graph["layout_fallback"]
         
-        resolved_algorithm = apply_layout(G, algorithm=algorithm)
-        graph_data = nx.node_link_data(G, edges="links")
+        with recorder.stage("serialize", **_graph_counts(G)):
+            graph_data = nx.node_link_data(G, edges="links")
         
         used_mapping = {
             "source": src_col,
@@ -247,8 +403,9 @@ def _process_json_graph_sync(file_path: Path, mapping: dict, algorithm: str = "a
         raise ValueError("Format JSON non reconnu")
 
 
-def _process_gexf_graph_sync(file_path: Path, mapping: dict, algorithm: str = "auto") -> dict:
+def _process_gexf_graph_sync(file_path: Path, mapping: dict, algorithm: str = "auto", time_budget: float = None, recorder: StageRecorder = None) -> dict:
     """Version synchrone du traitement GEXF pour Celery."""
+    recorder = recorder or StageRecorder("gexf")
     from io import BytesIO
     import re
     
@@ -278,52 +435,57 @@ def _process_gexf_graph_sync(file_path: Path, mapping: dict, algorithm: str = "a
         cleaned = ''.join(char if is_valid_xml_char(char) else ' ' for char in text)
         return cleaned.encode('utf-8')
     
-    try:
-        # Try direct parsing first
-        G = nx.read_gexf(file_path)
-    except Exception as first_error:
+    # Lecture XML et construction du graphe sont indissociables avec read_gexf
+    with recorder.stage("parse") as span:
         try:
-            # Read and sanitize content
-            with open(file_path, 'rb') as f:
-                content = f.read()
+            # Try direct parsing first
+            G = nx.read_gexf(file_path)
+        except Exception as first_error:
+            try:
+                # Read and sanitize content
+                with open(file_path, 'rb') as f:
+                    content = f.read()
             
-            # Try version fix first
-            if b'version="1.3"' in content:
-                content = content.replace(b'version="1.3"', b'version="1.2"')
-                content = content.replace(b'http://www.gexf.net/1.3', b'http://www.gexf.net/1.2draft')
+                # Try version fix first
+                if b'version="1.3"' in content:
+                    content = content.replace(b'version="1.3"', b'version="1.2"')
+                    content = content.replace(b'http://www.gexf.net/1.3', b'http://www.gexf.net/1.2draft')
             
-            # Sanitize XML
-            content = sanitize_xml_content(content)
+                # Sanitize XML
+                content = sanitize_xml_content(content)
             
-            # Try parsing sanitized content
-            G = nx.read_gexf(BytesIO(content))
-        except Exception as e:
-            # Provide more helpful error message
-            error_msg = str(first_error) if len(str(first_error)) < 200 else str(e)
-            raise ValueError(f"Impossible de lire le fichier GEXF. Le fichier contient des caractères invalides ou un format XML incorrect. Erreur: {error_msg}")
+                # Try parsing sanitized content
+                G = nx.read_gexf(BytesIO(content))
+            except Exception as e:
+                # Provide more helpful error message
+                error_msg = str(first_error) if len(str(first_error)) < 200 else str(e)
+                raise ValueError(f"Impossible de lire le fichier GEXF. Le fichier contient des caractères invalides ou un format XML incorrect. Erreur: {error_msg}")
+        span.update(_graph_counts(G))
     
     for node, data in G.nodes(data=True):
         for k, v in data.items():
             if isinstance(v, (set, tuple)):
                 data[k] = list(v)
                 
-    # Check connectivity based on graph type
-    is_connected = False
-    if G.number_of_nodes() > 0:
-        is_connected = nx.is_weakly_connected(G) if G.is_directed() else nx.is_connected(G)
-    
-    metadata = {
-        "node_count": G.number_of_nodes(),
-        "edge_count": G.number_of_edges(),
-        "density": nx.density(G),
-        "is_connected": is_connected,
-        "avg_degree": sum(dict(G.degree()).values()) / G.number_of_nodes() if G.number_of_nodes() > 0 else 0,
-        "columns": []
-    }
+    with recorder.stage("metrics", **_graph_counts(G)):
+        arrays = graph_arrays(G)
+        metadata = {
+            **compute_nx_metrics(G, arrays),
+            "columns": []
+        }
     
-    resolved_algorithm = apply_layout(G, algorithm=algorithm)
+    with recorder.stage("layout", **_graph_counts(G)) as span:
+        resolved_algorithm = apply_layout(G, algorithm=algorithm, time_budget=time_budget, arrays=arrays, metrics=metadata)
+        span["algorithm"] = resolved_algorithm
+        if "layout_fallback" in G.graph:
+            span["fallback_from"] = G.graph["layout_fallback"]["requested"]
+    if "layout_selection" in G.graph:
+        metadata["layout_selection"] = G.graph["layout_selection"]
+    if "layout_fallback" in G.graph:
+        metadata["layout_fallback"] = G.graph["layout_fallback"]
     
-    graph_data = nx.node_link_data(G, edges="links")
+    with recorder.stage("serialize", **_graph_counts(G)):
+        graph_data = nx.node_link_data(G, edges="links")
     
     return {
         "metadata": metadata,
@@ -334,33 +496,110 @@ def _process_gexf_graph_sync(file_path: Path, mapping: dict, algorithm: str = "a
     }
 
 
-def process_graph_file_sync(file_path: Path, mapping: dict, algorithm: str = "auto") -> dict:
+def process_graph_file_sync(file_path: Path, mapping: dict, algorithm: str = "auto", time_budget: float = None, recorder: StageRecorder = None) -> dict:
     """
     Traite un fichier de graphe de façon SYNCHRONE (pour Celery workers).
+
+    Les spans de chaque étape (parse, build, metrics, layout, serialize) sont
+    ajoutés à `metadata["stages"]`.
     """
     file_ext = file_path.suffix.lower()
+    recorder = recorder or StageRecorder(file_ext.lstrip("."))
     
     if file_ext == '.csv':
-        return _process_csv_graph_sync(file_path, mapping, algorithm)
+        result = _process_csv_graph_sync(file_path, mapping, algorithm, time_budget, recorder)
     elif file_ext == '.json':
-        return _process_json_graph_sync(file_path, mapping, algorithm)
+        result = _process_json_graph_sync(file_path, mapping, algorithm, time_budget, recorder)
     elif file_ext == '.gexf':
-        return _process_gexf_graph_sync(file_path, mapping, algorithm)
+        result = _process_gexf_graph_sync(file_path, mapping, algorithm, time_budget, recorder)
     else:
         raise ValueError(f"Format de fichier non supporté: {file_ext}")
 
+    result["metadata"]["stages"] = recorder.spans
+    return result
+
+
+def _build_sidecars(project_id: str, result: dict, file_path: str, topology_key: str, counts: dict, recorder: StageRecorder) -> dict:
+    """
+    Construit les fichiers et résumés dérivés du graphe (index de recherche,
+    facettes, hiérarchie LOD). Aucun n'est bloquant : un échec est journalisé.
+    """
+    sidecars = {"search_index_path": None, "lod_path": None, "metadata": {}}
+
+    # Index de recherche des nœuds (non bloquant : la recherche sait le reconstruire)
+    try:
+        with recorder.stage("search_index", **counts):
+            sidecars["search_index_path"], sidecars["metadata"]["search"] = build_search_index(result["nodes"], file_path, topology_key)
+    except Exception as e:
+        logger.warning(f"Index de recherche non construit pour le projet {project_id}: {e}")
+
+    # Facettes des attributs de nœuds pour le panneau de filtres
+    try:
+        with recorder.stage("facets", **counts):
+            sidecars["metadata"]["facets"] = compute_facets(nodes_frame(result["nodes"]))
+    except Exception as e:
+        logger.warning(f"Facettes non calculées pour le projet {project_id}: {e}")
+
+    # Hiérarchie LOD des grands graphes (affichage progressif par super-nœuds)
+    if counts["nodes"] >= LOD_MIN_NODES:
+        try:
+            with recorder.stage("lod", **counts):
+                sidecars["lod_path"], sidecars["metadata"]["lod"] = build_lod(graph_data_arrays(result), file_path, topology_key)
+        except Exception as e:
+            logger.warning(f"Hiérarchie LOD non construite pour le projet {project_id}: {e}")
+    return sidecars
+
+
+def _render_preview(project_id: str, positions, edges, file_path: str, topology_key: str, algorithm: str, recorder: StageRecorder):
+    """
+    Vignette et nuage de points réduit du layout (non bloquant : un échec est
+    journalisé). Retourne (chemin, résumé) ou None.
+    """
+    try:
+        with recorder.stage("preview", nodes=len(positions), edges=len(edges)):
+            png, points, summary = build_preview(positions, edges, algorithm)
+            return save_preview(png, points, summary, file_path, topology_key), summary
+    except Exception as e:
+        logger.warning(f"Aperçu non généré pour le projet {project_id}: {e}")
+        return None
+
+
+def _invalidate_gallery() -> None:
+    """Rend obsolètes les pages de galerie en cache (aperçu d'un projet publié modifié)."""
+    try:
+        _get_redis().incr(GALLERY_GENERATION_KEY)
+    except Exception as e:
+        logger.warning(f"Cache de la galerie non invalidé: {e}")
+
 
 @celery_app.task(bind=True, name="tasks.async_process_graph_file")
-def async_process_graph_file(self, file_path: str, mapping: dict, algorithm: str = "auto", project_id: str = None, is_new_project: bool = True):
+def async_process_graph_file(self, file_path: str, mapping: dict, algorithm: str = "auto", project_id: str = None, is_new_project: bool = True, layout_only: bool = False, time_budget: float = None, profile: str = None, analytics: list = None, backbone: str = None):
     """
     Tâche Celery pour traiter un graphe volumineux de façon asynchrone 
     et sauvegarder le résultat dans le projet.
+
+    Avec `layout_only=True` (changement d'algorithme sur une topologie inchangée),
+    seule la variante de positions est écrite : graph_data n'est pas réécrit.
+    `time_budget` (secondes) borne le coût prédit de l'algorithme choisi en mode "auto".
+    Les spans de chaque étape, sauvegarde Mongo comprise, sont stockés dans
+    `metadata.stages` et exportés en métriques Prometheus.
+    `profile` (origine : "admin", "user" ou "sampled") active le profilage du
+    job ; l'artefact est enregistré dans `profile_artifacts`.
+    `analytics` (liste de métriques, voir graph_analytics) lance ensuite
+    `compute_graph_analytics` sur le graphe sauvegardé, `backbone` (méthode,
+    voir services.backbone) lance `extract_graph_backbone`.
     """
+    recorder = StageRecorder(Path(file_path).suffix.lower().lstrip("."))
+    profiler = JobProfiler() if profile else None
+    if profiler:
+        profiler.start()
+    job_status = "failure"
     try:
         abs_path = Path(file_path)
         
         # Traitement synchrone du graphe
-        result = process_graph_file_sync(abs_path, mapping, algorithm)
+        result = process_graph_file_sync(abs_path, mapping, algorithm, time_budget, recorder)
+        counts = {"nodes": result["metadata"]["node_count"], "edges": result["metadata"]["edge_count"]}
         
         # Persistance automatique du résultat dans le projet
         if project_id:
@@ -374,24 +613,119 @@ def async_process_graph_file(self, file_path: str, mapping: dict, algorithm: str
             asyncio.set_event_loop(loop)
             
             async def update_project():
-                await init_beanie(database=db, document_models=[Project])
-                project = await Project.get(project_id)
-                if project:
-                    project.graph_data = result
-                    project.metadata = result.get("metadata", {})
-                    project.updated_at = datetime.now(timezone.utc)
-                    # Utiliser l'algorithme résolu (après "auto") au lieu de l'argument original
-                    project.algorithm = result.get("algorithm_used", algorithm)
-                    
+                await init_beanie(database=db, document_models=[Project, LayoutVariant, NodeColumn])
+                resolved_algorithm = result.get("algorithm_used", algorithm)
+                topology_key = compute_topology_key(file_path, result.get("mapping") or mapping)
+                sidecars = None
+                preview = None
+
+                # Concurrence optimiste : si le projet change entre la lecture et l'écriture
+                # (autre job, renommage...), on relit et on réapplique sans écraser ses champs
+                for attempt in range(SAVE_ATTEMPTS):
+                    doc = await Project.get_motor_collection().find_one(
+                        {"_id": ObjectId(project_id)},
+                        {
+                            "topology_key": 1, "mapping": 1, "version": 1, "metadata.backbone": 1,
+                            "search_index_path": 1, "lod_path": 1, "backbone_path": 1,
+                            "preview_path": 1, "is_featured": 1
+                        }
+                    )
+                    if not doc:
+                        return
+                    version = doc.get("version", 0)
+
+                    # Aperçus (vignette, nuage de points) du layout : calculés une seule fois
+                    if preview is None:
+                        preview = _render_preview(
+                            project_id, unpack_positions(pack_positions(result["nodes"])),
+                            graph_data_arrays(result).edges, file_path, topology_key, resolved_algorithm, recorder
+                        ) or (None, None)
+                    preview_path, preview_summary = preview
+                    preview_fields = {"preview_path": preview_path, "preview_key": preview_summary and preview_summary["key"]}
+                    stale_paths = [doc["preview_path"]] if doc.get("preview_path") and doc["preview_path"] != preview_path else []
+
+                    # Changement de layout seul : on n'écrit que les positions (N x 12 octets)
+                    if layout_only and doc.get("topology_key") == topology_key:
+                        with recorder.stage("save", **counts):
+                            await save_variant(project_id, resolved_algorithm, topology_key, result["nodes"])
+                        try:
+                            await update_project_fields(project_id, {
+                                Project.algorithm: resolved_algorithm,
+                                Project.updated_at: datetime.now(timezone.utc),
+                                "metadata.stages": recorder.spans,
+                                "metadata.preview": preview_summary,
+                                **preview_fields
+                            }, version)
+                        except ProjectConflict:
+                            logger.warning(f"Projet {project_id} modifié pendant l'écriture (tentative {attempt + 1})")
+                            continue
+                        for path in stale_paths:
+                            Path(path).unlink(missing_ok=True)
+                        if doc.get("is_featured"):
+                            _invalidate_gallery()
+                        return
+
+                    # Fichiers dérivés de la topologie : construits une seule fois, quel que soit le nombre de tentatives
+                    if sidecars is None:
+                        sidecars = _build_sidecars(project_id, result, file_path, topology_key, counts, recorder)
+
+                    metadata = {**result.get("metadata", {}), **sidecars["metadata"]}
+                    fields = {
+                        "graph_data": result,
+                        "node_count": counts["nodes"],
+                        "edge_count": counts["edges"],
+                        "updated_at": datetime.now(timezone.utc),
+                        # Utiliser l'algorithme résolu (après "auto") au lieu de l'argument original
+                        "algorithm": resolved_algorithm,
+                        "topology_key": topology_key,
+                        "search_index_path": sidecars["search_index_path"],
+                        "lod_path": sidecars["lod_path"],
+                        **preview_fields
+                    }
+
+                    # Le squelette d'arêtes reste valable tant que la topologie ne change pas
+                    backbone_summary = (doc.get("metadata") or {}).get("backbone")
+                    if doc.get("backbone_path") and doc.get("topology_key") != topology_key:
+                        stale_paths.append(doc["backbone_path"])
+                        fields["backbone_path"] = None
+                    elif backbone_summary:
+                        metadata["backbone"] = backbone_summary
+                    metadata["preview"] = preview_summary
+                    fields["metadata"] = metadata
+                    for key in ("search_index_path", "lod_path"):
+                        if doc.get(key) and doc[key] != fields[key]:
+                            stale_paths.append(doc[key])
+
                     # Si c'était un nouveau projet sans mapping explicite, sauver le mapping utilisé
                     # On priorise le mapping retourné par la fonction de traitement (qui contient les valeurs par défaut utilisées)
                     result_mapping = result.get("mapping")
                     if result_mapping:
-                        project.mapping = result_mapping
-                    elif not project.mapping and mapping: 
-                        project.mapping = mapping
-                    
-                    await project.save()
+                        fields["mapping"] = result_mapping
+                    elif not doc.get("mapping") and mapping:
+                        fields["mapping"] = mapping
+
+                    with recorder.stage("save", **counts):
+                        try:
+                            await update_project_fields(project_id, fields, version)
+                        except ProjectConflict:
+                            logger.warning(f"Projet {project_id} modifié pendant l'écriture (tentative {attempt + 1})")
+                            continue
+
+                        # Les variantes d'une ancienne topologie ne sont plus applicables
+                        await delete_variants(project_id, keep_topology_key=topology_key)
+                        await delete_columns(project_id, keep_topology_key=topology_key)
+                        await save_variant(project_id, resolved_algorithm, topology_key, result["nodes"])
+
+                    for path in stale_paths:
+                        Path(path).unlink(missing_ok=True)
+
+                    # Le span "save" n'existe qu'après l'écriture : mise à jour ciblée
+                    await update_project_fields(project_id, {"metadata.stages": recorder.spans})
+                    if doc.get("is_featured"):
+                        _invalidate_gallery()
+                    return
+
+                raise ProjectConflict(f"Projet {project_id} modifié en continu, résultat non enregistré")
             
             try:
                 loop.run_until_complete(update_project())
@@ -399,11 +733,22 @@ def async_process_graph_file(self, file_path: str, mapping: dict, algorithm: str
                 loop.close()
                 client.close()
         
+        record_job("success", recorder.format, counts["edges"])
+        logger.info(f"Projet {project_id} traité ({recorder.format}): " + ", ".join(
+            f"{span['stage']}={span['seconds']}s" for span in recorder.spans
+        ))
+
+        # Métriques analytiques optionnelles : tâche séparée, le graphe est déjà consultable
+        if project_id and analytics and not layout_only:
+            compute_graph_analytics.delay(project_id, analytics)
+        if project_id and backbone and not layout_only:
+            extract_graph_backbone.delay(project_id, backbone)
+        job_status = "success"
         return {"status": "SUCCESS", "result": result}
         
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        record_job("failure", recorder.format)
+        logger.exception(f"Echec du traitement du projet {project_id} (étapes: {recorder.spans})")
         
         # Nettoyage: supprimer le projet UNIQUEMENT si c'est un NOUVEAU projet
         if project_id and is_new_project:
@@ -417,17 +762,20 @@ def async_process_graph_file(self, file_path: str, mapping: dict, algorithm: str
                 asyncio.set_event_loop(loop)
                 
                 async def cleanup_project():
-                    await init_beanie(database=db, document_models=[Project])
+                    await init_beanie(database=db, document_models=[Project, LayoutVariant, NodeColumn])
                     project = await Project.get(project_id)
                     if project:
-                        # Supprimer le fichier source si possible
-                        if project.source_file_path:
-                            try:
-                                Path(project.source_file_path).unlink(missing_ok=True)
-                            except Exception:
-                                pass
+                        # Supprimer le fichier source (et son index) si possible
+                        for path in (project.source_file_path, project.search_index_path, project.lod_path, project.backbone_path, project.preview_path):
+                            if path:
+                                try:
+                                    Path(path).unlink(missing_ok=True)
+                                except Exception:
+                                    pass
                         await project.delete()
-                        print(f"Projet {project_id} supprimé après échec du traitement (Nouveau Projet)")
+                        await delete_variants(project_id)
+                        await delete_columns(project_id)
+                        logger.info(f"Projet {project_id} supprimé après échec du traitement (Nouveau Projet)")
                 
                 try:
                     loop.run_until_complete(cleanup_project())
@@ -435,68 +783,465 @@ def async_process_graph_file(self, file_path: str, mapping: dict, algorithm: str
                     loop.close()
                     client.close()
             except Exception as cleanup_error:
-                print(f"Erreur lors du nettoyage du projet: {str(cleanup_error)}")
+                logger.error(f"Erreur lors du nettoyage du projet: {str(cleanup_error)}")
         else:
-             print(f"Echec du traitement pour le projet {project_id} (Non supprimé car existant). Erreur: {e}")
+             logger.warning(f"Echec du traitement pour le projet {project_id} (Non supprimé car existant). Erreur: {e}")
         
 
         return {"status": "FAILURE", "error": str(e)}
 
+    finally:
+        if profiler:
+            _store_profile(profiler.stop(), self.request.id, project_id, profile, job_status, algorithm, recorder)
+
+
+def _store_profile(report: dict, task_id: str, project_id: str, trigger: str, job_status: str, algorithm: str, recorder: StageRecorder) -> None:
+    """Enregistre l'artefact de profilage d'un job (sans jamais faire échouer le job)."""
+    counts = next((span for span in recorder.spans if "nodes" in span), {})
+    layout_span = next((span for span in recorder.spans if span["stage"] == "layout"), {})
+
+    async def store():
+        user_id = None
+        if project_id and ObjectId.is_valid(project_id):
+            doc = await Project.get_motor_collection().find_one({"_id": ObjectId(project_id)}, {"owner": 1})
+            if doc and doc.get("owner") is not None:
+                user_id = str(doc["owner"].id)
+        await save_artifact(
+            report,
+            task_id=task_id,
+            project_id=project_id,
+            user_id=user_id,
+            trigger=trigger,
+            status=job_status,
+            format=recorder.format,
+            algorithm=layout_span.get("algorithm", algorithm),
+            node_count=counts.get("nodes", 0),
+            edge_count=counts.get("edges", 0),
+            stages=recorder.spans
+        )
+
+    try:
+        _run_in_db(store, [Project, ProfileArtifact])
+        logger.info(f"Profil du job {task_id} enregistré ({report['samples']} échantillons)")
+    except Exception as e:
+        logger.error(f"Impossible d'enregistrer le profil du job {task_id}: {e}")
+
 
 @celery_app.task(name="tasks.cleanup_expired_free_projects")
 def cleanup_expired_free_projects():
     """
-    Tâche périodique (Celery Beat) pour supprimer les projets des utilisateurs Free
-    qui sont plus vieux que 6 heures.
+    Tâche périodique (Celery Beat) : supprime les projets du plan Free échus
+    (`expires_at` dépassé, voir services.project_expiry), par lots.
     """
     try:
-        mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
-        db_name = os.getenv("MONGODB_DB", "pe_def_db")
-        client = motor.motor_asyncio.AsyncIOMotorClient(mongo_uri)
-        db = client[db_name]
-        
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        async def run_cleanup():
-            from models.user import User  # Import local pour éviter cycle
-            await init_beanie(database=db, document_models=[Project, User])
-            
-            # Date limite de 6h
-            from datetime import timedelta
-            cutoff = datetime.now(timezone.utc) - timedelta(hours=6)
-            
-            # 1. Trouver projets vieux > 6h
-            expired_candidates = await Project.find(
-                Project.created_at < cutoff
-            ).to_list()
-            
-            deleted_count = 0
-            
-            for project in expired_candidates:
-                # 2. Vérifier si le owner est Free
-                owner = await project.owner.fetch()
-                if owner and not owner.is_elite and not owner.is_superuser:
-                    # Supprimer fichiers associés si nécessaire
-                    if project.source_file_path:
-                        try:
-                            Path(project.source_file_path).unlink(missing_ok=True)
-                        except Exception:
-                            pass
-                            
-                    await project.delete()
-                    deleted_count += 1
-            
-            if deleted_count > 0:
-                print(f"[Cleanup] Supprimé {deleted_count} projets expirés (Free Plan > 6h)")
+        deleted_count = _run_in_db(purge_expired_projects, [Project, LayoutVariant, NodeColumn, ShareLink])
+        if deleted_count > 0:
+            # Pas de client Redis async dans le worker : pages de la galerie invalidées ici
+            _get_redis().incr(GALLERY_GENERATION_KEY)
+            logger.info(f"[Cleanup] Supprimé {deleted_count} projets expirés (Free Plan)")
+        return {"status": "SUCCESS", "deleted": deleted_count}
+    except Exception as e:
+        logger.exception(f"Erreur lors du cleanup périodique: {e}")
+        return {"status": "FAILURE", "error": str(e)}
+
 
+@celery_app.task(name="tasks.snapshot_admin_stats")
+def snapshot_admin_stats():
+    """
+    Tâche périodique (Celery Beat, toutes les heures) : relevé des compteurs
+    d'administration dans la collection time-series `stats_snapshots`.
+    """
+    try:
+        snapshot = _run_in_db(record_snapshot, [User, Project, StatsSnapshot])
+        return {"status": "SUCCESS", "timestamp": snapshot.timestamp.isoformat()}
+    except Exception as e:
+        logger.exception("Echec du relevé des statistiques d'administration")
+        return {"status": "FAILURE", "error": str(e)}
+
+
+@celery_app.task(name="tasks.schedule_speculative_layouts")
+def schedule_speculative_layouts():
+    """
+    Tâche périodique (Celery Beat) : si les workers sont inactifs, planifie le
+    précalcul des layouts les plus probables pour les projets récemment ouverts.
+    """
+    try:
+        r = _get_redis()
+        if not _workers_idle(r) or r.scard(INFLIGHT_KEY) > 0:
+            return {"status": "SKIPPED", "reason": "busy"}
+
+        since = time.time() - RECENT_WINDOW_SECONDS
+        recent_ids = [
+            pid for pid in r.zrevrangebyscore(RECENT_PROJECTS_KEY, "+inf", since, start=0, num=50)
+            if ObjectId.is_valid(pid)
+        ]
+        if not recent_ids:
+            return {"status": "SKIPPED", "reason": "no_recent_projects"}
+
+        choice_counts = {k: int(v) for k, v in r.hgetall(LAYOUT_CHOICES_KEY).items()}
+
+        async def plan():
+            budget_left = STORAGE_BUDGET_BYTES - await speculative_storage_bytes()
+            docs = await Project.get_motor_collection().find(
+                {"_id": {"$in": [ObjectId(pid) for pid in recent_ids]}, "topology_key": {"$ne": None}},
+                {"node_count": 1, "edge_count": 1, "topology_key": 1, "source_file_path": 1}
+            ).to_list(None)
+
+            # Petits graphes d'abord (gain rapide), puis les plus récemment ouverts
+            recency = {pid: rank for rank, pid in enumerate(recent_ids)}
+            docs.sort(key=lambda d: (d.get("node_count", 0), recency.get(str(d["_id"]), 0)))
+
+            jobs = []
+            for doc in docs:
+                if len(jobs) >= JOBS_PER_TICK:
+                    break
+                if not doc.get("source_file_path") or not Path(doc["source_file_path"]).exists():
+                    continue
+
+                node_count = doc.get("node_count", 0)
+                cost = node_count * VARIANT_BYTES_PER_NODE
+                if cost > budget_left:
+                    # Budget plein : on libère les précalculs jamais consultés les plus anciens
+                    budget_left += await evict_speculative_variants(cost - budget_left)
+                    if cost > budget_left:
+                        continue
+
+                existing = await list_variant_algorithms(str(doc["_id"]), doc["topology_key"])
+                candidates = rank_candidate_algorithms(node_count, doc.get("edge_count", 0), choice_counts, exclude=existing)
+                if candidates:
+                    jobs.append((str(doc["_id"]), candidates[0]))
+                    budget_left -= cost
+            return jobs
+
+        jobs = _run_in_db(plan, [Project, LayoutVariant])
+
+        for project_id, algorithm in jobs:
+            speculative_layout.delay(project_id, algorithm)
+
+        return {"status": "SUCCESS", "scheduled": jobs}
+
+    except Exception as e:
+        logger.exception(f"Erreur lors de la planification spéculative: {e}")
+        return {"status": "FAILURE", "error": str(e)}
+
+
+@celery_app.task(bind=True, name="tasks.speculative_layout")
+def speculative_layout(self, project_id: str, algorithm: str):
+    """
+    Précalcule une variante de layout en tâche de fond (file "speculative").
+    Abandonnée si un calcul de premier plan est en attente ; peut être
+    interrompue à tout moment par `preempt_speculative_jobs`.
+    """
+    r = _get_redis()
+    if not _workers_idle(r):
+        return {"status": "SKIPPED", "reason": "busy"}
+
+    r.sadd(INFLIGHT_KEY, self.request.id)
+    try:
+        async def load_project():
+            return await Project.get_motor_collection().find_one(
+                {"_id": ObjectId(project_id)},
+                {"source_file_path": 1, "mapping": 1, "topology_key": 1}
+            )
+
+        doc = _run_in_db(load_project, [Project])
+        if not doc or not doc.get("topology_key") or not doc.get("source_file_path"):
+            return {"status": "SKIPPED", "reason": "project_unavailable"}
+
+        mapping = doc.get("mapping") or {}
+        result = process_graph_file_sync(Path(doc["source_file_path"]), mapping, algorithm)
+
+        # La topologie a pu changer pendant le calcul (nouveau fichier ou mapping)
+        topology_key = compute_topology_key(doc["source_file_path"], result.get("mapping") or mapping)
+        if topology_key != doc["topology_key"]:
+            return {"status": "SKIPPED", "reason": "topology_changed"}
+
+        resolved_algorithm = result.get("algorithm_used", algorithm)
+
+        async def store_variant():
+            await save_variant(project_id, resolved_algorithm, topology_key, result["nodes"], speculative=True)
+
+        _run_in_db(store_variant, [LayoutVariant])
+        return {"status": "SUCCESS", "project_id": project_id, "algorithm": resolved_algorithm}
+
+    except Exception as e:
+        logger.warning(f"Echec du précalcul spéculatif {algorithm} pour le projet {project_id}: {e}")
+        return {"status": "FAILURE", "error": str(e)}
+    finally:
+        r.srem(INFLIGHT_KEY, self.request.id)
+
+
+@celery_app.task(bind=True, name="tasks.shared_layout_preview")
+def shared_layout_preview(self, project_id: str, algorithm: str, topology_key: str):
+    """
+    Calcule le layout demandé depuis un lien de partage et l'enregistre comme
+    variante du projet : les demandes suivantes (même topologie, même
+    algorithme) sont servies sans recalcul. Le projet lui-même n'est pas modifié.
+    Libère à sa fin la réservation Redis qui regroupe les demandes concurrentes.
+    """
+    try:
+        async def load_project():
+            return await Project.get_motor_collection().find_one(
+                {"_id": ObjectId(project_id)},
+                {"source_file_path": 1, "mapping": 1, "topology_key": 1}
+            )
+
+        doc = _run_in_db(load_project, [Project])
+        if not doc or doc.get("topology_key") != topology_key or not doc.get("source_file_path"):
+            return {"status": "FAILURE", "error": "Projet modifié ou introuvable"}
+
+        mapping = doc.get("mapping") or {}
+        result = process_graph_file_sync(Path(doc["source_file_path"]), mapping, algorithm)
+        if compute_topology_key(doc["source_file_path"], result.get("mapping") or mapping) == topology_key:
+            resolved_algorithm = result.get("algorithm_used", algorithm)
+
+            async def store_variant():
+                # Variante non choisie par le propriétaire : comptée comme spéculative jusqu'à ce qu'il l'utilise
+                await save_variant(project_id, resolved_algorithm, topology_key, result["nodes"], speculative=True)
+
+            _run_in_db(store_variant, [LayoutVariant])
+        return {"status": "SUCCESS", "result": result}
+
+    except Exception as e:
+        logger.warning(f"Echec du layout partagé {algorithm} pour le projet {project_id}: {e}")
+        return {"status": "FAILURE", "error": str(e)}
+    finally:
         try:
-            loop.run_until_complete(run_cleanup())
-        finally:
-            loop.close()
-            client.close()
-            
+            _get_redis().delete(share_layout_key(project_id, topology_key, algorithm))
+        except Exception:
+            pass
+
+
+@celery_app.task(bind=True, name="tasks.subgraph_layout")
+def subgraph_layout(self, parent_id: str, parent_topology_key: str, nodes: list, algorithm: str, derived_id: str = None):
+    """
+    Spatialise un sous-graphe trop coûteux pour être calculé dans la requête.
+    Avec `derived_id`, le résultat devient la variante active du projet dérivé
+    (algorithme et métriques mis à jour) ; sinon c'est une vue temporaire.
+    """
+    try:
+        async def load_parent():
+            doc = await Project.get_motor_collection().find_one(
+                {"_id": ObjectId(parent_id)},
+                {"topology_key": 1, "graph_data.nodes": 1}
+            )
+            if not doc or doc.get("topology_key") != parent_topology_key:
+                return None, None
+            return await load_topology(parent_id), (doc.get("graph_data") or {}).get("nodes") or []
+
+        topology, node_docs = _run_in_db(load_parent, [Project])
+        if topology is None:
+            return {"status": "FAILURE", "error": "Le projet parent a été modifié ou supprimé"}
+
+        graph_data = layout_subgraph(topology, np.asarray(nodes, dtype=np.int64), node_docs, algorithm)
+
+        if derived_id:
+            async def store_layout():
+                doc = await Project.get_motor_collection().find_one({"_id": ObjectId(derived_id)}, {"topology_key": 1})
+                if not doc:
+                    return
+                await save_variant(derived_id, graph_data["algorithm_used"], doc["topology_key"], graph_data["nodes"])
+                await update_project_fields(derived_id, {
+                    "algorithm": graph_data["algorithm_used"],
+                    "metadata": {**graph_data["metadata"], "parent_id": parent_id},
+                    "node_count": graph_data["metadata"].get("node_count", 0),
+                    "edge_count": graph_data["metadata"].get("edge_count", 0),
+                    "updated_at": datetime.now(timezone.utc)
+                })
+
+            _run_in_db(store_layout, [Project, LayoutVariant])
+        return {"status": "SUCCESS", "result": graph_data}
+
+    except Exception as e:
+        logger.warning(f"Echec du layout {algorithm} du sous-graphe de {parent_id}: {e}")
+        return {"status": "FAILURE", "error": str(e)}
+
+
+@celery_app.task(bind=True, name="tasks.compute_graph_analytics")
+def compute_graph_analytics(self, project_id: str, metrics: list, force: bool = False):
+    """
+    Calcule des métriques par nœud (degré, PageRank, k-core, communautés,
+    betweenness...) sur le graphe sauvegardé d'un projet et les stocke en
+    colonnes typées dans `node_columns`.
+
+    Les colonnes déjà calculées pour la topologie courante (mêmes paramètres)
+    sont réutilisées, sauf avec `force=True`. L'échec d'une métrique
+    n'empêche pas l'enregistrement des autres.
+    """
+    recorder = StageRecorder("analytics")
+    try:
+        metrics = validate_metrics(metrics)
+
+        async def load_project():
+            doc = await Project.get_motor_collection().find_one(
+                {"_id": ObjectId(project_id)},
+                {"graph_data.nodes": 1, "graph_data.edges": 1, "topology_key": 1}
+            )
+            existing = set()
+            if doc and doc.get("topology_key") and not force:
+                existing = await existing_column_keys(project_id, doc["topology_key"])
+            return doc, existing
+
+        doc, existing = _run_in_db(load_project, [Project, NodeColumn])
+        if not doc or not doc.get("graph_data") or not doc.get("topology_key"):
+            return {"status": "SKIPPED", "reason": "project_unavailable"}
+        topology_key = doc["topology_key"]
+
+        with recorder.stage("build") as span:
+            graph = build_igraph(graph_data_arrays(doc["graph_data"]))
+            span.update({"nodes": graph.vcount(), "edges": graph.ecount()})
+        counts = {"nodes": graph.vcount(), "edges": graph.ecount()}
+
+        columns, cached, failed = [], [], {}
+        for metric in metrics:
+            if (metric, make_params_key(metric_params(metric, graph.vcount()))) in existing:
+                cached.append(metric)
+                continue
+            try:
+                with recorder.stage(f"analytics:{metric}", **counts):
+                    values, params, seconds = compute_node_metric(graph, metric)
+                columns.append((metric, values, params, seconds))
+            except Exception as e:
+                logger.warning(f"Echec de la métrique {metric} pour le projet {project_id}: {e}")
+                failed[metric] = str(e)
+
+        async def store_columns():
+            # La topologie a pu changer pendant le calcul (nouveau fichier ou mapping)
+            current = await Project.get_motor_collection().find_one({"_id": ObjectId(project_id)}, {"topology_key": 1})
+            if not current or current.get("topology_key") != topology_key:
+                return False
+            for metric, values, params, seconds in columns:
+                await save_column(project_id, metric, topology_key, values, params, summarize_column(metric, values), seconds)
+            return True
+
+        if columns and not _run_in_db(store_columns, [Project, NodeColumn]):
+            return {"status": "SKIPPED", "reason": "topology_changed"}
+
+        logger.info(f"Métriques du projet {project_id}: " + ", ".join(
+            f"{span['stage']}={span['seconds']}s" for span in recorder.spans
+        ))
+        return {
+            "status": "SUCCESS" if not failed else "PARTIAL",
+            "computed": [metric for metric, *_ in columns],
+            "cached": cached,
+            "failed": failed,
+            "stages": recorder.spans
+        }
+
+    except Exception as e:
+        logger.exception(f"Echec du calcul des métriques du projet {project_id}")
+        return {"status": "FAILURE", "error": str(e)}
+
+
+@celery_app.task(bind=True, name="tasks.extract_graph_backbone")
+def extract_graph_backbone(self, project_id: str, method: str, budget: int = None):
+    """
+    Extrait le squelette d'arêtes d'un projet (au plus `budget` arêtes,
+    BACKBONE_EDGE_BUDGET par défaut) et l'écrit à côté du fichier source.
+    Le résumé est stocké dans `metadata.backbone` ; graph_data n'est pas modifié.
+    """
+    recorder = StageRecorder("backbone")
+    try:
+        validate_method(method)
+        budget = budget or BACKBONE_EDGE_BUDGET
+
+        async def load_project():
+            return await Project.get_motor_collection().find_one(
+                {"_id": ObjectId(project_id)},
+                {
+                    "graph_data.nodes.id": 1, "graph_data.edges.source": 1, "graph_data.edges.target": 1,
+                    "graph_data.edges.weight": 1, "topology_key": 1, "source_file_path": 1, "backbone_path": 1
+                }
+            )
+
+        doc = _run_in_db(load_project, [Project])
+        if not doc or not doc.get("graph_data") or not doc.get("topology_key") or not doc.get("source_file_path"):
+            return {"status": "SKIPPED", "reason": "project_unavailable"}
+        topology_key = doc["topology_key"]
+
+        with recorder.stage("build") as span:
+            arrays = graph_data_arrays(doc["graph_data"])
+            span.update({"nodes": len(arrays.node_keys), "edges": len(arrays.edges)})
+        with recorder.stage(f"backbone:{method}", nodes=len(arrays.node_keys), edges=len(arrays.edges)):
+            rows, summary = extract_backbone(arrays, method, budget)
+            path = save_backbone(rows, summary, doc["source_file_path"], topology_key)
+
+        async def store_backbone():
+            # La topologie a pu changer pendant le calcul (nouveau fichier ou mapping)
+            result = await Project.get_motor_collection().update_one(
+                {"_id": ObjectId(project_id), "topology_key": topology_key},
+                {"$set": {"backbone_path": path, "metadata.backbone": summary}, "$inc": {"version": 1}}
+            )
+            return result.matched_count > 0
+
+        if not _run_in_db(store_backbone, [Project]):
+            Path(path).unlink(missing_ok=True)
+            return {"status": "SKIPPED", "reason": "topology_changed"}
+        if doc.get("backbone_path") and doc["backbone_path"] != path:
+            Path(doc["backbone_path"]).unlink(missing_ok=True)
+
+        logger.info(f"Squelette du projet {project_id}: {summary['edges']}/{summary['edge_count']} arêtes ({method})")
+        return {"status": "SUCCESS", "backbone": summary, "stages": recorder.spans}
+
     except Exception as e:
-        print(f"Erreur lors du cleanup périodique: {e}")
+        logger.exception(f"Echec de l'extraction du squelette du projet {project_id}")
+        return {"status": "FAILURE", "error": str(e)}
+
+
+@celery_app.task(bind=True, name="tasks.render_project_preview")
+def render_project_preview(self, project_id: str):
+    """
+    Régénère les aperçus d'un projet à partir de la variante de son algorithme
+    courant (bascule instantanée vers une variante déjà calculée, sans job de layout).
+    """
+    recorder = StageRecorder("preview")
+    try:
+        async def load_project():
+            doc = await Project.get_motor_collection().find_one(
+                {"_id": ObjectId(project_id)},
+                {
+                    "graph_data.nodes.id": 1, "graph_data.edges.source": 1, "graph_data.edges.target": 1,
+                    "topology_key": 1, "source_file_path": 1, "algorithm": 1, "preview_path": 1, "is_featured": 1
+                }
+            )
+            if not doc or not doc.get("topology_key"):
+                return doc, None
+            return doc, await get_variant(project_id, doc.get("algorithm"), doc["topology_key"])
+
+        doc, variant = _run_in_db(load_project, [Project, LayoutVariant])
+        if not doc or not doc.get("graph_data") or not doc.get("source_file_path") or not variant:
+            return {"status": "SKIPPED", "reason": "project_unavailable"}
 
+        topology_key = doc["topology_key"]
+        preview = _render_preview(
+            project_id, unpack_positions(variant.positions), graph_data_arrays(doc["graph_data"]).edges,
+            doc["source_file_path"], topology_key, variant.algorithm, recorder
+        )
+        if not preview:
+            return {"status": "FAILURE", "error": "preview_failed"}
+        path, summary = preview
+
+        async def store_preview():
+            # Le layout a pu changer de nouveau pendant le rendu : ne pas écraser un aperçu plus récent
+            result = await Project.get_motor_collection().update_one(
+                {"_id": ObjectId(project_id), "topology_key": topology_key, "algorithm": variant.algorithm},
+                {
+                    "$set": {"preview_path": path, "preview_key": summary["key"], "metadata.preview": summary},
+                    "$inc": {"version": 1}
+                }
+            )
+            return result.matched_count > 0
 
+        if not _run_in_db(store_preview, [Project]):
+            if path != doc.get("preview_path"):
+                Path(path).unlink(missing_ok=True)
+            return {"status": "SKIPPED", "reason": "layout_changed"}
+        if doc.get("preview_path") and doc["preview_path"] != path:
+            Path(doc["preview_path"]).unlink(missing_ok=True)
+        if doc.get("is_featured"):
+            _invalidate_gallery()
+        return {"status": "SUCCESS", "preview": summary, "stages": recorder.spans}
+
+    except Exception as e:
+        logger.exception(f"Echec du rendu de l'aperçu du projet {project_id}")
+        return {"status": "FAILURE", "error": str(e)}
@@ -0,0 +1,36 @@
+"""Classement des arêtes du squelette (services.backbone)."""
+
+import numpy as np
+
+from services.backbone import _topk_order, _forest_order
+
+
+def _edges(pairs):
+    return np.array(pairs, dtype=np.int64)
+
+
+def test_topk_ranks_edges_by_best_endpoint_rank():
+    # Étoile de centre 0, plus une arête 1 - 2 plus lourde que 0 - 3
+    edges = _edges([[0, 1], [0, 2], [0, 3], [1, 2]])
+    weights = np.array([3.0, 2.0, 1.0, 1.5])
+    order, ranks = _topk_order(4, edges, weights)
+    # 0 - 3 est l'arête la plus lourde de 3 : elle passe avant 1 - 2
+    assert ranks.tolist() == [0.0, 0.0, 0.0, 1.0]
+    assert order.tolist() == [0, 1, 2, 3]
+
+
+def test_forest_keeps_maximum_spanning_forest_first():
+    # Triangle avec une multi-arête 1 - 0 et une boucle 2 - 2
+    edges = _edges([[0, 1], [1, 2], [0, 2], [1, 0], [2, 2]])
+    weights = np.array([5.0, 4.0, 1.0, 2.0, 10.0])
+    order, scores = _forest_order(3, edges, weights)
+    assert scores.tolist() == [0.0, 0.0, 1.0, 1.0, 1.0]
+    assert order[:2].tolist() == [0, 1]
+
+
+def test_forest_spans_every_component():
+    edges = _edges([[0, 1], [2, 3], [3, 4], [2, 4]])
+    weights = np.array([1.0, 3.0, 2.0, 1.0])
+    order, scores = _forest_order(5, edges, weights)
+    assert scores.tolist() == [0.0, 0.0, 0.0, 1.0]
+    assert order.tolist() == [1, 2, 0, 3]
@@ -0,0 +1,61 @@
+"""Évaluation des filtres d'attributs en masques et bitsets (services.facets)."""
+
+import numpy as np
+import pytest
+
+from services.facets import nodes_frame, evaluate_filter, pack_bitset
+
+
+@pytest.fixture
+def df():
+    return nodes_frame([
+        {"id": "a", "city": "Paris", "pop": 10, "active": True},
+        {"id": "b", "city": "Lyon", "pop": 5, "active": False},
+        {"id": "c", "city": "Paris"},
+        {"id": "d", "city": "Marseille", "pop": 20},
+    ])
+
+
+@pytest.mark.parametrize("condition, expected", [
+    ({"attribute": "city", "op": "eq", "value": "Paris"}, [True, False, True, False]),
+    ({"attribute": "city", "op": "ne", "value": "Paris"}, [False, True, False, True]),
+    ({"attribute": "pop", "op": "gt", "value": "6"}, [True, False, False, True]),
+    ({"attribute": "pop", "op": "between", "value": [5, 10]}, [True, True, False, False]),
+    ({"attribute": "city", "op": "in", "value": ["Lyon", "Marseille"]}, [False, True, False, True]),
+    ({"attribute": "city", "op": "contains", "value": "ARI"}, [True, False, True, False]),
+    ({"attribute": "pop", "op": "missing"}, [False, False, True, False]),
+    ({"attribute": "active", "op": "eq", "value": True}, [True, False, False, False]),
+    ({"attribute": "color", "op": "eq", "value": "red"}, [False, False, False, False]),
+    ({"attribute": "color", "op": "missing"}, [True, True, True, True]),
+])
+def test_single_condition(df, condition, expected):
+    assert evaluate_filter(df, [condition]).tolist() == expected
+
+
+def test_conditions_combined_with_all_or_any(df):
+    conditions = [
+        {"attribute": "city", "op": "eq", "value": "Paris"},
+        {"attribute": "pop", "op": "gte", "value": 10},
+    ]
+    assert evaluate_filter(df, conditions, "all").tolist() == [True, False, False, False]
+    assert evaluate_filter(df, conditions, "any").tolist() == [True, False, True, True]
+
+
+def test_no_condition_selects_every_node(df):
+    assert evaluate_filter(df, []).tolist() == [True] * 4
+
+
+@pytest.mark.parametrize("conditions, mode", [
+    ([{"attribute": "city", "op": "like", "value": "P"}], "all"),
+    ([{"attribute": "pop", "op": "gt", "value": "beaucoup"}], "all"),
+    ([{"attribute": "pop", "op": "between", "value": [1]}], "all"),
+    ([], "none"),
+])
+def test_invalid_filter(df, conditions, mode):
+    with pytest.raises(ValueError):
+        evaluate_filter(df, conditions, mode)
+
+
+def test_bitset_is_little_endian_per_node():
+    mask = np.array([True, False, True, False, False, False, False, False, True])
+    assert pack_bitset(mask) == b"\x05\x01"
@@ -0,0 +1,29 @@
+"""Curseurs de pagination de la galerie (services.gallery)."""
+
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from beanie import PydanticObjectId
+
+from services.gallery import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 14, 15, 9, 26, 535000, tzinfo=timezone.utc)
+    project_id = PydanticObjectId()
+    cursor = encode_cursor(created_at, project_id)
+
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == (created_at, project_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "pas-un-curseur",
+    base64.urlsafe_b64encode(b"2026-03-14T15:09:26|inconnu").decode(),
+    base64.urlsafe_b64encode(b"hier|" + str(PydanticObjectId()).encode()).decode(),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
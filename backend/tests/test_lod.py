@@ -0,0 +1,47 @@
+"""Plafonnement des niveaux de détail (services.lod)."""
+
+import numpy as np
+import pytest
+
+from services import lod
+
+
+@pytest.fixture(autouse=True)
+def small_levels(monkeypatch):
+    monkeypatch.setattr(lod, "LOD_MAX_CLUSTERS", 4)
+
+
+def _chain_level(num_nodes):
+    """Un super-nœud par nœud d'une chaîne 0 - 1 - ... - (n - 1)."""
+    membership = np.arange(num_nodes, dtype=np.int32)
+    edges = np.column_stack([np.arange(num_nodes - 1), np.arange(1, num_nodes)])
+    return [membership], [lod._aggregate_edges(membership, edges, np.ones(num_nodes - 1))]
+
+
+def test_cap_levels_groups_small_clusters():
+    memberships, level_edges = _chain_level(10)
+    lod._cap_levels(memberships, level_edges)
+
+    assert len(memberships) == len(level_edges) == 2
+    # Les deux plus grands gardés, les suivants regroupés par paquets de 4
+    assert memberships[1].tolist() == [0, 1, 2, 2, 2, 2, 3, 3, 3, 3]
+    pairs = {(int(e["source"]), int(e["target"])): int(e["count"]) for e in level_edges[1]}
+    assert pairs == {(0, 1): 1, (1, 2): 1, (2, 3): 1}
+
+
+def test_cap_levels_adds_levels_until_bounded():
+    memberships, level_edges = _chain_level(40)
+    lod._cap_levels(memberships, level_edges)
+
+    groups = [int(m.max()) + 1 for m in memberships]
+    assert groups[-1] <= 4
+    assert all(coarse < fine for fine, coarse in zip(groups, groups[1:]))
+    assert len(level_edges) == len(memberships)
+    # Les arêtes externes de la chaîne restent comptées une fois chacune
+    assert int(level_edges[-1]["count"].sum()) == groups[-1] - 1
+
+
+def test_cap_levels_keeps_bounded_hierarchy():
+    memberships, level_edges = _chain_level(3)
+    lod._cap_levels(memberships, level_edges)
+    assert len(memberships) == len(level_edges) == 1
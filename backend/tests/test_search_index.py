@@ -0,0 +1,65 @@
+"""Classement des résultats de l'index de recherche (services.search_index)."""
+
+from services.search_index import (
+    NodeSearchIndex, TIER_EXACT_ID, TIER_EXACT_LABEL, TIER_LABEL_PREFIX, TIER_SUBSTRING
+)
+
+
+NODES = [
+    {"id": "a1", "label": "Paris"},
+    {"id": "paris", "label": "Capitale"},
+    {"id": "b2", "label": "Paris Nord"},
+    {"id": "c3", "label": "Gare de Paris-Est"},
+    {"id": "d4", "label": "Lyon"},
+]
+
+
+def _ranked(result):
+    return [(r["index"], r["tier"]) for r in result["results"]]
+
+
+def test_search_ranks_exact_then_prefix_then_substring():
+    result = NodeSearchIndex.build(NODES).search("paris")
+    assert _ranked(result) == [
+        (1, TIER_EXACT_ID),
+        (0, TIER_EXACT_LABEL),
+        (2, TIER_LABEL_PREFIX),
+        (3, TIER_SUBSTRING),
+    ]
+    assert result["total"] == 4
+    assert not result["truncated"]
+
+
+def test_search_normalizes_case_and_accents():
+    index = NodeSearchIndex.build(NODES)
+    assert _ranked(index.search("  PÂRIS ")) == _ranked(index.search("paris"))
+
+
+def test_search_breaks_ties_by_label_length():
+    index = NodeSearchIndex.build([
+        {"id": "x", "label": "Parisienne"},
+        {"id": "y", "label": "Parisien"},
+    ])
+    assert [r["index"] for r in index.search("paris")["results"]] == [1, 0]
+
+
+def test_search_needs_three_characters_for_substrings():
+    # "is" n'est le préfixe d'aucun identifiant ni libellé
+    assert NodeSearchIndex.build(NODES).search("is")["total"] == 0
+
+
+def test_search_paginates_ranked_results():
+    result = NodeSearchIndex.build(NODES).search("paris", offset=1, limit=2)
+    assert [r["index"] for r in result["results"]] == [0, 2]
+    assert result["total"] == 4
+
+
+def test_search_empty_query():
+    assert NodeSearchIndex.build(NODES).search("   ") == {"results": [], "total": 0, "truncated": False}
+
+
+def test_saved_index_ranks_identically(tmp_path):
+    index = NodeSearchIndex.build(NODES)
+    path = tmp_path / "nodes.search.npz"
+    index.save(path)
+    assert NodeSearchIndex.load(path).search("paris") == index.search("paris")
@@ -0,0 +1,54 @@
+"""Requêtes topologiques sur l'adjacence CSR (services.topology)."""
+
+import numpy as np
+import pytest
+
+from services.topology import ProjectTopology
+
+
+def _topology(num_nodes, edges, weights=None):
+    edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+    weights = np.ones(len(edges)) if weights is None else np.array(weights, dtype=np.float64)
+    return ProjectTopology(num_nodes, edges, weights)
+
+
+@pytest.fixture
+def chain():
+    # 0 - 1 - 2 - 3, et 4 isolé
+    return _topology(5, [[0, 1], [1, 2], [2, 3]])
+
+
+def test_neighborhood_orders_nodes_by_hop(chain):
+    result = chain.neighborhood([0], hops=2)
+    assert result == {"nodes": [0, 1, 2], "hops": [0, 1, 2], "truncated": False}
+
+
+def test_neighborhood_deduplicates_seeds(chain):
+    result = chain.neighborhood([1, 1], hops=1)
+    assert result["nodes"] == [1, 0, 2]
+    assert result["hops"] == [0, 1, 1]
+
+
+def test_neighborhood_stops_at_max_nodes(chain):
+    result = chain.neighborhood([0], hops=5, max_nodes=2)
+    assert result == {"nodes": [0, 1], "hops": [0, 1], "truncated": True}
+
+
+def test_neighborhood_rejects_unknown_nodes(chain):
+    with pytest.raises(ValueError):
+        chain.neighborhood([5], hops=1)
+
+
+def test_path_counts_hops_unless_weighted():
+    # Raccourci 0 - 2 plus long que le détour par 1
+    triangle = _topology(3, [[0, 1], [1, 2], [0, 2]], [1.0, 1.0, 5.0])
+    assert triangle.path(0, 2) == {"nodes": [0, 2], "length": 1.0}
+    assert triangle.path(0, 2, weighted=True) == {"nodes": [0, 1, 2], "length": 2.0}
+
+
+def test_path_between_disconnected_nodes(chain):
+    assert chain.path(0, 4) == {"nodes": [], "length": None}
+
+
+def test_path_to_itself(chain):
+    assert chain.path(2, 2) == {"nodes": [2], "length": 0.0}
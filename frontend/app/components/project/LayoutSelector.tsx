@@ -8,6 +8,7 @@ import { useJobPolling } from '@/app/hooks/useJobPolling';
 interface LayoutSelectorProps {
     projectId?: string;
     onLayoutUpdate: (newGraphData: any) => void;
+    onPositionsUpdate?: (positions: Float32Array) => void;
     onLayoutRequest?: (algorithm: string) => Promise<any>;
     currentAlgorithm?: string;
     onAlgorithmChange?: (algorithm: string) => void;
@@ -23,7 +24,7 @@ const ALGORITHMS = [
     { id: 'random', label: 'Aléatoire', description: 'Position aléatoire des nœuds, utile pour comparaison' },
 ];
 
-export default function LayoutSelector({ projectId, onLayoutUpdate, onLayoutRequest, currentAlgorithm, onAlgorithmChange }: LayoutSelectorProps) {
+export default function LayoutSelector({ projectId, onLayoutUpdate, onPositionsUpdate, onLayoutRequest, currentAlgorithm, onAlgorithmChange }: LayoutSelectorProps) {
     const [isLoading, setIsLoading] = useState(false);
     const { addToast } = useToastStore();
     const [isOpen, setIsOpen] = useState(false);
@@ -68,7 +69,8 @@ export default function LayoutSelector({ projectId, onLayoutUpdate, onLayoutRequ
             if (onLayoutRequest) {
                 response = await onLayoutRequest(algorithm);
             } else if (projectId) {
-                response = await apiClient.post(`/projects/${projectId}/layout`, { algorithm });
+                // Variante en cache : seul le buffer de positions est téléchargé, pas tout graph_data
+                response = await apiClient.post(`/projects/${projectId}/layout`, { algorithm, graph_data: !onPositionsUpdate });
             } else {
                 throw new Error("Configuration invalide pour LayoutSelector");
             }
@@ -78,6 +80,14 @@ export default function LayoutSelector({ projectId, onLayoutUpdate, onLayoutRequ
                 setCurrentJobId(response.job_id);
                 // isLoading reste true jusqu'à la fin du polling
             }
+            // Variante en cache sans graph_data : positions float32 (N x 3) dans l'ordre des nœuds
+            else if (response && response.cached && !response.graph_data && onPositionsUpdate) {
+                const url = response.positions_url || `/projects/${projectId}/layouts/${response.algorithm}`;
+                const buffer = await apiClient.getBuffer(url);
+                onPositionsUpdate(new Float32Array(buffer));
+                addToast('Disposition mise à jour avec succès', 'success');
+                setIsLoading(false);
+            }
             // Gestion synchrone
             else if (response && response.graph_data) {
                 onLayoutUpdate(response.graph_data);
@@ -9,13 +9,16 @@ import { ArrowLeft, Box, Share2, Search, ExternalLink } from 'lucide-react';
 export default function GalleryPage() {
     const [projects, setProjects] = useState<Project[]>([]);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [searchQuery, setSearchQuery] = useState('');
 
     useEffect(() => {
         const fetchProjects = async () => {
             try {
-                const data = await projectsService.getPublicProjects();
-                setProjects(data);
+                const page = await projectsService.getPublicProjects();
+                setProjects(page.projects);
+                setNextCursor(page.nextCursor);
             } catch (error) {
                 console.error("Failed to fetch gallery:", error);
             } finally {
@@ -25,6 +28,20 @@ export default function GalleryPage() {
         fetchProjects();
     }, []);
 
+    const loadMore = async () => {
+        if (!nextCursor || isLoadingMore) return;
+        setIsLoadingMore(true);
+        try {
+            const page = await projectsService.getPublicProjects(nextCursor);
+            setProjects(prev => [...prev, ...page.projects]);
+            setNextCursor(page.nextCursor);
+        } catch (error) {
+            console.error("Failed to fetch gallery page:", error);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     const filteredProjects = projects.filter(p =>
         p.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
         (p.description && p.description.toLowerCase().includes(searchQuery.toLowerCase()))
@@ -98,10 +115,20 @@ export default function GalleryPage() {
                                 >
                                     <Link href={`/projects/${project.id}`} className="group block h-full">
                                         <div className="h-full relative overflow-hidden rounded-2xl border border-surface-800 bg-surface-900/50 backdrop-blur-sm transition-all duration-300 hover:border-primary-500/50 hover:shadow-2xl hover:shadow-primary-500/10 hover:-translate-y-1">
-                                            {/* Preview Placeholder (Gradient) */}
+                                            {/* Vignette du projet (placeholder en dégradé tant qu'elle n'est pas générée) */}
                                             <div className={`h-40 w-full bg-gradient-to-br ${['from-blue-500/10 to-purple-500/10', 'from-emerald-500/10 to-teal-500/10', 'from-orange-500/10 to-red-500/10'][index % 3]
-                                                } group-hover:opacity-100 transition-opacity flex items-center justify-center`}>
-                                                <Box className="w-12 h-12 text-surface-600 group-hover:text-primary-400 transition-colors duration-300 transform group-hover:scale-110" />
+                                                } group-hover:opacity-100 transition-opacity flex items-center justify-center overflow-hidden`}>
+                                                {projectsService.getThumbnailUrl(project) ? (
+                                                    // eslint-disable-next-line @next/next/no-img-element
+                                                    <img
+                                                        src={projectsService.getThumbnailUrl(project)!}
+                                                        alt={`Aperçu de ${project.name}`}
+                                                        loading="lazy"
+                                                        className="h-full w-full object-cover transition-transform duration-300 group-hover:scale-105"
+                                                    />
+                                                ) : (
+                                                    <Box className="w-12 h-12 text-surface-600 group-hover:text-primary-400 transition-colors duration-300 transform group-hover:scale-110" />
+                                                )}
                                             </div>
 
                                             <div className="p-6">
@@ -138,6 +165,18 @@ export default function GalleryPage() {
                         </div>
                     )}
 
+                    {!isLoading && nextCursor && (
+                        <div className="mt-12 text-center">
+                            <button
+                                onClick={loadMore}
+                                disabled={isLoadingMore}
+                                className="rounded-xl border border-surface-700 bg-surface-900 px-6 py-3 text-sm font-medium text-surface-200 transition-colors hover:border-primary-500 hover:text-white disabled:opacity-50"
+                            >
+                                {isLoadingMore ? 'Chargement...' : 'Charger plus de projets'}
+                            </button>
+                        </div>
+                    )}
+
                     {!isLoading && filteredProjects.length === 0 && (
                         <div className="text-center py-24">
                             <div className="inline-flex h-16 w-16 items-center justify-center rounded-full bg-surface-900 text-surface-600 mb-6">
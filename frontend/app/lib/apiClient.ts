@@ -35,6 +35,14 @@ class ApiClient {
     endpoint: string,
     options: FetchOptions = {}
   ): Promise<T> {
+    return (await this.send<T>(endpoint, options)).data;
+  }
+
+  /** Exécute la requête et retourne le corps décodé avec les en-têtes de la réponse */
+  private async send<T>(
+    endpoint: string,
+    options: FetchOptions = {}
+  ): Promise<{ data: T; headers: Headers }> {
     const { timeout = this.defaultTimeout, ...fetchOptions } = options;
     const url = `${this.baseURL}${endpoint}`;
 
@@ -90,17 +98,22 @@ class ApiClient {
 
       // Handle 204 No Content or empty responses
       if (response.status === 204 || response.headers.get('content-length') === '0') {
-        return undefined as T;
+        return { data: undefined as T, headers: response.headers };
       }
 
       // Check if response has JSON content
       const contentType = response.headers.get('content-type');
       if (contentType && contentType.includes('application/json')) {
-        return await response.json();
+        return { data: await response.json(), headers: response.headers };
+      }
+
+      // Buffers binaires (positions, colonnes analytiques)
+      if (contentType && contentType.includes('application/octet-stream')) {
+        return { data: (await response.arrayBuffer()) as T, headers: response.headers };
       }
 
       // Return empty object for non-JSON responses
-      return undefined as T;
+      return { data: undefined as T, headers: response.headers };
     } catch (error) {
       clearTimeout(timeoutId);
 
@@ -121,6 +134,16 @@ class ApiClient {
     return this.request<T>(endpoint, { ...options, method: 'GET' });
   }
 
+  /** Requête GET avec les en-têtes de la réponse (pagination : X-Next-Cursor, X-Total-Count) */
+  async getWithHeaders<T>(endpoint: string, options?: FetchOptions): Promise<{ data: T; headers: Headers }> {
+    return this.send<T>(endpoint, { ...options, method: 'GET' });
+  }
+
+  /** Requête GET d'un buffer binaire (application/octet-stream) */
+  async getBuffer(endpoint: string, options?: FetchOptions): Promise<ArrayBuffer> {
+    return this.request<ArrayBuffer>(endpoint, { ...options, method: 'GET' });
+  }
+
   /** Requête POST */
   async post<T>(endpoint: string, data?: unknown, options?: FetchOptions): Promise<T> {
     const isFormData = data instanceof FormData;
@@ -17,6 +17,7 @@ import { useToastStore } from '@/app/store/useToastStore';
 import { ProjectSkeleton } from '@/app/components/ui/ProjectSkeleton';
 import { useAuth } from '@/app/hooks/useAuth';
 import { generateProjectReport, generateJSONExport, generateCSVExport, downloadFile } from '@/app/utils/exportUtils';
+import { applyPositions } from '@/app/utils/layoutUtils';
 
 export default function ProjectPage({ params }: { params: Promise<{ id: string }> }) {
     const { id } = use(params);
@@ -97,6 +98,13 @@ export default function ProjectPage({ params }: { params: Promise<{ id: string }
         }));
     }, []);
 
+    const handlePositionsUpdate = useCallback((positions: Float32Array) => {
+        setProject((prev: any) => {
+            const graphData = applyPositions(prev?.graph_data, positions);
+            return graphData ? { ...prev, graph_data: graphData, updated_at: new Date().toISOString() } : prev;
+        });
+    }, []);
+
     // Handle XR state changes from GraphSceneXR
     const handleXRStateChange = useCallback((inXR: boolean) => {
         setIsInXR(inXR);
@@ -409,6 +417,7 @@ export default function ProjectPage({ params }: { params: Promise<{ id: string }
                         <LayoutSelector
                             projectId={id}
                             onLayoutUpdate={handleLayoutUpdate}
+                            onPositionsUpdate={handlePositionsUpdate}
                             currentAlgorithm={currentAlgorithm}
                             onAlgorithmChange={setCurrentAlgorithm}
                         />
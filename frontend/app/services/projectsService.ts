@@ -1,4 +1,5 @@
 import { apiClient } from '@/app/lib/apiClient';
+import { API_CONFIG } from '@/app/config/api';
 
 export interface CreateProjectPayload {
     file: File;
@@ -23,6 +24,12 @@ export interface Project {
     is_public?: boolean;
     is_featured?: boolean;
     description?: string;
+    preview_key?: string | null;
+}
+
+export interface ProjectPage {
+    projects: Project[];
+    nextCursor: string | null;
 }
 
 export interface JobResponse {
@@ -62,8 +69,17 @@ export const projectsService = {
         return apiClient.get<Project[]>('/projects/');
     },
 
-    getPublicProjects: async (): Promise<Project[]> => {
-        return apiClient.get<Project[]>('/projects/public');
+    getPublicProjects: async (cursor?: string | null): Promise<ProjectPage> => {
+        // Galerie paginée : le curseur de la page suivante est dans l'en-tête X-Next-Cursor
+        const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+        const { data, headers } = await apiClient.getWithHeaders<Project[]>(`/projects/public${query}`);
+        return { projects: data || [], nextCursor: headers.get('X-Next-Cursor') };
+    },
+
+    /** URL de la vignette PNG (versionnée par preview_key : mise en cache immuable) */
+    getThumbnailUrl: (project: Project): string | null => {
+        if (!project.preview_key) return null;
+        return `${API_CONFIG.BASE_URL}/projects/${project.id}/thumbnail.png?v=${encodeURIComponent(project.preview_key)}`;
     },
 
     getById: async (id: string): Promise<Project> => {
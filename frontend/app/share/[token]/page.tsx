@@ -10,6 +10,7 @@ import OverlayControls from '@/app/components/3DandXRComponents/UI/OverlayContro
 import LayoutSelector from '@/app/components/project/LayoutSelector';
 import FilterPanel from '@/app/components/project/FilterPanel';
 import { ProjectSkeleton } from '@/app/components/ui/ProjectSkeleton';
+import { applyPositions } from '@/app/utils/layoutUtils';
 
 export default function SharePage({ params }: { params: Promise<{ token: string }> }) {
     const { token } = use(params);
@@ -91,6 +92,13 @@ export default function SharePage({ params }: { params: Promise<{ token: string
         }));
     }, []);
 
+    const handlePositionsUpdate = useCallback((positions: Float32Array) => {
+        setProject((prev: any) => {
+            const graphData = applyPositions(prev?.graph_data, positions);
+            return graphData ? { ...prev, graph_data: graphData } : prev;
+        });
+    }, []);
+
     const handleLayoutRequest = useCallback(async (algorithm: string) => {
         return projectsService.updateSharedLayout(token, algorithm);
     }, [token]);
@@ -217,6 +225,7 @@ export default function SharePage({ params }: { params: Promise<{ token: string
                             <LayoutSelector
                                 projectId={undefined} // No projectId for shared view logic defaults
                                 onLayoutUpdate={handleLayoutUpdate}
+                                onPositionsUpdate={handlePositionsUpdate}
                                 onLayoutRequest={handleLayoutRequest}
                                 currentAlgorithm={currentAlgorithm}
                                 onAlgorithmChange={setCurrentAlgorithm}
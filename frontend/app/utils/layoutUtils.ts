@@ -0,0 +1,20 @@
+/**
+ * Applique un buffer de positions (float32, N x 3, dans l'ordre des nœuds)
+ * à graph_data. Retourne null si le nombre de positions ne correspond pas.
+ */
+export function applyPositions(graphData: any, positions: Float32Array): any | null {
+    const nodes = graphData?.nodes || [];
+    if (positions.length !== nodes.length * 3) {
+        console.warn("Positions ignorées : le nombre de nœuds ne correspond pas", positions.length / 3, nodes.length);
+        return null;
+    }
+    return {
+        ...graphData,
+        nodes: nodes.map((node: any, i: number) => ({
+            ...node,
+            x: positions[3 * i],
+            y: positions[3 * i + 1],
+            z: positions[3 * i + 2]
+        }))
+    };
+}